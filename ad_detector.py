@@ -0,0 +1,104 @@
+"""
+Detection of sponsored posts and course ads.
+
+A post is sponsored when its markdown has a "(Sponsored)" section. The markdown is scanned
+as a stream of fixed-size byte chunks, each lowercased on its own, so a post is never copied
+or lowercased whole, and the scan stops at the first hit. The number of the line the marker
+is on (the sponsored section's heading or paragraph) is recorded in the essay entry as
+sponsored_line. The scraper classifies every post as it writes it, so the maintenance
+scripts only have to scan posts saved before that.
+
+A post is a course ad when its title advertises a cohort-based course.
+"""
+from typing import Dict, Iterable, Iterator, Optional
+
+SPONSORED_MARKER: bytes = b"sponsored)"  # Lowercase marker of a sponsored section, as in "(Sponsored)"
+DETECT_CHUNK_SIZE: int = 64 * 1024  # Bytes scanned at a time
+
+COURSE_AD_PATTERNS = [
+    'become an ai engineer',
+    'last chance to enroll',
+    'last call: enrollment',
+    'cohort-based course',
+    'cohort 2',
+    'cohort 3',
+]
+PROMOTION_PATTERNS = ['last chance', 'last call', 'new launch', '🚀']
+
+
+def find_sponsored_in_chunks(chunks: Iterable[bytes]) -> Optional[int]:
+    """
+    Finds the sponsored marker, case-insensitively, in a stream of utf-8 chunks.
+    Returns the number of the line it's on (from 1), or None if there is none.
+    """
+    keep = len(SPONSORED_MARKER) - 1  # Bytes carried over, for a marker split between two chunks
+    tail = b""
+    lines = 0  # Line breaks before buffer
+    for chunk in chunks:
+        buffer = tail + chunk.lower()
+        hit = buffer.find(SPONSORED_MARKER)
+        if hit != -1:
+            return lines + buffer.count(b"\n", 0, hit) + 1
+        tail = buffer[-keep:]
+        lines += buffer.count(b"\n", 0, len(buffer) - len(tail))
+    return None
+
+
+def text_chunks(text: str, chunk_size: int = DETECT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields a text as utf-8, chunk_size characters at a time.
+    """
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size].encode('utf-8')
+
+
+def file_chunks(path: str, chunk_size: int = DETECT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields the bytes of a file, chunk_size at a time.
+    """
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def find_sponsored(text: str) -> Optional[int]:
+    """
+    Finds the sponsored section of a post's markdown: the number of its line, or None.
+    """
+    return find_sponsored_in_chunks(text_chunks(text))
+
+
+def find_sponsored_in_file(path: str) -> Optional[int]:
+    """
+    Finds the sponsored section of a markdown file: the number of its line, or None.
+    Raises OSError if the file can't be read.
+    """
+    return find_sponsored_in_chunks(file_chunks(path))
+
+
+def sponsored_fields(line: Optional[int]) -> Dict:
+    """
+    Gets the essay entry fields for the result of a sponsored scan.
+    """
+    return {'is_sponsored': line is not None, 'sponsored_line': line}
+
+
+def is_course_ad_title(title: str) -> bool:
+    """
+    Checks if a title advertises a course: promotional language and a cohort or enrollment
+    mention, or one of the known course ad titles.
+    """
+    title_lower = title.lower()
+    has_promotion = any(pattern in title_lower for pattern in PROMOTION_PATTERNS)
+    has_cohort = 'cohort' in title_lower or 'enroll' in title_lower
+    return (has_promotion and has_cohort) or any(pattern in title_lower for pattern in COURSE_AD_PATTERNS)
+
+
+def classify_post(title: str, md: str) -> Dict:
+    """
+    Gets the sponsored and course ad fields of a post, as the scraper writes it.
+    """
+    return {**sponsored_fields(find_sponsored(md)), 'is_course_ad': is_course_ad_title(title)}
@@ -1,116 +1,77 @@
 #!/usr/bin/env python3
 """
-Add markdown files that exist on disk but aren't in the JSON database
+Add markdown files that exist on disk but aren't in the essay catalog
 """
-import json
 import os
 import glob
 import re
 from datetime import datetime
 
+from ad_detector import find_sponsored_in_file, is_course_ad_title, sponsored_fields
+from catalog import Catalog
+from tagging import extract_tags
+
+HEADER_LINES = 30  # Lines searched for the date and like count
+PREVIEW_CHARS = 500  # Characters of content used for tagging
+
 def read_markdown_metadata(md_filepath):
-    """Extract metadata from markdown file"""
+    """Extract metadata from markdown file, reading it only as far as needed"""
     try:
+        title = None
+        lines = []
+        content_preview = ""
         with open(md_filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
-
-            # Extract title (first H1)
-            title = "Untitled"
-            for line in lines:
-                if line.startswith('# '):
+            for line in f:
+                if len(content_preview) < PREVIEW_CHARS:
+                    content_preview += line
+                line = line.rstrip('\n')
+                if len(lines) < HEADER_LINES:
+                    lines.append(line)
+
+                # Extract title (first H1)
+                if title is None and line.startswith('# '):
                     title = line[2:].strip()
+                if title is not None and len(lines) == HEADER_LINES and len(content_preview) >= PREVIEW_CHARS:
                     break
 
-            # Extract date
-            date = "Date not found"
-            for line in lines[:20]:
-                if line.startswith('**') and any(month in line for month in ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']):
-                    date = line.strip('*').strip()
-                    break
-
-            # Extract likes
-            like_count = "0"
-            for line in lines[:30]:
-                if 'Likes:' in line:
-                    match = re.search(r'Likes:\s*(\d+)', line)
-                    if match:
-                        like_count = match.group(1)
-                    break
-
-            # Check if sponsored
-            is_sponsored = "sponsored)" in content.lower() or "(sponsored)" in content.lower()
-
-            # Check if course ad
-            is_course_ad_check = any(p in title.lower() for p in [
-                'become an ai engineer',
-                'last chance to enroll',
-                'cohort-based course',
-                'cohort 2',
-                'cohort 3'
-            ])
-
-            return {
-                'title': title,
-                'subtitle': '',
-                'date': date,
-                'like_count': like_count,
-                'is_sponsored': is_sponsored,
-                'is_course_ad': is_course_ad_check,
-                'content_preview': content[:500]
-            }
+        # Extract date
+        date = "Date not found"
+        for line in lines[:20]:
+            if line.startswith('**') and any(month in line for month in ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']):
+                date = line.strip('*').strip()
+                break
+
+        # Extract likes
+        like_count = "0"
+        for line in lines[:30]:
+            if 'Likes:' in line:
+                match = re.search(r'Likes:\s*(\d+)', line)
+                if match:
+                    like_count = match.group(1)
+                break
+
+        title = "Untitled" if title is None else title
+        return {
+            'title': title,
+            'subtitle': '',
+            'date': date,
+            'like_count': like_count,
+            # Check if sponsored (streaming the file) and if course ad
+            **sponsored_fields(find_sponsored_in_file(md_filepath)),
+            'is_course_ad': is_course_ad_title(title),
+            'content_preview': content_preview[:PREVIEW_CHARS]
+        }
     except Exception as e:
         print(f"Error reading {md_filepath}: {e}")
         return None
 
-def extract_tags_from_content(title, content_preview):
-    """Extract tags based on title and content"""
-    TAG_PATTERNS = {
-        'system-design': ['system design', 'architecture', 'scalability', 'distributed', 'microservices', 'pattern', 'architectural'],
-        'databases': ['database', 'sql', 'nosql', 'mongodb', 'postgres', 'redis', 'debugging'],
-        'backend': ['backend', 'api', 'rest', 'graphql', 'server'],
-        'cloud': ['aws', 'azure', 'gcp', 'cloud', 's3', 'lambda', 'kubernetes', 'docker', 'load balancer'],
-        'ai-ml': ['ai', 'machine learning', 'ml', 'llm', 'gpt', 'neural', 'model', 'evals', 'clip', 'tensor', 'tpu'],
-        'devops': ['devops', 'ci/cd', 'deployment'],
-        'networking': ['network', 'http', 'tcp', 'cdn', 'dns', 'protocol'],
-        'security': ['security', 'authentication', 'oauth', 'jwt'],
-        'performance': ['performance', 'optimization', 'caching'],
-        'frontend': ['frontend', 'react', 'vue', 'ui'],
-        'data': ['data', 'analytics', 'pipeline', 'kafka', 'message broker', 'replication', 'storage'],
-        'mobile': ['mobile', 'ios', 'android'],
-        'interview': ['interview', 'cheat sheet'],
-        'case-study': [],
-    }
-
-    text = f"{title} {content_preview}".lower()
-    tags = []
-
-    # Case study detection
-    case_study_patterns = [
-        r'\bhow\s+\w+\s+(built|scaled|handles|transformed|uses)',
-        r'\b(google|openai|anthropic)\b'
-    ]
-    if any(re.search(pattern, text) for pattern in case_study_patterns):
-        tags.append('case-study')
-
-    # Check other tags
-    for tag, patterns in TAG_PATTERNS.items():
-        if tag == 'case-study':
-            continue
-        if any(pattern in text for pattern in patterns):
-            tags.append(tag)
-
-    return tags[:5] if tags else ['general']
-
 def add_orphaned_files():
-    """Add files that exist on disk but not in JSON"""
+    """Add files that exist on disk but not in the catalog"""
 
-    # Load existing JSON
-    with open('data/blog.json', 'r') as f:
-        essays = json.load(f)
+    catalog = Catalog.for_writer('blog')
 
     # Get existing file paths
-    existing_paths = {essay['file_link'] for essay in essays}
+    existing_paths = catalog.file_links()
 
     # Find all markdown files
     all_md_files = glob.glob('substack_md_files/blog/*.md')
@@ -122,6 +83,7 @@ def add_orphaned_files():
 
     if not orphaned:
         print("✓ No orphaned files found!")
+        catalog.close()
         return
 
     print(f"Found {len(orphaned)} orphaned files:\n")
@@ -136,7 +98,7 @@ def add_orphaned_files():
             continue
 
         # Extract tags
-        tags = extract_tags_from_content(metadata['title'], metadata['content_preview'])
+        tags = extract_tags(metadata['title'], metadata['content_preview'])
 
         # Create HTML path
         html_file = md_file.replace('substack_md_files', 'substack_html_pages').replace('.md', '.html')
@@ -150,11 +112,11 @@ def add_orphaned_files():
             'file_link': md_file,
             'html_link': html_file,
             'is_sponsored': metadata['is_sponsored'],
+            'sponsored_line': metadata['sponsored_line'],
             'is_course_ad': metadata['is_course_ad'],
             'tags': tags
         }
 
-        essays.append(entry)
         added.append(entry)
 
         print(f"  ✓ Added: {metadata['title']}")
@@ -162,12 +124,12 @@ def add_orphaned_files():
         print(f"    Sponsored: {metadata['is_sponsored']}")
         print()
 
-    # Write back
-    with open('data/blog.json', 'w') as f:
-        json.dump(essays, f, ensure_ascii=False, indent=4)
+    catalog.upsert(added)
+    total = len(catalog)
+    catalog.close()
 
     print(f"\n✅ Added {len(added)} orphaned files to database")
-    print(f"Total articles now: {len(essays)}")
+    print(f"Total articles now: {total}")
 
     return added
 
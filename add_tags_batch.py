@@ -2,39 +2,11 @@
 """
 Add topic tags to articles based on their titles and content.
 """
-import json
 import sys
 import os
 
-# Common technology tags to look for
-TAG_PATTERNS = {
-    'system-design': ['system design', 'architecture', 'scalability', 'distributed', 'microservices'],
-    'databases': ['database', 'sql', 'nosql', 'mongodb', 'postgres', 'redis', 'cassandra', 'mysql', 'oracle', 'sharding', 'transaction'],
-    'backend': ['backend', 'api', 'rest', 'graphql', 'server', 'endpoint'],
-    'cloud': ['aws', 'azure', 'gcp', 'cloud', 's3', 'lambda', 'kubernetes', 'docker', 'container'],
-    'ai-ml': ['ai', 'machine learning', 'ml', 'llm', 'gpt', 'neural', 'model', 'claude', 'openai', 'anthropic', 'gemini', 'agent'],
-    'devops': ['devops', 'ci/cd', 'deployment', 'jenkins', 'github actions', 'terraform', 'ansible'],
-    'networking': ['network', 'http', 'tcp', 'cdn', 'dns', 'load balancer', 'proxy', 'websocket'],
-    'security': ['security', 'authentication', 'oauth', 'jwt', 'encryption', 'ssl', 'tls', 'auth'],
-    'performance': ['performance', 'optimization', 'caching', 'cache', 'scaling', 'latency', 'throughput'],
-    'frontend': ['frontend', 'react', 'vue', 'angular', 'ui', 'ux', 'javascript', 'css'],
-    'data': ['data', 'analytics', 'etl', 'pipeline', 'kafka', 'spark', 'stream'],
-    'mobile': ['mobile', 'ios', 'android', 'app'],
-    'interview': ['interview', 'interview question', 'coding pattern'],
-    'case-study': ['how', 'migration', 'built', 'scaled', 'netflix', 'uber', 'google', 'amazon', 'meta', 'twitter'],
-}
-
-def extract_tags(title, subtitle, content_preview):
-    """Extract relevant tags from article metadata"""
-    text = f"{title} {subtitle} {content_preview}".lower()
-    tags = []
-
-    for tag, patterns in TAG_PATTERNS.items():
-        if any(pattern in text for pattern in patterns):
-            tags.append(tag)
-
-    # Limit to top 5 most relevant tags
-    return tags[:5] if tags else ['general']
+from catalog import Catalog
+from tagging import tag_corpus
 
 def read_content_preview(md_filepath, max_chars=500):
     """Read first 500 chars of markdown file"""
@@ -45,14 +17,15 @@ def read_content_preview(md_filepath, max_chars=500):
     except:
         return ""
 
-def process_batch(start_idx, end_idx, json_path):
+def process_batch(start_idx, end_idx, writer_name):
     """Process a batch of articles and add tags"""
     print(f"Processing articles {start_idx} to {end_idx}...")
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        essays = json.load(f)
+    catalog = Catalog.for_writer(writer_name)
+    essays = catalog.essays()
 
-    processed = 0
+    batch = []
+    texts = []
     for i in range(start_idx, min(end_idx, len(essays))):
         essay = essays[i]
 
@@ -62,15 +35,13 @@ def process_batch(start_idx, end_idx, json_path):
 
         # Read content preview
         content_preview = read_content_preview(essay['file_link'])
+        batch.append(essay)
+        texts.append(f"{essay['title']} {essay.get('subtitle', '')} {content_preview}")
 
-        # Extract tags
-        tags = extract_tags(essay['title'], essay.get('subtitle', ''), content_preview)
-        essay['tags'] = tags
-        processed += 1
-
-    # Write back
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(essays, f, ensure_ascii=False, indent=4)
+    # Extract tags, across processes for large batches
+    updates = [(essay, {'tags': tags}) for essay, tags in zip(batch, tag_corpus(texts))]
+    processed = catalog.update_many(updates)
+    catalog.close()
 
     print(f"✓ Processed {processed} articles (batch {start_idx}-{end_idx})")
     return processed
@@ -82,7 +53,5 @@ if __name__ == "__main__":
 
     start = int(sys.argv[1])
     end = int(sys.argv[2])
-    json_path = "data/blog.json"
-
-    processed = process_batch(start, end, json_path)
+    processed = process_batch(start, end, "blog")
     print(f"Done! Tagged {processed} articles.")
@@ -0,0 +1,170 @@
+"""
+Local mirror of the images posts link to.
+
+AssetMirror collects the image URLs of a post's markdown, downloads the ones it doesn't have
+yet on a bounded thread pool and stores each under the SHA-256 of its content, so an image
+used by many posts (or served under several URLs) is stored once. The post's .md and .html
+are then rewritten to link to the local copies. Which URL maps to which file is kept in
+index.json, so re-runs skip everything already mirrored.
+"""
+import hashlib
+import html
+import json
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, get_ident
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+import requests
+
+ASSETS_DIR: str = "substack_assets"
+ASSET_WORKERS: int = 8  # Images downloaded at once
+INDEX_FLUSH_INTERVAL: int = 50  # Write the index to disk after this many new images
+
+MD_IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\((https?://[^\s)]+)(?:\s+"[^"]*")?\)')
+
+
+class AssetMirror:
+    def __init__(self, session: requests.Session, directory: str = ASSETS_DIR, workers: int = ASSET_WORKERS):
+        self.session: requests.Session = session
+        self.directory: str = directory
+        self.index_path: str = os.path.join(directory, "index.json")
+        self.lock: Lock = Lock()
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+        self.files: Dict[str, str] = {}  # Image URL -> file name in directory
+        self.unsaved: int = 0
+
+        self.downloaded: int = 0
+        self.deduplicated: int = 0
+        self.skipped: int = 0
+        self.failed: int = 0
+        self.bytes_downloaded: int = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.load_index()
+
+    def load_index(self) -> None:
+        """
+        Loads the URL index, dropping URLs whose file has gone missing.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                files = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable asset index {self.index_path}: {e}")
+            return
+        self.files = {url: name for url, name in files.items() if os.path.exists(os.path.join(self.directory, name))}
+
+    def flush(self) -> None:
+        """
+        Writes the URL index to disk.
+        """
+        with self.lock:
+            files = dict(self.files)
+            self.unsaved = 0
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(files, file, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def collect_image_urls(md_content: str) -> List[str]:
+        """
+        Gets the remote image URLs of a markdown document, in order and without repeats.
+        """
+        return list(dict.fromkeys(MD_IMAGE_PATTERN.findall(md_content)))
+
+    @staticmethod
+    def guess_extension(url: str, content_type: str) -> str:
+        extension = mimetypes.guess_extension(content_type.split(";")[0].strip()) if content_type else None
+        if not extension:
+            # Substack CDN URLs end with the percent-encoded URL of the original upload
+            extension = os.path.splitext(unquote(urlparse(url).path))[1].lower()
+        return extension if re.fullmatch(r"\.[a-z0-9]{1,5}", extension or "") else ""
+
+    def download(self, url: str) -> Optional[str]:
+        """
+        Downloads an image and stores it under its content hash. Returns the file name, or None on failure.
+        """
+        try:
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error mirroring image {url}: {e}")
+            with self.lock:
+                self.failed += 1
+            return None
+
+        content = response.content
+        name = hashlib.sha256(content).hexdigest() + self.guess_extension(url, response.headers.get("Content-Type", ""))
+        path = os.path.join(self.directory, name)
+        stored = os.path.exists(path)
+        if not stored:
+            tmp_path = f"{path}.{os.getpid()}.{get_ident()}.tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+
+        with self.lock:
+            self.files[url] = name
+            self.unsaved += 1
+            self.downloaded += 1
+            self.bytes_downloaded += len(content)
+            if stored:
+                self.deduplicated += 1
+            flush = self.unsaved >= INDEX_FLUSH_INTERVAL
+        if flush:
+            self.flush()
+        return name
+
+    def mirror(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Makes sure the images are mirrored, downloading missing ones concurrently.
+        Returns the file name of every image that is available locally.
+        """
+        with self.lock:
+            missing = [url for url in urls if url not in self.files]
+            self.skipped += len(set(urls)) - len(missing)
+        list(self.executor.map(self.download, missing))
+        with self.lock:
+            return {url: self.files[url] for url in urls if url in self.files}
+
+    def rewrite(self, content: str, files: Dict[str, str], document_path: str, escaped: bool = False) -> str:
+        """
+        Points the image links of a document at the mirrored files, relative to the document's directory.
+        With escaped, URLs are matched the way they appear in HTML attributes.
+        """
+        document_dir = os.path.dirname(document_path)
+        for url, name in files.items():
+            local_path = os.path.relpath(os.path.join(self.directory, name), document_dir).replace("\\", "/")
+            content = content.replace(html.escape(url, quote=False) if escaped else url, local_path)
+        return content
+
+    def close(self) -> None:
+        """
+        Stops the download threads once the downloads in progress are done, and saves the index.
+        """
+        self.executor.shutdown(wait=True)
+        self.flush()
+
+    def __enter__(self) -> "AssetMirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def report(self) -> str:
+        """
+        Summarises what was downloaded, deduplicated and skipped.
+        """
+        return (
+            f"Assets: {self.downloaded} images downloaded ({self.bytes_downloaded / 1024 / 1024:.1f} MB, "
+            f"{self.deduplicated} duplicates of stored files), {self.skipped} already mirrored, {self.failed} failed, "
+            f"{len(set(self.files.values()))} files in {self.directory}"
+        )
@@ -0,0 +1,245 @@
+"""
+asyncio fetch engine for free Substack posts.
+
+AsyncSubstackScraper fetches the feed and post pages with aiohttp on a single event loop
+(the sitemap is streamed by the requests-based reader in a worker thread), then hands each
+page to the same extract_post_data / save_post logic used by the thread-based SubstackScraper.
+Several publications can be scraped on one loop and one connection pool by passing the same
+client to ascrape_posts, as batch mode (batch_scraper.ascrape_batch) does.
+"""
+import asyncio
+from collections import deque
+from time import perf_counter
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from asset_mirror import AssetMirror
+from convert_cache import ConvertCache
+from rate_limiter import MAX_RETRIES, RETRY_STATUSES, AdaptiveRateLimiter, backoff_delay, parse_retry_after
+from soup_parser import HTML_PARSER
+from substack_scraper import BaseSubstackScraper, PostData, generate_html_file
+
+MAX_IN_FLIGHT: int = 100  # Requests in flight across all hosts
+PER_HOST_LIMIT: int = 8  # Concurrent connections to a single host
+
+
+class AsyncSubstackScraper(BaseSubstackScraper):
+    def __init__(
+        self,
+        base_substack_url: str,
+        md_save_dir: str,
+        html_save_dir: str,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        per_host_limit: int = PER_HOST_LIMIT,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        archive: bool = True,
+        assets: Optional[AssetMirror] = None,
+        parser: str = HTML_PARSER,
+        restrict_parsing: bool = False,
+        direct_html: bool = False,
+        md_converter: str = "html2text",
+        convert_cache: Optional[ConvertCache] = None
+    ) -> None:
+        self.max_in_flight: int = max(1, max_in_flight)
+        self.per_host_limit: int = max(1, per_host_limit)
+        self.client: Optional[aiohttp.ClientSession] = None
+        super().__init__(
+            base_substack_url, md_save_dir, html_save_dir, rate_limiter=rate_limiter, archive=archive, assets=assets,
+            parser=parser, restrict_parsing=restrict_parsing, direct_html=direct_html, md_converter=md_converter,
+            convert_cache=convert_cache
+        )
+
+    def get_all_post_urls(self) -> List[str]:
+        """
+        Post URLs are discovered on the event loop by ascrape_posts, so nothing is fetched here.
+        """
+        return []
+
+    def create_client(self) -> aiohttp.ClientSession:
+        """
+        Creates an aiohttp session whose connector caps the total and per-host number of connections.
+        """
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host_limit)
+        return aiohttp.ClientSession(connector=connector)
+
+    async def fetch_bytes(self, url: str) -> Optional[bytes]:
+        """
+        Fetches a URL, returning the body or None if the response was not successful.
+        With a rate limiter, requests are paced per host and throttled ones are retried with backoff.
+        """
+        if self.rate_limiter is None:
+            async with self.client.get(url) as response:
+                if response.status >= 400:
+                    print(f'Error fetching {url}: {response.status}')
+                    return None
+                return await response.read()
+
+        host = urlparse(url).netloc
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async(host)
+            async with self.client.get(url) as response:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.rate_limiter.on_response(host, response.status, retry_after)
+                if response.status < 400:
+                    return await response.read()
+                if response.status not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                    print(f'Error fetching {url}: {response.status}')
+                    return None
+            self.rate_limiter.on_retry(host)
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    async def aget_all_post_urls(self) -> List[str]:
+        """
+        Attempts to fetch URLs from sitemap.xml, falling back to feed.xml if necessary.
+        The sitemap is streamed by the same reader as the other engines, in a worker thread, so
+        sitemap indexes are followed and each post's <lastmod> is kept in post_lastmod.
+        """
+        urls = await asyncio.to_thread(self.fetch_urls_from_sitemap)
+        if not urls:
+            print('Falling back to feed.xml. This will only contain up to the 22 most recent posts.')
+            content = await self.fetch_bytes(f"{self.base_substack_url}feed.xml")
+            urls = self.parse_feed(content) if content else []
+        return self.filter_urls(urls, self.keywords)
+
+    def parse_post(self, url: str, content: bytes) -> Optional[PostData]:
+        """
+        Parses a fetched post page and extracts its data. Returns None for paywalled posts.
+        """
+        self.archive_page(url, content)
+        soup = self.parse_page(content)
+        if self.is_paywalled(soup):
+            print(f"Skipping premium article: {url}")
+            return None
+        return self.extract_post_data(soup)
+
+    async def afetch_post_data(self, url: str) -> Optional[PostData]:
+        """
+        Fetches a post on the event loop and parses it in a worker thread so the loop keeps serving sockets.
+        """
+        try:
+            content = await self.fetch_bytes(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ValueError(f"Error fetching page: {e}") from e
+        if content is None:
+            return None
+        return await asyncio.to_thread(self.parse_post, url, content)
+
+    async def aget_url_soup(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Gets soup from URL using aiohttp
+        """
+        content = await self.fetch_bytes(url)
+        if content is None:
+            return None
+        soup = self.parse_page(content)
+        if self.is_paywalled(soup):
+            print(f"Skipping premium article: {url}")
+            return None
+        return soup
+
+    def get_url_soup(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Gets soup from URL by running a one-off event loop
+        """
+        async def fetch() -> Optional[BeautifulSoup]:
+            async with self.create_client() as self.client:
+                return await self.aget_url_soup(url)
+
+        try:
+            return asyncio.run(fetch())
+        finally:
+            self.client = None
+
+    async def ascrape_posts(
+        self,
+        num_posts_to_scrape: int = 0,
+        client: Optional[aiohttp.ClientSession] = None,
+        resume: bool = False
+    ) -> int:
+        """
+        Iterates over all posts on the running event loop and saves them as markdown and html files.
+        Pass a shared client to scrape several publications over one connection pool.
+        Returns the number of posts saved.
+        """
+        if client is None:
+            async with self.create_client() as own_client:
+                return await self.ascrape_posts(num_posts_to_scrape, client=own_client, resume=resume)
+
+        self.client = client
+        start_time = perf_counter()
+        if not self.post_urls:
+            self.post_urls = await self.aget_all_post_urls()
+
+        # Recovering a leftover journal merges it into the catalog, so it runs off the loop like the other disk work
+        journal = await asyncio.to_thread(self.start_journal, resume)
+        saved = 0
+        count = 0
+        urls = list(dict.fromkeys(self.post_urls))
+        total = num_posts_to_scrape if num_posts_to_scrape != 0 else len(urls)
+
+        # Keep at most max_in_flight posts fetching ahead of the (in order) writer
+        pending = iter(self.select_posts_to_fetch(urls))
+        window = deque()
+
+        def refill() -> None:
+            while len(window) < self.max_in_flight:
+                url = next(pending, None)
+                if url is None:
+                    return
+                window.append((url, asyncio.create_task(self.afetch_post_data(url))))
+
+        refill()
+        progress = self.progress_bar(min(total, len(urls)))
+        try:
+            for url in urls:
+                progress.update(1)
+                try:
+                    md_filepath, html_filepath = self.get_output_filepaths(url)
+
+                    if window and window[0][0] == url:
+                        _, task = window.popleft()
+                        refill()
+                        post_data = await task
+                        if post_data is None:
+                            continue
+                        # Saving blocks on disk (and on image downloads with an asset mirror), so keep it off the loop
+                        essay = await asyncio.to_thread(self.save_post, post_data, md_filepath, html_filepath)
+                        # The journal append fsyncs, so it stays off the loop too
+                        await asyncio.to_thread(self.record_post, journal, url, essay, post_data[4])
+                        saved += 1
+                    else:
+                        print(f"File already exists: {md_filepath}")
+                except Exception as e:
+                    print(f"Error scraping post: {e}")
+                count += 1
+                if num_posts_to_scrape != 0 and count == num_posts_to_scrape:
+                    break
+        finally:
+            for _, task in window:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in window), return_exceptions=True)
+            self.client = None
+            journal.close()
+            if progress is not self.progress:
+                progress.close()
+
+        # Batch mode reports once for all publications
+        if self.progress is None:
+            self.report_throughput(saved, start_time)
+            self.report_fetch_stats()
+        # Merging into the catalog and writing the author page would stall other publications' fetches in batch mode
+        await asyncio.to_thread(self.finish_journal, journal)
+        await asyncio.to_thread(generate_html_file, author_name=self.writer_name)
+        return saved
+
+    def scrape_posts(self, num_posts_to_scrape: int = 0, resume: bool = False) -> int:
+        """
+        Iterates over all posts and saves them as markdown and html files
+        """
+        return asyncio.run(self.ascrape_posts(num_posts_to_scrape, resume=resume))
+
@@ -0,0 +1,215 @@
+"""
+Batch mode: scrape many publications concurrently.
+
+    python substack_scraper.py --batch publications.txt --workers 16
+
+The publications file lists one Substack URL per line (blank lines and lines starting with
+# are ignored). All publications share one HTTP session, so connections to each host are
+pooled and rate limited together, and one fetch pool whose size is the global worker budget.
+Premium publications share one login and one set of browsers. Every publication is still
+written to its own writer_name directories and JSON file; progress and timing are reported
+once for the whole batch.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from tqdm import tqdm
+
+from asset_mirror import AssetMirror
+from convert_cache import ConvertCache
+from convert_pool import create_convert_pool
+from http_cache import HttpCache
+from rate_limiter import AdaptiveRateLimiter
+from soup_parser import HTML_PARSER
+from substack_scraper import (
+    BaseSubstackScraper,
+    PremiumSubstackScraper,
+    SubstackScraper,
+    create_session,
+    extract_main_part,
+)
+
+BATCH_WORKERS: int = 16  # Posts fetched at once across all publications
+
+BatchResult = Tuple[str, int, float, Optional[Exception]]  # (url, posts saved, seconds, error)
+
+
+def read_publications(path: str) -> List[str]:
+    """
+    Reads the publication URLs of a batch file, one per line, skipping blanks, comments and repeats.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        urls = [line.strip() for line in file]
+    return list(dict.fromkeys(url for url in urls if url and not url.startswith("#")))
+
+
+def scrape_batch(
+    urls: List[str],
+    md_save_dir: str,
+    html_save_dir: str,
+    workers: int = BATCH_WORKERS,
+    num_posts_to_scrape: int = 0,
+    resume: bool = False,
+    premium: bool = False,
+    use_api: bool = False,
+    http_cache: Optional[HttpCache] = None,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    archive: bool = True,
+    assets: Optional[AssetMirror] = None,
+    parser: str = HTML_PARSER,
+    restrict_parsing: bool = False,
+    direct_html: bool = False,
+    md_converter: str = "html2text",
+    convert_processes: int = 0,
+    convert_cache: Optional[ConvertCache] = None,
+    **premium_options
+) -> List[BatchResult]:
+    """
+    Scrapes publications concurrently on threads, with at most workers posts being fetched at once.
+    With convert_processes, posts of all publications are converted in one shared process pool.
+    premium_options (browser, headless, http_fetch, ...) are passed on to PremiumSubstackScraper.
+    """
+    start_time = perf_counter()
+    session = create_session(pool_size=max(workers, 10), cache=http_cache, rate_limiter=rate_limiter)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    convert_pool = create_convert_pool(convert_processes) if convert_processes else None
+    progress = tqdm(total=0, unit="post")
+    login: Optional[PremiumSubstackScraper] = None
+
+    def create_scraper(url: str) -> BaseSubstackScraper:
+        nonlocal login
+        options = dict(workers=workers, use_api=use_api, http_cache=http_cache, rate_limiter=rate_limiter,
+                       session=session, archive=archive, assets=assets, parser=parser,
+                       restrict_parsing=restrict_parsing, direct_html=direct_html, md_converter=md_converter,
+                       convert_processes=convert_processes, convert_cache=convert_cache)
+        if not premium:
+            return SubstackScraper(url, md_save_dir, html_save_dir, **options)
+        if login is None:
+            login = PremiumSubstackScraper(url, md_save_dir, html_save_dir, **options, **premium_options)
+            return login
+        return PremiumSubstackScraper(url, md_save_dir, html_save_dir, **options, **premium_options, login_from=login)
+
+    def scrape(url: str, scraper: Optional[BaseSubstackScraper] = None) -> BatchResult:
+        started = perf_counter()
+        try:
+            if scraper is None:
+                scraper = create_scraper(url)
+            scraper.executor = executor
+            scraper.convert_pool = convert_pool
+            scraper.progress = progress
+            saved = scraper.scrape_posts(num_posts_to_scrape, resume=resume)
+            return url, saved, perf_counter() - started, None
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return url, 0, perf_counter() - started, e
+
+    try:
+        # The first premium publication logs in before the others start, so they can share its session
+        first = create_scraper(urls[0]) if premium and urls else None
+        with ThreadPoolExecutor(max_workers=max(1, min(len(urls), workers))) as publications:
+            futures = [publications.submit(scrape, url, first if i == 0 else None) for i, url in enumerate(urls)]
+            results = [future.result() for future in futures]
+    finally:
+        progress.close()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if convert_pool is not None:
+            convert_pool.shutdown(wait=True, cancel_futures=True)
+        # The other premium publications only borrowed the login scraper's browsers
+        if login is not None:
+            login.close()
+
+    report_batch(results, start_time, http_cache, rate_limiter, assets, convert_cache)
+    return results
+
+
+async def ascrape_batch(
+    urls: List[str],
+    md_save_dir: str,
+    html_save_dir: str,
+    workers: int = BATCH_WORKERS,
+    num_posts_to_scrape: int = 0,
+    resume: bool = False,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    archive: bool = True,
+    assets: Optional[AssetMirror] = None,
+    parser: str = HTML_PARSER,
+    restrict_parsing: bool = False,
+    direct_html: bool = False,
+    md_converter: str = "html2text",
+    convert_cache: Optional[ConvertCache] = None
+) -> List[BatchResult]:
+    """
+    Scrapes free publications concurrently on the running event loop over one aiohttp connection pool
+    that allows at most workers connections.
+    """
+    from async_scraper import AsyncSubstackScraper
+
+    start_time = perf_counter()
+    progress = tqdm(total=0, unit="post")
+    scrapers = [
+        AsyncSubstackScraper(
+            url, md_save_dir, html_save_dir, max_in_flight=workers, rate_limiter=rate_limiter, archive=archive,
+            assets=assets, parser=parser, restrict_parsing=restrict_parsing, direct_html=direct_html,
+            md_converter=md_converter, convert_cache=convert_cache
+        )
+        for url in urls
+    ]
+
+    async def scrape(scraper: AsyncSubstackScraper, client) -> BatchResult:
+        started = perf_counter()
+        scraper.progress = progress
+        try:
+            saved = await scraper.ascrape_posts(num_posts_to_scrape, client=client, resume=resume)
+            return scraper.base_substack_url, saved, perf_counter() - started, None
+        except Exception as e:
+            print(f"Error scraping {scraper.base_substack_url}: {e}")
+            return scraper.base_substack_url, 0, perf_counter() - started, e
+
+    try:
+        if scrapers:
+            async with scrapers[0].create_client() as client:
+                results = await asyncio.gather(*(scrape(scraper, client) for scraper in scrapers))
+        else:
+            results = []
+    finally:
+        progress.close()
+
+    report_batch(results, start_time, None, rate_limiter, assets, convert_cache)
+    return results
+
+
+def report_batch(
+    results: List[BatchResult],
+    start_time: float,
+    http_cache: Optional[HttpCache] = None,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    assets: Optional[AssetMirror] = None,
+    convert_cache: Optional[ConvertCache] = None
+) -> None:
+    """
+    Prints posts saved and time taken per publication and for the whole batch.
+    """
+    print("\n📊 Batch summary:")
+    for url, saved, elapsed, error in results:
+        status = f"failed ({error})" if error else f"{saved} posts in {elapsed:.1f}s"
+        print(f"   {extract_main_part(url)}: {status}")
+
+    elapsed = perf_counter() - start_time
+    total = sum(saved for _, saved, _, _ in results)
+    failed = sum(1 for *_, error in results if error)
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Scraped {total} posts from {len(results) - failed}/{len(results)} publications "
+          f"in {elapsed:.1f}s ({rate:.2f} posts/sec)")
+
+    if http_cache is not None:
+        http_cache.flush()
+        print(http_cache.report())
+    if rate_limiter is not None:
+        print(rate_limiter.report())
+    if assets is not None:
+        assets.flush()
+        print(assets.report())
+    if convert_cache is not None:
+        print(convert_cache.report())
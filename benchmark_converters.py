@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare the HTML to Markdown converters on saved post pages: html2text and the fast lxml
+converter (--md-converter fast). Reports milliseconds per post and throughput of converting
+each post's content html, how many posts the fast converter handed back to html2text, and
+whether both produced the same markdown.
+
+    python benchmark_converters.py                       # pages in fixtures/example/p
+    python benchmark_converters.py --archive <writer>    # pages kept in archive/<writer>.pages.gz
+    python benchmark_converters.py path/to/pages/*.html
+"""
+import argparse
+from time import perf_counter
+
+from benchmark_parsers import DEFAULT_PAGES, load_pages
+from check_fast_markdown import content_of
+from fast_markdown import UnsupportedMarkup, html_to_md
+from substack_scraper import MD_CONVERTERS, SubstackScraper
+
+
+def benchmark(contents, md_converter, repeat):
+    """Return (ms per post, KB of content html converted per second, markdown of every post) for one converter"""
+    scraper = SubstackScraper.converter(md_converter=md_converter)
+
+    md_contents = [scraper.convert_html_to_md(content) for content in contents]
+
+    start = perf_counter()
+    for _ in range(repeat):
+        for content in contents:
+            scraper.convert_html_to_md(content)
+    elapsed = perf_counter() - start
+    size = sum(len(content.encode('utf-8')) for content in contents) * repeat
+    return elapsed * 1000 / (repeat * len(contents)), size / 1024 / elapsed, md_contents
+
+
+def count_fallbacks(contents):
+    """Number of contents the fast converter doesn't support"""
+    fallbacks = 0
+    for content in contents:
+        try:
+            html_to_md(content)
+        except UnsupportedMarkup:
+            fallbacks += 1
+    return fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML to Markdown converters on saved post pages.")
+    parser.add_argument("pages", nargs="*", help=f"Page files or globs. Default: {DEFAULT_PAGES}")
+    parser.add_argument("--archive", type=str, help="Benchmark the pages archived for this writer instead.")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="Times each post is converted. Default: 20")
+    args = parser.parse_args()
+
+    contents = [content for content in (content_of(page) for page in load_pages(args.pages, args.archive) if page)
+                if content]
+    if not contents:
+        print("❌ No post content found")
+        return
+    size = sum(len(content) for content in contents) / len(contents) / 1024
+    print(f"📄 {len(contents)} posts, {size:.0f} KB of content html on average, "
+          f"{count_fallbacks(contents)} not supported by the fast converter\n")
+
+    print(f"{'converter':<14}{'ms/post':>10}{'KB/s':>10}")
+    results = {}
+    for md_converter in MD_CONVERTERS:
+        results[md_converter] = benchmark(contents, md_converter, args.repeat)
+        ms_per_post, kb_per_second, _ = results[md_converter]
+        print(f"{md_converter:<14}{ms_per_post:>10.2f}{kb_per_second:>10.0f}")
+
+    if results["fast"][2] != results["html2text"][2]:
+        print("\n⚠️  The converters' markdown differs, run check_fast_markdown.py for details")
+    print(f"\n⏱️  The fast converter is {results['html2text'][0] / results['fast'][0]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare the two ways a post's .html output is built, on saved post pages: converting the
+markdown back to html (the default), and writing the sanitized content html directly
+(--direct-html). Reports milliseconds per post for extraction plus html building, the time
+spent building the html alone, and the average size of the html body.
+
+    python benchmark_html_output.py                       # pages in fixtures/example/p
+    python benchmark_html_output.py --archive <writer>    # pages kept in archive/<writer>.pages.gz
+    python benchmark_html_output.py path/to/pages/*.html
+"""
+import argparse
+from time import perf_counter
+
+from benchmark_parsers import DEFAULT_PAGES, load_pages
+from soup_parser import HTML_PARSER, PARSERS, make_soup
+from substack_scraper import SubstackScraper
+
+
+def build_html(scraper, page, parser):
+    """Extract a post and build its html body the way save_post does. Returns (html, seconds building it)"""
+    post_data = scraper.extract_post_data(make_soup(page, parser))
+    start = perf_counter()
+    html_content = scraper.render_post_html(post_data)
+    return html_content, perf_counter() - start
+
+
+def benchmark(pages, direct_html, parser, repeat):
+    """Return (ms per post, ms per post building the html, average html KB) for one output mode"""
+    scraper = SubstackScraper.converter(parser, direct_html=direct_html)
+
+    sizes = [len(build_html(scraper, page, parser)[0].encode('utf-8')) for page in pages]
+
+    building = 0.0
+    start = perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            building += build_html(scraper, page, parser)[1]
+    runs = repeat * len(pages)
+    return (perf_counter() - start) * 1000 / runs, building * 1000 / runs, sum(sizes) / len(sizes) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown round-trip against direct html output.")
+    parser.add_argument("pages", nargs="*", help=f"Page files or globs. Default: {DEFAULT_PAGES}")
+    parser.add_argument("--archive", type=str, help="Benchmark the pages archived for this writer instead.")
+    parser.add_argument("--parser", type=str, default=HTML_PARSER, choices=PARSERS,
+                        help="HTML parser for the pages. Default: html.parser")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="Times each page is converted. Default: 20")
+    args = parser.parse_args()
+
+    pages = [page for page in load_pages(args.pages, args.archive) if page]
+    if not pages:
+        print("❌ No pages found")
+        return
+    size = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"📄 {len(pages)} pages, {size:.0f} KB on average\n")
+
+    print(f"{'output':<14}{'ms/post':>10}{'html ms':>10}{'html KB':>10}")
+    results = {}
+    for mode, direct_html in (("markdown", False), ("direct", True)):
+        results[mode] = benchmark(pages, direct_html, args.parser, args.repeat)
+        ms_per_post, html_ms, html_kb = results[mode]
+        print(f"{mode:<14}{ms_per_post:>10.2f}{html_ms:>10.2f}{html_kb:>10.1f}")
+
+    saved = results["markdown"][0] - results["direct"][0]
+    print(f"\n⏱️  Direct html saves {saved:.2f} ms per post "
+          f"({saved / results['markdown'][0] * 100:.0f}% of extraction and conversion)")
+
+
+if __name__ == "__main__":
+    main()
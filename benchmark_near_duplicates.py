@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark near-duplicate detection on synthetic posts, with near-duplicates planted among them
+(copies of earlier posts with a few words changed). Times computing the MinHash signatures
+(in one process and across a pool), storing and reloading them from a signature cache, and
+clustering them with LSH. Reports how many planted duplicates were found and how many other
+posts were clustered.
+
+    python benchmark_near_duplicates.py                      # 100,000 posts of 300 words
+    python benchmark_near_duplicates.py -n 20000 --words 1000 --processes 4
+"""
+import argparse
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from near_duplicates import SIGNATURE_PROCESSES, SIMILARITY_THRESHOLD, SignatureCache, find_clusters, minhash
+
+VOCABULARY = [f"word{i}" for i in range(20000)]
+DUPLICATE_EVERY = 50  # One post in DUPLICATE_EVERY is a near-duplicate of an earlier one
+EDIT_RATE = 0.01  # Share of the words of a near-duplicate that are changed (about 0.9 similar)
+
+
+def synthetic_posts(count, words, seed):
+    """Returns (posts, {index of a near-duplicate: index of its original})"""
+    rng = random.Random(seed)
+    posts = []
+    originals = {}
+    for i in range(count):
+        if i and i % DUPLICATE_EVERY == 0:
+            original = rng.randrange(i)
+            copy = posts[original].split()
+            for _ in range(max(1, int(len(copy) * EDIT_RATE))):
+                copy[rng.randrange(len(copy))] = rng.choice(VOCABULARY)
+            originals[i] = original
+            posts.append(" ".join(copy))
+        else:
+            posts.append(" ".join(rng.choices(VOCABULARY, k=words)))
+    return posts, originals
+
+
+def timed(name, count, function):
+    """Run function, print its posts/s and seconds, and return its result"""
+    start = perf_counter()
+    result = function()
+    elapsed = perf_counter() - start
+    print(f"{name:<32}{count / elapsed:>12.0f}{elapsed:>10.2f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MinHash/LSH near-duplicate detection on synthetic posts.")
+    parser.add_argument("-n", "--posts", type=int, default=100000, help="Number of posts. Default: 100000")
+    parser.add_argument("--words", type=int, default=300, help="Words per post. Default: 300")
+    parser.add_argument("-p", "--processes", type=int, default=SIGNATURE_PROCESSES,
+                        help=f"Processes computing signatures. Default: {SIGNATURE_PROCESSES}")
+    parser.add_argument("-t", "--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help=f"Similarity threshold. Default: {SIMILARITY_THRESHOLD}")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic posts. Default: 0")
+    args = parser.parse_args()
+
+    posts, originals = synthetic_posts(args.posts, args.words, args.seed)
+    print(f"📄 {len(posts)} synthetic posts of {args.words} words, {len(originals)} near-duplicates planted\n")
+
+    print(f"{'step':<32}{'posts/s':>12}{'seconds':>10}")
+    signatures = timed("signatures, 1 process", len(posts), lambda: [minhash(post) for post in posts])
+    if args.processes > 1:
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            timed(f"signatures, {args.processes} processes", len(posts),
+                  lambda: list(executor.map(minhash, posts, chunksize=256)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        with SignatureCache(os.path.join(directory, "benchmark.signatures.db")) as cache:
+            stamps = {f"post-{i}.md": (i, len(post)) for i, post in enumerate(posts)}
+            timed("cache store", len(posts),
+                  lambda: cache.store((path, stamp, signature) for (path, stamp), signature in zip(stamps.items(), signatures)))
+            cached = timed("cache load", len(posts), lambda: cache.load(stamps))
+    if [cached[path] for path in stamps] != signatures:
+        print("⚠️  The cache returned different signatures")
+
+    clusters = timed("LSH clustering", len(posts),
+                     lambda: find_clusters(dict(enumerate(signatures)), args.threshold))
+
+    cluster_of = {index: number for number, cluster in enumerate(clusters) for index in cluster}
+    found = sum(1 for copy, original in originals.items()
+                if copy in cluster_of and cluster_of[copy] == cluster_of.get(original))
+    planted = set(originals) | set(originals.values())
+    others = sum(1 for index in cluster_of if index not in planted)
+    print(f"\n🔍 {found}/{len(originals)} planted near-duplicates found, {others} other posts clustered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare the parser backends on saved post pages: milliseconds per post (parsing plus
+extract_post_data) and peak memory of one parse, for html.parser and lxml, each with the
+full page tree and with restricted parsing.
+
+    python benchmark_parsers.py                       # pages in fixtures/example/p
+    python benchmark_parsers.py --archive <writer>    # pages kept in archive/<writer>.pages.gz
+    python benchmark_parsers.py path/to/pages/*.html
+"""
+import argparse
+import glob
+import os
+import tracemalloc
+from time import perf_counter
+
+from page_archive import PageArchive
+from soup_parser import PARSERS, make_soup
+from substack_scraper import SubstackScraper
+
+DEFAULT_PAGES = "fixtures/example/p/*.html"
+
+
+def load_pages(paths, writer):
+    """Read the pages to benchmark, from files or from a writer's page archive"""
+    if writer:
+        archive = PageArchive.for_writer(writer)
+        return [archive.read(entry["url"]) for entry in archive.entries() if entry["kind"] == "page"]
+    pages = []
+    for path in paths or [DEFAULT_PAGES]:
+        for filepath in sorted(glob.glob(path)):
+            with open(filepath, 'rb') as f:
+                pages.append(f.read())
+    return pages
+
+
+def benchmark(pages, parser, restricted, repeat):
+    """Return (ms per post, peak KB of one parse, extracted posts) for one parser option"""
+    scraper = SubstackScraper.converter()
+
+    posts = [scraper.extract_post_data(make_soup(page, parser, restricted)) for page in pages]
+
+    start = perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            scraper.extract_post_data(make_soup(page, parser, restricted))
+    ms_per_post = (perf_counter() - start) * 1000 / (repeat * len(pages))
+
+    peak = 0
+    for page in pages:
+        tracemalloc.start()
+        soup = make_soup(page, parser, restricted)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del soup
+
+    return ms_per_post, peak / 1024, posts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved post pages.")
+    parser.add_argument("pages", nargs="*", help=f"Page files or globs. Default: {DEFAULT_PAGES}")
+    parser.add_argument("--archive", type=str, help="Benchmark the pages archived for this writer instead.")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="Times each page is parsed. Default: 20")
+    args = parser.parse_args()
+
+    pages = [page for page in load_pages(args.pages, args.archive) if page]
+    if not pages:
+        print("❌ No pages found")
+        return
+    size = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"📄 {len(pages)} pages, {size:.0f} KB on average\n")
+
+    print(f"{'parser':<14}{'mode':<12}{'ms/post':>10}{'peak KB':>10}")
+    reference = None
+    for name in PARSERS:
+        for restricted in (False, True):
+            try:
+                ms_per_post, peak_kb, posts = benchmark(pages, name, restricted, args.repeat)
+            except Exception as e:
+                print(f"{name:<14}{'':<12}unavailable: {e}")
+                break
+            mode = "restricted" if restricted else "full"
+            same = "" if reference is None or posts == reference else "  ⚠️  output differs from html.parser/full"
+            reference = reference or posts
+            print(f"{name:<14}{mode:<12}{ms_per_post:>10.2f}{peak_kb:>10.0f}{same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+SQLite catalog of a writer's essays.
+
+data/<writer>.db is the system of record for the essay entries that used to live only in
+data/<writer>.json. It runs in WAL mode, so scripts can read while another one writes and
+concurrent writers wait for each other instead of overwriting each other's changes, and it
+is indexed on slug, date, tags and the sponsored / course ad flags, so the maintenance
+scripts select the entries they fix and update them one by one instead of loading and
+rewriting the whole catalog. The first time a writer's catalog is opened, their JSON file
+is imported. export_json writes the catalog back out in the JSON shape the library page
+(generate_html_file) and older tools read, and closing a catalog that changed exports it, so
+the JSON file never lags behind the database.
+
+    python catalog.py blog            # export data/blog.db to data/blog.json
+    python catalog.py blog --stats    # count entries, tags and flags
+"""
+import argparse
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from catalog_merge import MERGE_RULES, MergeRule, essay_key, merge_essay, merge_essays
+
+CATALOG_DIR: str = "data"
+BUSY_TIMEOUT: float = 30.0  # Seconds a write waits for another script's transaction to finish
+
+# Entry fields with their own column, in the order entries are exported. Other fields are kept as JSON in "extra"
+FIELDS: Tuple[str, ...] = (
+    "title", "subtitle", "like_count", "date", "file_link", "html_link", "is_sponsored", "is_course_ad", "tags"
+)
+FLAGS: Tuple[str, ...] = ("is_sponsored", "is_course_ad")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS essays (
+    slug TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    title TEXT,
+    subtitle TEXT,
+    like_count TEXT,
+    date TEXT,
+    file_link TEXT,
+    html_link TEXT,
+    is_sponsored INTEGER,
+    is_course_ad INTEGER,
+    tags TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS essay_tags (
+    slug TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (slug, tag)
+);
+-- Slugs removed as duplicates of another entry, so syncs don't download and add them again
+CREATE TABLE IF NOT EXISTS duplicates (
+    slug TEXT PRIMARY KEY,
+    duplicate_of TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS essays_position ON essays (position);
+CREATE INDEX IF NOT EXISTS essays_date ON essays (date);
+CREATE INDEX IF NOT EXISTS essays_is_sponsored ON essays (is_sponsored);
+CREATE INDEX IF NOT EXISTS essays_is_course_ad ON essays (is_course_ad);
+CREATE INDEX IF NOT EXISTS essay_tags_tag ON essay_tags (tag);
+"""
+
+
+class Catalog:
+    def __init__(self, path: str, json_path: Optional[str] = None):
+        self.path: str = path
+        self.json_path: Optional[str] = json_path
+        self.changed: bool = False  # Entries were written since the JSON file was last exported
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection: sqlite3.Connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        if json_path and os.path.exists(json_path) and len(self) == 0:
+            self.import_json(json_path, if_empty=True)
+
+    @classmethod
+    def for_writer(cls, writer_name: str, directory: str = CATALOG_DIR) -> "Catalog":
+        """
+        Opens a writer's catalog, importing their JSON data on first use.
+        """
+        return cls(os.path.join(directory, f"{writer_name}.db"), os.path.join(directory, f"{writer_name}.json"))
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Exports the catalog to its JSON file if it changed, and closes it.
+        """
+        try:
+            if self.changed and self.json_path:
+                self.export_json()
+        finally:
+            self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM essays").fetchone()[0]
+
+    @staticmethod
+    def to_row(essay: Dict) -> Dict[str, Any]:
+        """
+        Splits an essay entry into its column values.
+        """
+        row = {field: essay.get(field) for field in FIELDS}
+        for flag in FLAGS:
+            if row[flag] is not None:
+                row[flag] = int(bool(row[flag]))
+        row["tags"] = json.dumps(row["tags"], ensure_ascii=False) if "tags" in essay else None
+        extra = {field: value for field, value in essay.items() if field not in FIELDS}
+        row["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+        return row
+
+    @staticmethod
+    def to_essay(row: sqlite3.Row) -> Dict:
+        """
+        Rebuilds an essay entry from its row. Fields that were never set are left out, as in the JSON.
+        """
+        essay = {}
+        for field in FIELDS:
+            value = row[field]
+            if value is None:
+                continue
+            if field in FLAGS:
+                value = bool(value)
+            elif field == "tags":
+                value = json.loads(value)
+            essay[field] = value
+        if row["extra"]:
+            essay.update(json.loads(row["extra"]))
+        return essay
+
+    def write(self, slug: str, essay: Dict, position: Optional[int] = None) -> None:
+        """
+        Stores an essay entry under its slug, keeping its position unless one is given. Caller commits.
+        """
+        row = self.to_row(essay)
+        columns = ", ".join(row)
+        if position is None:
+            current = self.connection.execute("SELECT position FROM essays WHERE slug = ?", (slug,)).fetchone()
+            position = current[0] if current else self.next_position()
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO essays (slug, position, {columns}) VALUES (?, ?, {', '.join('?' * len(row))})",
+            (slug, position, *row.values())
+        )
+        self.write_tags(slug, essay.get("tags"))
+
+    def write_tags(self, slug: str, tags: Optional[List[str]]) -> None:
+        self.connection.execute("DELETE FROM essay_tags WHERE slug = ?", (slug,))
+        if tags:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO essay_tags (slug, tag) VALUES (?, ?)", [(slug, tag) for tag in tags]
+            )
+
+    def next_position(self) -> int:
+        return self.connection.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM essays").fetchone()[0]
+
+    def import_json(self, json_path: str, if_empty: bool = False) -> int:
+        """
+        Imports a JSON catalog, merging any duplicate entries by slug. Returns the number of entries imported.
+        With if_empty, nothing is imported if the catalog has entries, e.g. from another script opening it first.
+        """
+        with open(json_path, 'r', encoding='utf-8') as file:
+            essays, _, _ = merge_essays(json.load(file), [])
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            if if_empty and len(self):
+                return 0
+            start = self.next_position()
+            for i, essay in enumerate(essays):
+                self.write(essay_key(essay), essay, start + i)
+        print(f"Imported {len(essays)} essays from {json_path} into {self.path}")
+        return len(essays)
+
+    def select(self, where: str = "", params: tuple = ()) -> Iterator[Dict]:
+        """
+        Yields the essay entries matching a WHERE clause over the essays table, in catalog order.
+        """
+        query = f"SELECT * FROM essays {f'WHERE {where}' if where else ''} ORDER BY position"
+        for row in self.connection.execute(query, params):
+            yield self.to_essay(row)
+
+    def essays(self) -> List[Dict]:
+        return list(self.select())
+
+    def get(self, slug: str) -> Optional[Dict]:
+        row = self.connection.execute("SELECT * FROM essays WHERE slug = ?", (slug,)).fetchone()
+        return self.to_essay(row) if row else None
+
+    def with_date(self, date: str) -> List[Dict]:
+        return list(self.select("date = ?", (date,)))
+
+    def with_title(self, title: str) -> List[Dict]:
+        return list(self.select("title = ?", (title,)))
+
+    def with_tag(self, tag: str) -> List[Dict]:
+        return list(self.select("slug IN (SELECT slug FROM essay_tags WHERE tag = ?)", (tag,)))
+
+    def with_flag(self, flag: str, value: bool = True) -> List[Dict]:
+        if flag not in FLAGS:
+            raise ValueError(f"Unknown flag: {flag}")
+        return list(self.select(f"{flag} = ?", (int(value),)))
+
+    def untagged(self) -> List[Dict]:
+        return list(self.select("slug NOT IN (SELECT slug FROM essay_tags)"))
+
+    def slugs(self) -> set:
+        return {row[0] for row in self.connection.execute("SELECT slug FROM essays")}
+
+    def duplicate_slugs(self) -> set:
+        """
+        Slugs of the entries removed as duplicates, which upsert and the sync scripts skip.
+        """
+        return {row[0] for row in self.connection.execute("SELECT slug FROM duplicates")}
+
+    def file_links(self) -> set:
+        return {row[0] for row in self.connection.execute("SELECT file_link FROM essays")}
+
+    def update(self, essay: Dict, **fields) -> None:
+        """
+        Sets some fields of one essay entry, in its own transaction.
+        """
+        self.update_many([(essay, fields)])
+
+    def write_fields(self, essay: Dict, fields: Dict) -> bool:
+        """
+        Sets some fields of an essay entry (and of essay itself), writing only their columns. Caller commits.
+        Returns whether the entry is in the catalog.
+        """
+        essay.update(fields)
+        slug = essay_key(essay)
+        stored = self.get(slug)
+        if stored is None or not fields:
+            return False
+        stored.update(fields)
+        row = self.to_row(stored)
+        columns = [field for field in fields if field in FIELDS]
+        if any(field not in FIELDS for field in fields):
+            columns.append("extra")
+        self.connection.execute(
+            f"UPDATE essays SET {', '.join(f'{column} = ?' for column in columns)} WHERE slug = ?",
+            (*(row[column] for column in columns), slug)
+        )
+        if "tags" in fields:
+            self.write_tags(slug, fields["tags"])
+        return True
+
+    def remove(self, essay: Dict) -> None:
+        """
+        Removes an essay entry. Caller commits. When the entry has a duplicate_of field (the slug of
+        the entry kept instead), its slug is recorded so it isn't added back.
+        """
+        slug = essay_key(essay)
+        self.connection.execute("DELETE FROM essays WHERE slug = ?", (slug,))
+        self.connection.execute("DELETE FROM essay_tags WHERE slug = ?", (slug,))
+        if essay.get("duplicate_of"):
+            self.connection.execute(
+                "INSERT OR REPLACE INTO duplicates (slug, duplicate_of) VALUES (?, ?)", (slug, essay["duplicate_of"])
+            )
+
+    def update_many(self, updates: Iterable[Tuple[Dict, Dict]]) -> int:
+        """
+        Sets fields of several essay entries, given as (essay, fields) pairs, in one transaction.
+        Only the columns of the given fields are written, so scripts changing other fields at the
+        same time don't undo each other's work. Returns the number of entries updated.
+        """
+        return self.apply(updates, [])[0]
+
+    def apply(self, updates: Iterable[Tuple[Dict, Dict]], removals: Iterable[Dict]) -> Tuple[int, int]:
+        """
+        Sets fields of essay entries and removes others, in one transaction. Returns (updated, removed).
+        """
+        updated = removed = 0
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for essay, fields in updates:
+                updated += self.write_fields(essay, fields)
+            for essay in removals:
+                self.remove(essay)
+                removed += 1
+        self.changed = self.changed or bool(updated or removed)
+        return updated, removed
+
+    def upsert(self, essays: Iterable[Dict], rules: Dict[str, MergeRule] = MERGE_RULES) -> Tuple[int, int]:
+        """
+        Merges essay entries into the catalog by slug with merge rules, in one transaction.
+        Entries removed as duplicates are skipped. Returns (added, updated).
+        """
+        added = updated = 0
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            duplicates = self.duplicate_slugs()
+            for essay in essays:
+                slug = essay_key(essay)
+                if slug in duplicates:
+                    continue
+                existing = self.get(slug)
+                if existing is None:
+                    self.write(slug, essay)
+                    added += 1
+                    continue
+                merged = merge_essay(existing, essay, rules)
+                if merged != existing:
+                    self.write(slug, merged)
+                    updated += 1
+        self.changed = self.changed or bool(added or updated)
+        return added, updated
+
+    def delete(self, essay: Dict) -> None:
+        self.apply([], [essay])
+
+    def tag_counts(self) -> Dict[str, int]:
+        rows = self.connection.execute("SELECT tag, COUNT(*) FROM essay_tags GROUP BY tag ORDER BY COUNT(*) DESC")
+        return {tag: count for tag, count in rows}
+
+    def to_json(self) -> str:
+        """
+        The catalog as the JSON list generate_html_file embeds, laid out like json.dump(..., indent=4).
+        """
+        return json.dumps(self.essays(), ensure_ascii=False, indent=4)
+
+    def export_json(self, json_path: Optional[str] = None) -> str:
+        """
+        Writes the catalog to its JSON file (or json_path) atomically, entry by entry. Returns the path written.
+        """
+        exports_own = json_path is None or json_path == self.json_path
+        json_path = json_path or self.json_path
+        tmp_path = f"{json_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            separator = "[\n    "
+            for essay in self.select():
+                f.write(separator + json.dumps(essay, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+                separator = ",\n    "
+            f.write("[]" if separator.startswith("[") else "\n]")
+        os.replace(tmp_path, json_path)
+        if exports_own:
+            self.changed = False
+        return json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a writer's essay catalog to JSON.")
+    parser.add_argument("writer", help="Writer name, as in data/<writer>.db")
+    parser.add_argument("-o", "--output", type=str, help="JSON file to write. Default: data/<writer>.json")
+    parser.add_argument("--stats", action="store_true", help="Print entry, tag and flag counts instead.")
+    args = parser.parse_args()
+
+    with Catalog.for_writer(args.writer) as catalog:
+        if args.stats:
+            print(f"📚 {len(catalog)} essays in {catalog.path}")
+            for flag in FLAGS:
+                print(f"   {flag}: {len(catalog.with_flag(flag))}")
+            print(f"   untagged: {len(catalog.untagged())}")
+            for tag, count in catalog.tag_counts().items():
+                print(f"   {tag}: {count}")
+            return
+        path = catalog.export_json(args.output)
+        print(f"✅ Exported {len(catalog)} essays to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Keyed merge of essay entries into a writer's catalog.
+
+Every entry is identified by its post's slug (the name of its markdown file, the last segment
+of the post URL), and the catalog is indexed by slug once, so merging is linear in the size
+of the catalog plus the new entries. A post that is already in the catalog is updated in
+place instead of being appended again: its fields are merged one by one with MERGE_RULES,
+so a re-fetched post gets its new like count without losing the tags and flags the
+maintenance scripts added, and a placeholder title or date never overwrites a real one.
+"""
+import os
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+MergeRule = Callable[[Any, Any], Any]  # (existing value, new value) -> merged value
+
+
+def prefer_found(placeholder: Any) -> MergeRule:
+    """
+    Takes the new value, unless it's the placeholder the scraper writes when a field wasn't found.
+    """
+    return lambda existing, new: existing if new == placeholder else new
+
+
+def union(existing: Any, new: Any) -> Any:
+    """
+    Merges two lists, keeping the existing order and appending new items.
+    """
+    if not isinstance(existing, list) or not isinstance(new, list):
+        return new
+    return existing + [item for item in new if item not in existing]
+
+
+# Fields without a rule take the new value
+MERGE_RULES: Dict[str, MergeRule] = {
+    "title": prefer_found("Untitled"),
+    "subtitle": prefer_found(""),
+    "date": prefer_found("Date not found"),
+    "tags": union,
+}
+
+
+def essay_key(essay: Dict) -> str:
+    """
+    Gets the stable key of an essay entry: its post's slug, from its markdown or html file name.
+    """
+    link = essay.get("file_link") or essay.get("html_link") or ""
+    return os.path.splitext(os.path.basename(link))[0] or essay.get("title", "")
+
+
+def merge_essay(existing: Dict, new: Dict, rules: Dict[str, MergeRule] = MERGE_RULES) -> Dict:
+    """
+    Upserts the fields of a new entry into an existing one. Fields only the existing entry has are kept.
+    """
+    merged = dict(existing)
+    for field, value in new.items():
+        rule = rules.get(field)
+        merged[field] = rule(existing[field], value) if rule is not None and field in existing else value
+    return merged
+
+
+def merge_essays(
+    existing: Iterable[Dict], new: Iterable[Dict], rules: Dict[str, MergeRule] = MERGE_RULES
+) -> Tuple[List[Dict], int, int]:
+    """
+    Merges new entries into a catalog by essay_key, returning (entries, added, updated).
+    Entries keep the catalog's order and new posts are appended. Duplicates already in the
+    catalog are merged into their first occurrence.
+    """
+    entries: List[Dict] = []
+    index: Dict[str, int] = {}  # essay_key -> position in entries
+    for essay in existing:
+        key = essay_key(essay)
+        if key in index:
+            entries[index[key]] = merge_essay(entries[index[key]], essay, rules)
+        else:
+            index[key] = len(entries)
+            entries.append(essay)
+
+    added = updated = 0
+    for essay in new:
+        key = essay_key(essay)
+        if key not in index:
+            index[key] = len(entries)
+            entries.append(essay)
+            added += 1
+            continue
+        merged = merge_essay(entries[index[key]], essay, rules)
+        if merged != entries[index[key]]:
+            entries[index[key]] = merged
+            updated += 1
+    return entries, added, updated
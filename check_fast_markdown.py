@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Golden-output check of the fast markdown converter: converts post content with html2text
+(the golden output) and with fast_markdown, and reports every input where they differ.
+Inputs the fast converter hands back to html2text are counted as fallbacks, not failures.
+
+    python check_fast_markdown.py                       # fixtures, their API bodies and built-in snippets
+    python check_fast_markdown.py --archive <writer>    # also every page archived for a writer
+    python check_fast_markdown.py path/to/pages/*.html
+
+Exits with status 1 if any input converts differently.
+"""
+import argparse
+import difflib
+import glob
+import json
+import sys
+
+from bs4 import BeautifulSoup
+
+from benchmark_parsers import DEFAULT_PAGES, load_pages
+from fast_markdown import UnsupportedMarkup, html_to_md
+from substack_scraper import BaseSubstackScraper
+
+DEFAULT_API_POSTS = "fixtures/example/api/v1/posts/*.json"
+
+# Markup that exercises html2text's spacing, escaping and nesting rules
+SNIPPETS = [
+    '<p>Plain paragraph.</p><p>Second one.</p>',
+    '<h1>One</h1><h2>Two <strong>bold</strong></h2><h3>Three</h3><h4>Four</h4><h5>Five</h5><h6>Six</h6>',
+    '<p>a<em>b</em>c <em>d</em>, <i>e</i>.<u>f</u></p>',
+    '<p>x<strong>y</strong>z **<b>w</b> <strong> spaced </strong> after</p>',
+    '<p><strong><em>both</em></strong> and <em><strong>again</strong></em></p>',
+    '<p>struck <s>out</s>, <del>gone</del> and <strike>old</strike>~<s>x</s></p>',
+    '<p>Inline <code>x = *y* [z]</code> and <code></code> empty</p>',
+    '<p>1. not a list</p><p>+ not a list</p><p>- not a list</p><p>-- dash</p><p>2024. A year</p>',
+    '<p>Back\\slash \\* and \\_ and \\\\ and [brackets] (parens) #hash *star* _under_</p>',
+    '<p>a &amp; b &lt;c&gt; d&amp;&amp;e</p><p>&lt;tag&gt; 1. after</p>',
+    '<p>non\xa0breaking\xa0space and\ttab\nnewline   runs</p>',
+    '<p><a href="https://example.com">https://example.com</a> <a href="https://x.com/a">link</a></p>',
+    '<p><a href="https://x.com/t" title="A [title]">titled</a> <a href="#footnote-1">1</a> <a>bare</a></p>',
+    '<p><a href="https://x.com/(x)">parens</a><a href="https://x.com/e"></a><a href="">empty href</a></p>',
+    '<p><a href="https://x.com"><strong>bold link</strong></a> <a href="https://x.com"><em>em</em> text</a></p>',
+    '<p><a href="https://x.com/i"><img src="https://x.com/i.png" alt="alt [x]"/></a></p>',
+    '<p><img src="https://x.com/a.png"/><img alt="no src"/><img src="https://x.com/b (1).png" alt=""/></p>',
+    '<div class="captioned-image-container"><figure><a class="image-link" href="https://x.com/full.png">'
+    '<picture><source type="image/webp" srcset="https://x.com/a.webp 1x"/><img src="https://x.com/a.png" '
+    'alt="Diagram"/></picture></a><figcaption class="image-caption">Caption <em>here</em></figcaption>'
+    '</figure></div><p>After</p>',
+    '<ul><li>one</li><li>two</li></ul><p>between</p><ol><li>first</li><li>second</li></ol>',
+    '<ul><li><p>para item</p></li><li><p>second</p><p>more</p></li></ul>',
+    '<ol start="3"><li>three</li><li>four<ul><li>nested</li><li>bullets<ol><li>deep</li></ol></li></ul></li></ol>'
+    '<ul><li>after</li></ul>',
+    '<ol start="x"><li>bad start</li></ol><ol start=""><li>empty start</li></ol>',
+    '<ul><li>item<pre><code>code in\n  a list</code></pre></li></ul>',
+    '<blockquote><p>quoted</p><p>twice</p></blockquote><blockquote>line<br/>break</blockquote>',
+    '<blockquote><blockquote><p>nested</p></blockquote><ul><li>list in quote</li></ul></blockquote>',
+    '<pre><code>def f(x):\n    return x * 2\n\n# done</code></pre><p>after code</p>',
+    '<pre>\nleading newline\n</pre><pre>a &lt; b &amp;&amp; c</pre>',
+    '<p>line<br/>break<br/><br/>double</p><hr/><p>after rule</p>',
+    '<div><div>nested divs</div>text in div<span> span </span></div>',
+    '<p>Thanks!<a class="footnote-anchor" href="#footnote-1" id="footnote-anchor-1">1</a></p>'
+    '<div class="footnote"><a class="footnote-number" href="#footnote-anchor-1">1</a>'
+    '<div class="footnote-content"><p>The note.</p></div></div>',
+    '<div class="embedded-post-wrap"><a class="embedded-post" href="https://x.substack.com/p/y">'
+    '<div class="embedded-post-header"><span>Publication</span></div><div class="embedded-post-title">Title</div>'
+    '</a></div>',
+    '<div class="youtube-wrap"><div class="youtube-inner"><iframe src="https://www.youtube.com/embed/x">'
+    '</iframe></div></div><p>video above</p>',
+    '<p>text <!-- comment --> more <sup>1</sup><sub>2</sub></p>',
+    '<h2><a href="https://x.com/h">linked heading</a></h2><a href="https://x.com"><h3>heading in link</h3></a>',
+    '<p><em> spaced emphasis </em>after<em>word</em>(paren)<strong>x</strong>.</p>',
+    '<p>text <em></em> empty <strong></strong> marks</p>',
+    '<table><tr><td>falls back</td></tr></table>',
+    '<p>ends with space </p> ',
+    'bare text <b>bold</b>',
+]
+
+
+def content_of(page):
+    """The content html the scraper converts for a saved post page"""
+    element = BeautifulSoup(page, "html.parser").select_one("div.available-content")
+    return str(element) if element else None
+
+
+def load_inputs(paths, writer):
+    """Yield (name, html) for every input to check"""
+    pages = load_pages(paths, writer)
+    for i, page in enumerate(pages):
+        content = content_of(page) if page else None
+        if content:
+            yield f"page {i + 1}", content
+    if not paths and not writer:
+        for path in sorted(glob.glob(DEFAULT_API_POSTS)):
+            with open(path, 'r', encoding='utf-8') as f:
+                body = json.load(f).get("body_html")
+            if body:
+                yield f"api {path}", body
+    for i, snippet in enumerate(SNIPPETS):
+        # As the JSON API serves it, and as extract_post_data passes it on after parsing
+        yield f"snippet {i + 1}", snippet
+        yield f"snippet {i + 1} (parsed)", str(BeautifulSoup(snippet, "html.parser"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the fast markdown converter against html2text.")
+    parser.add_argument("pages", nargs="*", help=f"Page files or globs. Default: {DEFAULT_PAGES}")
+    parser.add_argument("--archive", type=str, help="Check the pages archived for this writer too.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List fallbacks and matching inputs too.")
+    args = parser.parse_args()
+
+    same = fallbacks = 0
+    failures = []
+    for name, html_content in load_inputs(args.pages, args.archive):
+        expected = BaseSubstackScraper.html_to_md(html_content)
+        try:
+            actual = html_to_md(html_content)
+        except UnsupportedMarkup as e:
+            fallbacks += 1
+            if args.verbose:
+                print(f"↩️  {name}: falls back to html2text ({e})")
+            continue
+        if actual == expected:
+            same += 1
+            if args.verbose:
+                print(f"✅ {name}")
+            continue
+        failures.append(name)
+        print(f"❌ {name} differs:")
+        diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(), "html2text", "fast_markdown", lineterm="")
+        for line in list(diff)[:20]:
+            print(f"    {line!r}")
+
+    print(f"\n{same} identical, {fallbacks} fallbacks, {len(failures)} different")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Regression check of the HTTP cache: serves pages with an ETag from a local server, which
+answers 304 Not Modified when the ETag is sent back, and fetches each of them twice through a
+caching session. The second fetch must be served from the cache with the same body, also for
+streamed requests and for sitemaps, which are streamed. Streaming a large body, downloaded or
+from the cache, must never hold it in memory whole. A badly gzipped sitemap must fail with one
+of the errors sitemap readers catch.
+
+    python check_http_cache.py
+
+Exits with status 1 if any check fails.
+"""
+import gzip
+import http.server
+import socketserver
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+from http_cache import HttpCache
+from sitemap import SITEMAP_ERRORS, iter_sitemap
+from substack_scraper import create_session
+
+BODY = b"<html><body><p>" + b"Cached post body. " * 2000 + b"</p></body></html>"
+LARGE_BODY = b"x" * (32 * 1024 * 1024)
+MAX_STREAMED_MEMORY = 4 * 1024 * 1024  # Peak allocations allowed while streaming LARGE_BODY
+ETAG = '"v1"'
+POSTS = [(f"https://example.substack.com/p/post-{i}", f"2024-01-{i + 1:02d}") for i in range(20)]
+SITEMAP_INDEX = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    '<sitemap><loc>{base_url}/posts.xml.gz</loc></sitemap></sitemapindex>'
+)
+SITEMAP = gzip.compress((
+    '<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    + "".join(f"<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>" for url, lastmod in POSTS)
+    + "</urlset>"
+).encode("utf-8"))
+
+
+class ETagHandler(http.server.BaseHTTPRequestHandler):
+    """Serves BODY and a gzipped sitemap index with an ETag, or 304 when the request revalidates it"""
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        if self.path == "/sitemap.xml":
+            body = SITEMAP_INDEX.format(base_url=f"http://{self.headers['Host']}").encode("utf-8")
+        elif self.path == "/posts.xml.gz":
+            body = SITEMAP
+        elif self.path == "/broken.xml.gz":
+            body = b"not gzip at all" * 10
+        elif self.path == "/large":
+            body = LARGE_BODY
+        else:
+            body = BODY
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml" if ".xml" in self.path else "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_streamed_gets(session, url):
+    """Two streamed GETs of an ETag'd URL: both read fully, the second one from the cache"""
+    failures = []
+    for attempt in (1, 2):
+        with session.get(url, stream=True) as response:
+            body = b"".join(response.iter_content(chunk_size=4096))
+            from_cache = getattr(response, "from_cache", False)
+        if body != BODY:
+            failures.append(f"streamed GET {attempt}: got {len(body)} bytes instead of {len(BODY)}")
+        if from_cache != (attempt == 2):
+            failures.append(f"streamed GET {attempt}: from_cache is {from_cache}")
+    return failures
+
+
+def check_streamed_memory(session, url):
+    """Two streamed GETs of a large body: neither the download nor the cached copy is held in memory"""
+    failures = []
+    for attempt in (1, 2):
+        tracemalloc.start()
+        size = 0
+        with session.get(url, stream=True) as response:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+            from_cache = getattr(response, "from_cache", False)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if size != len(LARGE_BODY):
+            failures.append(f"streamed GET {attempt}: got {size} bytes instead of {len(LARGE_BODY)}")
+        if peak > MAX_STREAMED_MEMORY:
+            failures.append(f"streamed GET {attempt}: peaked at {peak / 1024 / 1024:.1f} MB")
+        if from_cache != (attempt == 2):
+            failures.append(f"streamed GET {attempt}: from_cache is {from_cache}")
+    return failures
+
+
+def check_gets(session, url):
+    """Two plain GETs of an ETag'd URL return the same body"""
+    bodies = [session.get(url).content for _ in range(2)]
+    return [] if bodies == [BODY, BODY] else ["plain GETs returned different bodies"]
+
+
+def check_sitemaps(session, url):
+    """Two reads of a sitemap index with a gzipped child: both find every post and its lastmod"""
+    failures = []
+    for attempt in (1, 2):
+        entries = sorted(iter_sitemap(session, url))
+        if entries != sorted(POSTS):
+            failures.append(f"sitemap read {attempt}: got {len(entries)} entries instead of {len(POSTS)}")
+    return failures
+
+
+def check_broken_sitemap(session, url):
+    """A badly gzipped sitemap fails with an error sitemap readers catch"""
+    try:
+        list(iter_sitemap(session, url))
+    except SITEMAP_ERRORS:
+        return []
+    return ["no error raised"]
+
+
+def main():
+    socketserver.TCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        cache = HttpCache(directory)
+        session = create_session(cache=cache)
+        for name, check, path in (
+            ("streamed GETs", check_streamed_gets, "/streamed"),
+            ("large streamed GETs", check_streamed_memory, "/large"),
+            ("plain GETs", check_gets, "/plain"),
+            ("sitemap index read twice", check_sitemaps, "/sitemap.xml"),
+            ("badly gzipped sitemap", check_broken_sitemap, "/broken.xml.gz"),
+        ):
+            try:
+                problems = check(session, f"{base_url}{path}")
+            except Exception as e:
+                problems = [f"{type(e).__name__}: {e}"]
+            print(f"{'✗' if problems else '✓'} {name}")
+            failures.extend(f"  {name}: {problem}" for problem in problems)
+        print(f"\n{cache.report()}")
+    server.shutdown()
+
+    if failures:
+        print("\n".join(["", *failures]))
+        sys.exit(1)
+    print("\n✅ Every check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,6 @@ BLOG_URL = os.getenv("SUBSTACK_BLOG_URL", "https://example.substack.com/")
 # Load author information from environment variables
 AUTHOR_NAME = os.getenv("SUBSTACK_AUTHOR_NAME", "Author Name")
 BLOG_TITLE = os.getenv("SUBSTACK_BLOG_TITLE", "Technical Articles")
+
+# File the premium scraper saves the logged in session cookies to (created with owner-only permissions)
+SESSION_FILE = os.getenv("SUBSTACK_SESSION_FILE", ".substack_session.json")
@@ -0,0 +1,159 @@
+"""
+On-disk cache of converted post content.
+
+html_to_md (html2text) and md_to_html (markdown) are the slowest part of extracting a post,
+and a bulk re-sync or a --from-archive re-run mostly converts content that hasn't changed.
+ConvertCache stores each conversion's output under the SHA-256 of its input, the converter
+settings and the versions of the converting libraries, so unchanged content is converted once,
+and upgrading html2text, markdown, BeautifulSoup or lxml (which the fast converter walks), or
+changing the settings, starts over with fresh entries.
+
+Every entry is its own file, written atomically and named by its key, so the conversion
+processes of --convert-processes share the cache without coordinating. Reading an entry marks
+it as recently used, and once the cache grows past its size limit the least recently used
+entries are evicted.
+"""
+import hashlib
+import json
+import os
+from threading import Lock
+from typing import List, Optional, Tuple
+
+import bs4
+import html2text
+import markdown
+from lxml import etree
+
+CACHE_DIR: str = ".convert_cache"
+MAX_CACHE_BYTES: int = 256 * 1024 * 1024  # 256 MB
+EVICT_TO: float = 0.9  # Eviction frees space down to this share of max_bytes, so it doesn't run on every store
+CONVERTER_VERSION: int = 1  # Bump when the conversion code itself changes output
+
+LIBRARY_VERSIONS: Tuple[str, ...] = (
+    ".".join(map(str, html2text.__version__)), markdown.__version__, bs4.__version__, etree.__version__
+)
+
+CacheStats = Tuple[int, int, int]  # (hits, misses, stored)
+
+
+class ConvertCache:
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.lock: Lock = Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stored: int = 0
+        self.evicted: int = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes: int = sum(size for _, size, _ in self.scan())
+
+    @staticmethod
+    def make_key(kind: str, source: str, settings: tuple = ()) -> str:
+        """
+        Keys a conversion by what determines its output: its kind, input, settings and library versions.
+        """
+        header = json.dumps([CONVERTER_VERSION, LIBRARY_VERSIONS, kind, list(settings)])
+        return hashlib.sha256(f"{header}\n{source}".encode("utf-8")).hexdigest()
+
+    def scan(self) -> List[Tuple[str, int, float]]:
+        """
+        Lists the stored entries as (path, size, last used), skipping files removed meanwhile.
+        """
+        entries = []
+        with os.scandir(self.directory) as files:
+            for file in files:
+                if file.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = file.stat()
+                except OSError:
+                    continue
+                entries.append((file.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Gets a stored output and marks it as recently used, or None on a miss.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                value = file.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Stores an output, evicting least recently used entries if the cache outgrew max_bytes.
+        """
+        content = value.encode("utf-8")
+        if len(content) > self.max_bytes:
+            return
+        path = os.path.join(self.directory, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.stored += 1
+            self.total_bytes += len(content)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache is back under EVICT_TO of max_bytes.
+        Sizes are re-read from disk, since other processes may share the directory. Caller holds the lock.
+        """
+        entries = sorted(self.scan(), key=lambda entry: entry[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.total_bytes <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+                self.evicted += 1
+            except OSError:
+                pass
+            self.total_bytes -= size
+
+    def take_stats(self) -> CacheStats:
+        """
+        Gets the hits, misses and stores counted since the last call, and resets them.
+        Conversion processes send these back to the scraper's cache with add_stats.
+        """
+        with self.lock:
+            stats = (self.hits, self.misses, self.stored)
+            self.hits = self.misses = self.stored = 0
+        return stats
+
+    def add_stats(self, stats: CacheStats) -> None:
+        with self.lock:
+            self.hits += stats[0]
+            self.misses += stats[1]
+            self.stored += stats[2]
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        """
+        Summarises the cache's hits, misses and size.
+        """
+        entries = self.scan()
+        return (
+            f"Conversion cache: {self.hits} hits / {self.misses} misses ({self.hit_rate():.0%} hit rate), "
+            f"{self.stored} stored, {self.evicted} evicted, "
+            f"{len(entries)} entries using {sum(size for _, size, _ in entries) / 1024 / 1024:.1f} MB"
+        )
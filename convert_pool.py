@@ -0,0 +1,53 @@
+"""
+Conversion stage of the scraping pipeline.
+
+Parsing a post page, converting it to markdown with html2text and rendering its html output
+are CPU-bound, and on threads they all share one core with the fetching. With
+--convert-processes, scrape_posts runs in three stages instead: fetch threads download the
+raw pages, a pool of processes parses and converts them, and the main thread writes the
+files, journal and catalog in order. Every stage only runs a bounded window ahead of the
+next one, so a slow stage holds back the ones before it instead of piling pages up in memory.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from convert_cache import CacheStats, ConvertCache
+
+CONVERT_PROCESSES: int = os.cpu_count() or 1  # Default pool size: one process per core
+CONVERT_WINDOW: int = 2  # Posts queued for conversion per process
+
+converters: Dict[tuple, object] = {}  # In each process: the converting scraper of every (class, settings)
+
+
+def create_convert_pool(processes: int = CONVERT_PROCESSES) -> ProcessPoolExecutor:
+    """
+    Starts the pool of processes posts are converted in.
+    """
+    return ProcessPoolExecutor(max_workers=max(1, processes))
+
+
+def convert_post(
+    scraper_class: type,
+    parser: str,
+    restrict_parsing: bool,
+    direct_html: bool,
+    md_converter: str,
+    cache_settings: Optional[Tuple[str, int]],
+    url: str,
+    kind: str,
+    content: bytes
+) -> Tuple[Optional[Tuple[tuple, str]], Optional[CacheStats]]:
+    """
+    Runs in a pool process: converts a fetched page (or, for kind "api", a JSON API response)
+    into the post's data and html output, with a converter made once per process and settings.
+    With cache_settings (the conversion cache's directory and size limit), the cache is used and
+    its hits and misses for this post are returned alongside.
+    """
+    key = (scraper_class, parser, restrict_parsing, direct_html, md_converter, cache_settings)
+    converter = converters.get(key)
+    if converter is None:
+        cache = ConvertCache(*cache_settings) if cache_settings is not None else None
+        converter = converters[key] = scraper_class.converter(parser, restrict_parsing, direct_html, md_converter, cache)
+    result = converter.convert_post(url, kind, content)
+    return result, converter.convert_cache.take_stats() if converter.convert_cache is not None else None
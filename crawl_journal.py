@@ -0,0 +1,103 @@
+"""
+Crash-safe crawl journal.
+
+scrape_posts appends one JSON line per finished post (its essay entry and sync manifest
+entry) and fsyncs it before moving on, so a run that crashes or is killed part way loses
+nothing it already saved. The journal is merged into the writer's catalog at the end of the
+run by streaming it line by line, then deleted. The journal left behind by an interrupted run
+is never discarded: its posts are put back into the sync manifest, so they aren't fetched
+again, and merged into the catalog, before the run starts or, with --resume, along with the
+new ones.
+"""
+import json
+import os
+from typing import Dict, Iterator
+
+JOURNAL_DIR: str = "data"
+
+
+class CrawlJournal:
+    def __init__(self, path: str):
+        self.path: str = path
+        self.file = None
+
+    @classmethod
+    def for_writer(cls, writer_name: str, directory: str = JOURNAL_DIR) -> "CrawlJournal":
+        """
+        Opens the journal kept next to a writer's JSON data.
+        """
+        return cls(os.path.join(directory, f"{writer_name}_journal.jsonl"))
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def recover(self) -> int:
+        """
+        Drops a torn last line left by a crash mid-write and returns the number of complete entries.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        count = 0
+        valid_size = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                count += 1
+                valid_size += len(line)
+        if valid_size < os.path.getsize(self.path):
+            print(f"Dropping incomplete entry at the end of {self.path}")
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid_size)
+        return count
+
+    def open(self, resume: bool = False) -> None:
+        """
+        Opens the journal for appending. Without resume, it starts empty: merge the entries of a
+        previous run into the catalog first.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def append(self, essay: Dict, manifest_entry: Dict) -> None:
+        """
+        Records a finished post and forces it to disk before returning.
+        """
+        line = json.dumps({"essay": essay, "manifest": manifest_entry}, ensure_ascii=False)
+        self.file.write(line + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Streams the journal's entries, one line at a time.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_essays(self) -> Iterator[Dict]:
+        for entry in self:
+            yield entry["essay"]
+
+    def clear(self) -> None:
+        """
+        Deletes the journal once its entries have been merged into the catalog.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
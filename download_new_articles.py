@@ -3,27 +3,20 @@
 Download only new articles that aren't in our library yet
 """
 import requests
-from xml.etree import ElementTree as ET
-import json
 import os
 import sys
 from dotenv import load_dotenv
+from catalog import Catalog
+from http_cache import CachingAdapter, HttpCache
+from sitemap import iter_sitemap
 
 # Load environment variables
 load_dotenv()
 
 def get_existing_slugs():
-    """Get slugs of articles we already have"""
-    with open('data/blog.json', 'r') as f:
-        essays = json.load(f)
-
-    existing_slugs = set()
-    for essay in essays:
-        file_path = essay['file_link']
-        slug = file_path.split('/')[-1].replace('.md', '')
-        existing_slugs.add(slug)
-
-    return existing_slugs
+    """Get slugs of articles we already have, or removed as duplicates of one we have"""
+    with Catalog.for_writer('blog') as catalog:
+        return catalog.slugs() | catalog.duplicate_slugs()
 
 def get_new_article_urls():
     """Fetch sitemap and find new articles"""
@@ -33,12 +26,17 @@ def get_new_article_urls():
         print("Please add SUBSTACK_BLOG_URL=https://your-blog.substack.com to your .env file")
         sys.exit(1)
 
-    sitemap_url = f"{blog_url}/sitemap.xml"
-    response = requests.get(sitemap_url)
-    root = ET.fromstring(response.content)
+    # Revalidate the cached sitemap instead of downloading it again when unchanged
+    http_cache = HttpCache()
+    session = requests.Session()
+    session.mount("https://", CachingAdapter(http_cache))
+    session.mount("http://", CachingAdapter(http_cache))
 
-    # Get all URLs
-    urls = [element.text for element in root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+    # Get all URLs, streaming the sitemap (following sitemap indexes)
+    sitemap_url = f"{blog_url}/sitemap.xml"
+    urls = [url for url, lastmod in iter_sitemap(session, sitemap_url)]
+    http_cache.flush()
+    print(http_cache.report())
 
     # Filter to post URLs only
     post_urls = [url for url in urls if '/p/' in url and not any(kw in url for kw in ['about', 'archive', 'podcast'])]
@@ -44,7 +44,10 @@ def download_urls_from_file(url_file, use_premium=True, browser='chrome'):
     scraper.post_urls = urls
 
     # Download
-    scraper.scrape_posts(num_posts_to_scrape=0)  # 0 means all
+    try:
+        scraper.scrape_posts(num_posts_to_scrape=0)  # 0 means all
+    finally:
+        scraper.close()
 
     print(f"\n✓ Downloaded {len(urls)} new articles!")
     print(f"✓ Updated blog.html interface")
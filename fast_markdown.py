@@ -0,0 +1,441 @@
+"""
+Fast HTML to Markdown conversion for Substack post bodies.
+
+html2text feeds the post through Python's pure-Python HTMLParser and a general-purpose state
+machine. Substack bodies only use a small set of elements (paragraphs, headings, emphasis,
+links, lists, blockquotes, captioned images, code blocks, embeds and footnotes), so html_to_md
+here parses the content with lxml and walks the tree once, producing exactly what html2text
+produces with the scraper's options (no wrapping, inline links) for those elements. Anything it
+doesn't handle, such as tables, definition lists, scripts or styles, raises UnsupportedMarkup
+so the caller can fall back to html2text.
+
+check_fast_markdown.py compares both converters on saved pages and a set of tricky snippets,
+and benchmark_converters.py compares their throughput.
+"""
+import re
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+# Elements html2text gives a meaning that html_to_md doesn't reproduce
+UNSUPPORTED_TAGS = frozenset((
+    "html", "head", "body", "title", "style", "script", "abbr", "q", "kbd", "tt",
+    "dl", "dt", "dd", "table", "thead", "tbody", "tfoot", "tr", "td", "th", "caption",
+))
+HEADINGS: Dict[str, int] = {f"h{n}": n for n in range(1, 10)}
+# Elements without an end tag, so only their start is compared between the source and the parsed tree
+VOID_TAGS = frozenset((
+    "area", "base", "basefont", "br", "col", "embed", "frame", "hr", "img", "input", "isindex",
+    "keygen", "link", "meta", "param", "source", "track", "wbr",
+))
+
+# Text is handed to html2text in pieces split at the characters the page escapes as entities
+ENTITY_CHARS = re.compile(r"([&<>])")
+OTHER_ENTITY = re.compile(r"&(?!(?:amp|lt|gt);)")
+TAG_TOKEN = re.compile(r"<(/?)([a-zA-Z][^\s/>]*)")
+WHITESPACE = re.compile(r"\s+")
+ABSOLUTE_URL = re.compile(r"^[a-zA-Z+]+://")
+SPACED_AFTER_EMPHASIS = re.compile(r"[^][(){}\s.!?]")
+PUNCTUATION = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")  # string.punctuation
+ASCII_WHITESPACE = frozenset(" \t\n\r\x0b\x0c")  # string.whitespace
+# Markdown escaping of html2text's escape_md / escape_md_section
+MD_CHARS = re.compile(r"([\\\[\]\(\)])")
+MD_BACKSLASH = re.compile(r"(\\)(?=[\\`*_{}\[\]()#+\-.!])")
+MD_DOT = re.compile(r"^(\s*\d+)(\.)(?=\s)", re.MULTILINE)
+MD_PLUS = re.compile(r"^(\s*)(\+)(?=\s)", re.MULTILINE)
+MD_DASH = re.compile(r"^(\s*)(-)(?=\s|\-)", re.MULTILINE)
+
+
+class UnsupportedMarkup(Exception):
+    """
+    Raised for content html_to_md can't convert exactly like html2text.
+    """
+
+
+def escape_md(text: str) -> str:
+    return MD_CHARS.sub(r"\\\1", text)
+
+
+def escape_md_section(text: str) -> str:
+    if "\\" in text:
+        text = MD_BACKSLASH.sub(r"\\\1", text)
+    if "." in text:
+        text = MD_DOT.sub(r"\1\\\2", text)
+    if "+" in text:
+        text = MD_PLUS.sub(r"\1\\\2", text)
+    if "-" in text:
+        text = MD_DASH.sub(r"\1\\\2", text)
+    return text
+
+
+class MarkdownWriter:
+    """
+    The output side of html2text's converter, driven by the elements of an lxml tree.
+    """
+
+    def __init__(self):
+        self.output: List[str] = []
+        self.p_p = 0  # Newlines to write before the next output
+        self.start = True
+        self.space = False
+        self.last_was_nl = False
+        self.last_was_list = False
+        self.br_toggle = ""
+        self.astack: List[Optional[dict]] = []
+        self.maybe_automatic_link: Optional[str] = None
+        self.empty_link = False
+        self.lists: List[list] = []  # [name, number of the last item]
+        self.list_code_indent = ""
+        self.blockquote = 0
+        self.pre = False
+        self.startpre = False
+        self.pre_indent = ""
+        self.code = False
+        self.stressed = False
+        self.preceding_stressed = False
+        self.preceding_data = ""
+        self.current_tag = ""
+        self.angle_brackets = 0  # < and > characters in the text, which must all have been escaped
+        self.tags: List[str] = []  # Start and end tags walked, to check the parser didn't repair the nesting
+
+    def out(self, text: str) -> None:
+        self.output.append(text)
+        if text:
+            self.last_was_nl = text[-1] == "\n"
+
+    def p(self) -> None:
+        self.p_p = 2
+
+    def pbr(self) -> None:
+        if self.p_p == 0:
+            self.p_p = 1
+
+    def o(self, data: str, puredata: bool = False, force: bool = False, end: bool = False) -> None:
+        if puredata and not self.pre:
+            data = WHITESPACE.sub(" ", data)
+            if data and data[0] == " ":
+                self.space = True
+                data = data[1:]
+        if not data and not force and not end:
+            return
+
+        if self.startpre and not data.startswith("\n") and not data.startswith("\r\n"):
+            data = "\n" + data
+
+        bq = ">" * self.blockquote
+        if not (force and data and data[0] == ">") and self.blockquote:
+            bq += " "
+
+        if self.pre:
+            if self.lists:
+                bq += self.list_code_indent
+            bq += "    "
+            data = data.replace("\n", "\n" + bq)
+            self.pre_indent = bq
+
+        if self.startpre:
+            self.startpre = False
+            if self.lists:
+                data = data.lstrip("\n" + self.pre_indent)
+
+        if self.start:
+            self.space = False
+            self.p_p = 0
+            self.start = False
+
+        if end:
+            self.p_p = 0
+            self.out("\n")
+            self.space = False
+
+        if self.p_p:
+            self.out((self.br_toggle + "\n" + bq) * self.p_p)
+            self.space = False
+            self.br_toggle = ""
+
+        if self.space:
+            if not self.last_was_nl:
+                self.out(" ")
+            self.space = False
+
+        self.p_p = 0
+        self.out(data)
+
+    def handle_data(self, data: str, entity_char: bool = False) -> None:
+        if not data:
+            return
+
+        if self.stressed:
+            data = data.strip()
+            self.stressed = False
+            self.preceding_stressed = True
+        elif self.preceding_stressed:
+            if (
+                SPACED_AFTER_EMPHASIS.match(data[0])
+                and self.current_tag not in HEADINGS
+                and self.current_tag not in ("a", "code", "pre")
+            ):
+                data = " " + data
+            self.preceding_stressed = False
+
+        if self.maybe_automatic_link is not None:
+            href = self.maybe_automatic_link
+            if href == data and ABSOLUTE_URL.match(href):
+                self.o("<" + data + ">")
+                self.empty_link = False
+                return
+            self.o("[")
+            self.maybe_automatic_link = None
+            self.empty_link = False
+
+        if not self.code and not self.pre and not entity_char:
+            data = escape_md_section(data)
+        self.preceding_data = data
+        self.o(data, puredata=True)
+
+    def handle_text(self, text: Optional[str]) -> None:
+        """
+        Writes a text node the way html2text receives it: in pieces split at escaped characters.
+        """
+        if not text:
+            return
+        if "&" not in text and "<" not in text and ">" not in text:
+            self.handle_data(text)
+            return
+        self.angle_brackets += text.count("<") + text.count(">")
+        for i, piece in enumerate(ENTITY_CHARS.split(text)):
+            self.handle_data(piece, entity_char=i % 2 == 1)
+
+    def handle_tag(self, tag: str, attrs, start: bool) -> None:
+        self.current_tag = tag
+
+        if (
+            start
+            and self.maybe_automatic_link is not None
+            and tag not in ("p", "div", "style", "dl", "dt", "img")
+        ):
+            self.o("[")
+            self.maybe_automatic_link = None
+            self.empty_link = False
+
+        level = HEADINGS.get(tag)
+        if level:
+            if self.astack:
+                if start:
+                    if self.output and self.output[-1] == "[":
+                        self.output.pop()
+                        self.space = False
+                        self.o("#" * level + " ")
+                        self.o("[")
+                else:
+                    self.p_p = 0
+                    return
+            else:
+                self.p()
+                if start:
+                    self.o("#" * level + " ")
+                else:
+                    return
+
+        elif tag == "p" or tag == "div":
+            if not self.astack:
+                self.p()
+
+        elif tag == "br":
+            if start:
+                self.o("  \n> " if self.blockquote > 0 else "  \n")
+
+        elif tag == "hr":
+            if start:
+                self.p()
+                self.o("* * *")
+                self.p()
+
+        elif tag == "blockquote":
+            if start:
+                self.p()
+                self.o("> ", force=True)
+                self.start = True
+                self.blockquote += 1
+            else:
+                self.blockquote -= 1
+                self.p()
+
+        elif tag == "em" or tag == "i" or tag == "u":
+            if (
+                start
+                and self.preceding_data
+                and self.preceding_data[-1] not in ASCII_WHITESPACE
+                and self.preceding_data[-1] not in PUNCTUATION
+            ):
+                self.preceding_data += " "
+                self.o(" _")
+            else:
+                self.o("_")
+            if start:
+                self.stressed = True
+
+        elif tag == "strong" or tag == "b":
+            if start and self.preceding_data and self.preceding_data[-1] == "*":
+                self.preceding_data += " "
+                self.o(" **")
+            else:
+                self.o("**")
+            if start:
+                self.stressed = True
+
+        elif tag == "del" or tag == "strike" or tag == "s":
+            if start and self.preceding_data and self.preceding_data[-1] == "~":
+                self.preceding_data += " "
+                self.o(" ~~")
+            else:
+                self.o("~~")
+            if start:
+                self.stressed = True
+
+        elif tag == "code":
+            if not self.pre:
+                self.o("`")
+                self.code = not self.code
+
+        elif tag == "a":
+            if start:
+                href = attrs.get("href")
+                if href is not None and not href.startswith("#"):
+                    self.astack.append(attrs)
+                    self.maybe_automatic_link = href
+                    self.empty_link = True
+                else:
+                    self.astack.append(None)
+            elif self.astack:
+                a = self.astack.pop()
+                if self.maybe_automatic_link and not self.empty_link:
+                    self.maybe_automatic_link = None
+                elif a:
+                    if self.empty_link:
+                        self.o("[")
+                        self.empty_link = False
+                        self.maybe_automatic_link = None
+                    self.p_p = 0
+                    title = escape_md(a.get("title") or "")
+                    title = f' "{title}"' if title.strip() else ""
+                    self.o(f"]({escape_md(a['href'])}{title})")
+
+        elif tag == "img":
+            if start and attrs.get("src") is not None:
+                alt = attrs.get("alt") or ""
+                if self.maybe_automatic_link is not None:
+                    self.o("[")
+                    self.maybe_automatic_link = None
+                    self.empty_link = False
+                self.o("![" + escape_md(alt) + "]")
+                self.o("(" + escape_md(attrs["src"]) + ")")
+
+        elif tag == "pre":
+            if start:
+                self.startpre = True
+                self.pre = True
+                self.pre_indent = ""
+            else:
+                self.pre = False
+            self.p()
+
+        if tag == "ol" or tag == "ul":
+            if not self.lists and not self.last_was_list:
+                self.p()
+            if start:
+                try:
+                    number = int(attrs["start"]) - 1 if "start" in attrs else 0
+                except ValueError:
+                    number = 0
+                self.lists.append([tag, number])
+            elif self.lists:
+                self.lists.pop()
+                if not self.lists:
+                    self.o("\n")
+            self.last_was_list = True
+        else:
+            self.last_was_list = False
+
+        if tag == "li":
+            self.list_code_indent = ""
+            self.pbr()
+            if start:
+                li = self.lists[-1] if self.lists else ["ul", 0]
+                parent = None
+                for name, _ in self.lists:
+                    self.list_code_indent += "   " if parent == "ol" else "  "
+                    parent = name
+                self.o(self.list_code_indent)
+                if li[0] == "ul":
+                    self.list_code_indent += "  "
+                    self.o("* ")
+                else:
+                    li[1] += 1
+                    self.list_code_indent += "   "
+                    self.o(f"{li[1]}. ")
+                self.start = True
+
+    def convert(self, root) -> str:
+        """
+        Converts the children of root (not root itself) and returns the markdown.
+        """
+        self.handle_text(root.text)
+        for event, element in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+            if element is root:
+                continue
+            tag = element.tag
+            if not isinstance(tag, str):  # Comments and processing instructions only keep their tail
+                self.handle_text(element.tail)
+                continue
+            if tag in UNSUPPORTED_TAGS or ":" in tag:
+                raise UnsupportedMarkup(tag)
+            if event == "start":
+                self.tags.append(tag)
+                self.handle_tag(tag, element.attrib, start=True)
+                self.handle_text(element.text)
+            else:
+                if tag not in VOID_TAGS:
+                    self.tags.append(f"/{tag}")
+                self.handle_tag(tag, element.attrib, start=False)
+                self.handle_text(element.tail)
+
+        self.pbr()
+        self.o("", end=True)
+        return "".join(self.output)
+
+
+def html_to_md(html_content: str) -> str:
+    """
+    Converts a post body to markdown, exactly like html2text with body_width 0.
+    Raises UnsupportedMarkup for content outside the Substack element set.
+    """
+    if not html_content.strip():
+        raise UnsupportedMarkup("empty content")
+    if "\r" in html_content or "\x00" in html_content:
+        raise UnsupportedMarkup("carriage return or NUL in content")
+    # html2text splits text at every entity and maps some of them to ASCII; only those
+    # BeautifulSoup writes are reproduced
+    if OTHER_ENTITY.search(html_content):
+        raise UnsupportedMarkup("entity other than &amp;, &lt; or &gt;")
+    # Plain lxml elements, without the class lookup lxml.html does for every element
+    try:
+        document = etree.HTML(f"<div>{html_content}</div>")
+    except ValueError as e:
+        raise UnsupportedMarkup(str(e)) from e
+    body = document.find("body") if document is not None else None
+    if body is None or len(body) != 1:
+        raise UnsupportedMarkup("content outside of the wrapping element")
+    root = body[0]
+    if root.text is None and not html_content.lstrip(" \t\n\x0c").startswith("<"):
+        raise UnsupportedMarkup("leading text the parser dropped")
+    writer = MarkdownWriter()
+    md_content = writer.convert(root)
+    # A < or > that wasn't escaped in the source is text html2text doesn't split at
+    if writer.angle_brackets != html_content.count("&lt;") + html_content.count("&gt;"):
+        raise UnsupportedMarkup("unescaped < or > in text")
+    # html2text sees the tags as written, lxml closes, opens and moves elements to fix bad nesting
+    source_tags = [f"{end}{name.lower()}" for end, name in TAG_TOKEN.findall(html_content)]
+    if source_tags != writer.tags:
+        raise UnsupportedMarkup("tags nested differently from how the parser reads them")
+    return md_content
@@ -2,23 +2,28 @@
 """
 Fix articles with Jan 11, 2026 dates by extracting from markdown content
 """
-import json
-import re
+from itertools import islice
+
+from catalog import Catalog
+
+HEADER_LINES = 10  # The date is looked for in this many lines at the top of the file
+
+def find_bold_date_in_lines(lines):
+    """Find a **Month DD, YYYY** date in the first lines of a markdown file"""
+    for line in lines[:HEADER_LINES]:
+        line = line.strip()
+
+        # Pattern: **Month DD, YYYY**
+        if line.startswith('**') and any(month in line for month in ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']):
+            date = line.strip('*').strip()
+            return date
+    return None
 
 def extract_date_from_markdown(md_filepath):
     """Extract date from markdown file"""
     try:
         with open(md_filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-            # Look for date in first 10 lines
-            for line in lines[:10]:
-                line = line.strip()
-
-                # Pattern: **Month DD, YYYY**
-                if line.startswith('**') and any(month in line for month in ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']):
-                    date = line.strip('*').strip()
-                    return date
+            return find_bold_date_in_lines(list(islice(f, HEADER_LINES)))
 
     except Exception as e:
         print(f"Error reading {md_filepath}: {e}")
@@ -27,13 +32,12 @@ def extract_date_from_markdown(md_filepath):
 def fix_jan_11_dates():
     """Fix articles with Jan 11, 2026 dates"""
 
-    # Load JSON
-    with open('data/blog.json', 'r') as f:
-        essays = json.load(f)
+    catalog = Catalog.for_writer('blog')
+    essays = catalog.with_date('Jan 11, 2026')
 
     fixed_count = 0
 
-    print(f"Checking {len(essays)} articles...\n")
+    print(f"Checking {len(essays)} articles dated Jan 11, 2026...\n")
 
     for essay in essays:
         if essay['date'] == 'Jan 11, 2026':
@@ -42,19 +46,16 @@ def fix_jan_11_dates():
 
             if extracted_date and extracted_date != 'Jan 11, 2026':
                 old_date = essay['date']
-                essay['date'] = extracted_date
+                catalog.update(essay, date=extracted_date)
                 fixed_count += 1
                 print(f"✓ Fixed: {essay['title'][:60]}")
                 print(f"  Changed: {old_date} → {extracted_date}\n")
 
-    # Write back
-    with open('data/blog.json', 'w') as f:
-        json.dump(essays, f, ensure_ascii=False, indent=4)
-
     print(f"\n✅ Fixed {fixed_count} articles with Jan 11, 2026 dates")
 
     # Check remaining
-    remaining = sum(1 for e in essays if e['date'] == 'Jan 11, 2026')
+    remaining = len(catalog.with_date('Jan 11, 2026'))
+    catalog.close()
     if remaining > 0:
         print(f"⚠️  {remaining} articles still have Jan 11, 2026")
     else:
@@ -2,22 +2,29 @@
 """
 Script to fix untitled articles and mark course advertisements.
 """
-import json
 import os
 import re
 
+from ad_detector import is_course_ad_title
+from catalog import Catalog
+
+def find_title_in_lines(lines):
+    """Find the first H1 title in the lines of a markdown file"""
+    for line in lines:
+        line = line.strip()
+        # Look for markdown H1 header
+        if line.startswith('# ') and len(line) > 2:
+            title = line[2:].strip()
+            # Skip if it looks like just metadata
+            if title and title.lower() not in ['untitled', 'title']:
+                return title
+    return None
+
 def extract_title_from_markdown(md_filepath):
     """Extract the first H1 title from a markdown file"""
     try:
         with open(md_filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # Look for markdown H1 header
-                if line.startswith('# ') and len(line) > 2:
-                    title = line[2:].strip()
-                    # Skip if it looks like just metadata
-                    if title and title.lower() not in ['untitled', 'title']:
-                        return title
+            return find_title_in_lines(f)
     except:
         pass
     return None
@@ -43,45 +50,24 @@ def extract_title_from_filename(filepath):
 
 def is_course_ad(essay):
     """Check if an article is a course advertisement"""
-    title_lower = essay['title'].lower()
-    patterns = [
-        'become an ai engineer',
-        'last chance to enroll',
-        'last call: enrollment',
-        'cohort-based course',
-        'cohort 2',
-        'cohort 3',
-    ]
-
-    # Check if title contains promotional language + cohort
-    has_promotion = any(p in title_lower for p in ['last chance', 'last call', 'new launch', '🚀'])
-    has_cohort = 'cohort' in title_lower or 'enroll' in title_lower
-
-    # It's an ad if it has both promotional language and cohort mentions
-    # OR if it exactly matches known patterns
-    if has_promotion and has_cohort:
-        return True
-
-    for pattern in patterns:
-        if pattern in title_lower:
-            return True
-
-    return False
-
-def fix_json_data(json_path):
-    """Fix untitled articles and mark course ads"""
-    print(f"Reading {json_path}...")
+    return is_course_ad_title(essay['title'])
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        essays = json.load(f)
+def fix_catalog(writer_name):
+    """Fix untitled articles and mark course ads"""
+    catalog = Catalog.for_writer(writer_name)
+    print(f"Reading {catalog.path}...")
 
+    essays = catalog.essays()
     print(f"Found {len(essays)} essays")
+    updates = []
 
     untitled_count = 0
     fixed_count = 0
     course_ad_count = 0
 
     for essay in essays:
+        fields = {}
+
         # Fix untitled articles
         if essay['title'] == 'Untitled':
             untitled_count += 1
@@ -95,24 +81,28 @@ def fix_json_data(json_path):
                 new_title = extract_title_from_filename(md_file)
 
             if new_title:
+                fields['title'] = new_title
                 essay['title'] = new_title
                 fixed_count += 1
                 print(f"  Fixed: {new_title}")
 
         # Mark course advertisements
-        if is_course_ad(essay):
-            essay['is_course_ad'] = True
+        course_ad = is_course_ad(essay)
+        if course_ad:
             course_ad_count += 1
             if not essay.get('is_sponsored'):  # Don't double-count
                 print(f"  Course ad: {essay['title']}")
-        else:
-            essay['is_course_ad'] = False
+        if essay.get('is_course_ad') is not course_ad:
+            fields['is_course_ad'] = course_ad
+
+        if fields:
+            updates.append((essay, fields))
 
-    # Write back to JSON
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(essays, f, ensure_ascii=False, indent=4)
+    # Only the changed entries are written
+    updated = catalog.update_many(updates)
+    catalog.close()
 
-    print(f"\n✓ Updated {json_path}")
+    print(f"\n✓ Updated {updated} entries in {catalog.path}")
     print(f"\nSummary:")
     print(f"  - Untitled articles found: {untitled_count}")
     print(f"  - Titles fixed: {fixed_count}")
@@ -121,5 +111,4 @@ def fix_json_data(json_path):
     return fixed_count, course_ad_count
 
 if __name__ == "__main__":
-    json_path = "data/blog.json"
-    fix_json_data(json_path)
+    fix_catalog("blog")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Record a few posts of a publication and replay them from a local stand-in server,
+so the scraper (including the --api JSON mode) can be run and checked offline.
+
+    python fixture_server.py record https://example.substack.com -n 5
+    python fixture_server.py serve
+    python substack_scraper.py --url http://localhost:8001/ --api
+
+A fixture directory mirrors the URL paths of the publication:
+    sitemap.xml              sitemap, with the publication's URL replaced by {{BASE_URL}}
+    p/<slug>.html            rendered post page
+    api/v1/posts/<slug>.json post from the JSON API (missing if the API didn't serve it)
+"""
+import argparse
+import http.server
+import os
+import socketserver
+import sys
+from urllib.parse import urlparse
+
+import requests
+
+from substack_scraper import BaseSubstackScraper
+
+FIXTURE_DIR = "fixtures/example"
+PORT = 8001
+BASE_URL_PLACEHOLDER = "{{BASE_URL}}"
+
+
+def save_fixture(fixture_dir, path, content):
+    """Write a fixture file, creating its directories"""
+    filepath = os.path.join(fixture_dir, path)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'wb') as f:
+        f.write(content)
+
+
+def record(base_url, fixture_dir, num_posts):
+    """Download the sitemap, pages and API responses of the first num_posts posts"""
+    base_url = base_url.rstrip('/') + '/'
+    session = requests.Session()
+
+    response = session.get(f"{base_url}sitemap.xml")
+    response.raise_for_status()
+    urls = [url for url in BaseSubstackScraper.parse_sitemap(response.content) if '/p/' in url][:num_posts]
+
+    # Only keep the recorded posts in the sitemap, pointing at whichever host serves the fixtures
+    locs = ''.join(f"<url><loc>{url.replace(base_url, BASE_URL_PLACEHOLDER)}</loc></url>" for url in urls)
+    sitemap = ('<?xml version="1.0" encoding="UTF-8"?>'
+               f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>')
+    save_fixture(fixture_dir, 'sitemap.xml', sitemap.encode('utf-8'))
+
+    for url in urls:
+        slug = urlparse(url).path.split('/p/')[-1].strip('/')
+        page = session.get(url)
+        if page.ok:
+            save_fixture(fixture_dir, f"p/{slug}.html", page.content)
+
+        api = session.get(BaseSubstackScraper.get_post_api_url(url))
+        if api.ok:
+            save_fixture(fixture_dir, f"api/v1/posts/{slug}.json", api.content)
+
+        print(f"✓ Recorded {slug} (page: {page.status_code}, api: {api.status_code})")
+
+    print(f"\n✅ Recorded {len(urls)} posts to {fixture_dir}")
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """Serves fixture files by URL path, trying .html and .json extensions"""
+    fixture_dir = FIXTURE_DIR
+
+    CONTENT_TYPES = {
+        '.xml': 'application/xml',
+        '.html': 'text/html; charset=utf-8',
+        '.json': 'application/json',
+    }
+
+    def do_GET(self):
+        path = urlparse(self.path).path.strip('/')
+        for candidate in (path, f"{path}.html", f"{path}.json"):
+            filepath = os.path.join(self.fixture_dir, candidate)
+            if candidate and os.path.isfile(filepath):
+                break
+        else:
+            self.send_error(404)
+            return
+
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        content = content.replace(BASE_URL_PLACEHOLDER.encode(), f"http://{self.headers['Host']}/".encode())
+
+        self.send_response(200)
+        self.send_header('Content-Type', self.CONTENT_TYPES.get(os.path.splitext(filepath)[1], 'text/plain'))
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def serve(fixture_dir, port):
+    """Serve a fixture directory until interrupted"""
+    if not os.path.isdir(fixture_dir):
+        print(f"Error: {fixture_dir} not found! Record fixtures first.")
+        sys.exit(1)
+
+    FixtureHandler.fixture_dir = fixture_dir
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer(("", port), FixtureHandler) as httpd:
+        print(f"📡 Serving {fixture_dir} at http://localhost:{port}/")
+        print(f"   python substack_scraper.py --url http://localhost:{port}/ --api")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Shutting down fixture server...")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and replay Substack fixtures.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record posts from a live publication.")
+    record_parser.add_argument("url", type=str, help="The base URL of the Substack site to record.")
+    record_parser.add_argument("-n", "--number", type=int, default=5, help="Number of posts to record.")
+    record_parser.add_argument("-d", "--directory", type=str, default=FIXTURE_DIR, help="Fixture directory.")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve recorded fixtures.")
+    serve_parser.add_argument("-d", "--directory", type=str, default=FIXTURE_DIR, help="Fixture directory.")
+    serve_parser.add_argument("-p", "--port", type=int, default=PORT, help="Port to serve on.")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.url, args.directory, args.number)
+    else:
+        serve(args.directory, args.port)
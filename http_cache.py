@@ -0,0 +1,337 @@
+"""
+On-disk HTTP cache with conditional GET.
+
+Response bodies are stored with their ETag / Last-Modified validators. When a URL is
+requested again, the cached validators are sent as If-None-Match / If-Modified-Since, and
+a 304 Not Modified answer is served from disk. The cache is bounded in size and evicts the
+least recently used entries first.
+
+Mount it on a requests Session with CachingAdapter (create_session(cache=...) in
+substack_scraper does this), so every fetch made through that session uses it. Streamed
+requests stay streamed: a downloaded body is written to the cache as the caller reads it, and
+a cached one is read from its file, so neither is ever held in memory whole.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import BinaryIO, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CACHE_DIR: str = ".http_cache"
+MAX_CACHE_BYTES: int = 512 * 1024 * 1024  # 512 MB
+INDEX_FLUSH_INTERVAL: int = 50  # Write the index to disk after this many new entries
+
+
+class HttpCache:
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.index_path: str = os.path.join(directory, "index.json")
+        self.lock: Lock = Lock()
+
+        # url -> {"file", "etag", "last_modified", "content_type", "size", "stored_at"}, least recently used first
+        self.entries: OrderedDict = OrderedDict()
+        self.total_bytes: int = 0
+        self.unsaved: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.bytes_saved: int = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.load_index()
+
+    def load_index(self) -> None:
+        """
+        Loads the index from disk, dropping entries whose body file has gone missing.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable cache index {self.index_path}: {e}")
+            return
+
+        for url, entry in entries:
+            if os.path.exists(os.path.join(self.directory, entry["file"])):
+                self.entries[url] = entry
+                self.total_bytes += entry["size"]
+
+    def flush(self) -> None:
+        """
+        Writes the index to disk, keeping the LRU order.
+        """
+        with self.lock:
+            entries = list(self.entries.items())
+            self.unsaved = 0
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(entries, file)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Gets the cache entry for a URL, if any.
+        """
+        with self.lock:
+            return self.entries.get(url)
+
+    def read_body(self, entry: dict) -> bytes:
+        """
+        Reads a cached body from disk.
+        """
+        with open(os.path.join(self.directory, entry["file"]), 'rb') as file:
+            return file.read()
+
+    def open_body(self, entry: dict) -> BinaryIO:
+        """
+        Opens a cached body on disk, for streaming it.
+        """
+        return open(os.path.join(self.directory, entry["file"]), 'rb')
+
+    @staticmethod
+    def is_cacheable(response: requests.Response) -> bool:
+        """
+        Checks that a 200 response carries a validator to revalidate it with later, and may be stored.
+        """
+        if not response.headers.get("ETag") and not response.headers.get("Last-Modified"):
+            return False
+        return "no-store" not in response.headers.get("Cache-Control", "")
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """
+        Stores a 200 response if it carries a validator to revalidate it with later.
+        """
+        if not self.is_cacheable(response):
+            return
+
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        self.add(url, response, tmp_path, len(content))
+
+    def store_streamed(self, url: str, response: requests.Response) -> None:
+        """
+        Stores a streamed 200 response as its body is read: the body goes to a temporary file
+        while the caller iterates over it, and is added to the cache once it was read to the end.
+        """
+        if self.is_cacheable(response):
+            response.raw = CachingReader(self, url, response)
+
+    def add(self, url: str, response: requests.Response, tmp_path: str, size: int) -> None:
+        """
+        Moves a body written to tmp_path into the cache as the entry for url.
+        """
+        filename = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        os.replace(tmp_path, os.path.join(self.directory, filename))
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        with self.lock:
+            old = self.entries.pop(url, None)
+            if old:
+                self.total_bytes -= old["size"]
+            self.entries[url] = {
+                "file": filename,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": response.headers.get("Content-Type", ""),
+                "size": size,
+                "stored_at": time(),
+            }
+            self.total_bytes += size
+            self.unsaved += 1
+            self.evict()
+            flush = self.unsaved >= INDEX_FLUSH_INTERVAL
+
+        if flush:
+            self.flush()
+
+    def evict(self) -> None:
+        """
+        Drops least recently used entries until the cache fits in max_bytes. Caller holds the lock.
+        """
+        while self.total_bytes > self.max_bytes and self.entries:
+            url, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry["size"]
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+
+    def record_hit(self, url: str, size: int) -> None:
+        """
+        Counts a revalidated (304) response and marks its entry as recently used.
+        """
+        with self.lock:
+            self.hits += 1
+            self.bytes_saved += size
+            if url in self.entries:
+                self.entries.move_to_end(url)
+
+    def record_miss(self) -> None:
+        with self.lock:
+            self.misses += 1
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        """
+        Summarises the cache's hits, misses and size.
+        """
+        return (
+            f"HTTP cache: {self.hits} hits / {self.misses} misses ({self.hit_rate():.0%} hit rate), "
+            f"{self.bytes_saved / 1024 / 1024:.1f} MB not re-downloaded, "
+            f"{len(self.entries)} entries using {self.total_bytes / 1024 / 1024:.1f} MB"
+        )
+
+
+class CachingReader:
+    """
+    Stands in for a streamed response's raw body, copying the chunks the caller reads to a
+    temporary file and adding it to the cache at the end of the body. A body read only in part,
+    read undecoded, or larger than the cache is dropped. Everything else goes to the raw body.
+    """
+
+    def __init__(self, cache: HttpCache, url: str, response: requests.Response):
+        self.cache: HttpCache = cache
+        self.url: str = url
+        self.response: requests.Response = response
+        self.raw = response.raw
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        self.file: Optional[BinaryIO] = os.fdopen(fd, 'wb')
+        self.size: int = 0
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        try:
+            for chunk in self.raw.stream(amt, decode_content=decode_content):
+                self.write(chunk)
+                yield chunk
+        except BaseException:
+            self.discard()
+            raise
+        self.commit()
+
+    def read(self, *args, **kwargs) -> bytes:
+        # Plain reads aren't decoded like the chunks of stream, so their body isn't cached
+        self.discard()
+        return self.raw.read(*args, **kwargs)
+
+    def write(self, chunk: bytes) -> None:
+        if self.file is None:
+            return
+        self.size += len(chunk)
+        if self.size > self.cache.max_bytes:
+            self.discard()
+            return
+        self.file.write(chunk)
+
+    def commit(self) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        self.cache.add(self.url, self.response, self.tmp_path, self.size)
+
+    def discard(self) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self.discard()
+        self.raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Transport adapter that revalidates GET requests against an HttpCache.
+    """
+
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache: HttpCache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        entry = self.cache.lookup(request.url)
+        if entry:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            try:
+                cached = self.build_cached_response(request, response, entry, kwargs.get("stream", False))
+            except OSError:
+                cached = None
+            if cached is not None:
+                self.cache.record_hit(request.url, entry["size"])
+                return cached
+
+        self.cache.record_miss()
+        if response.status_code == 200:
+            if kwargs.get("stream"):
+                self.cache.store_streamed(request.url, response)
+            else:
+                self.cache.store(request.url, response)
+        return response
+
+    def build_cached_response(
+        self, request, not_modified: requests.Response, entry: dict, stream: bool = False
+    ) -> requests.Response:
+        """
+        Turns a 304 answer into a 200 response carrying the cached body, streamed from its file for streamed requests.
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(not_modified.headers)
+        if entry["content_type"]:
+            response.headers["Content-Type"] = entry["content_type"]
+        response.headers.pop("Content-Length", None)
+        if stream:
+            response.raw = self.cache.open_body(entry)
+        else:
+            body = self.cache.read_body(entry)
+            response._content = body
+            # Mark the body as read, so it isn't read again from raw
+            response._content_consumed = True
+            response.raw = io.BytesIO(body)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        not_modified.close()
+        return response
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Single-pass catalog maintenance.
+
+Runs the fixes of fix_dates.py, fix_jan_11_dates.py, fix_titles_and_ads.py,
+update_sponsored_flags.py, tag_remaining.py and remove_duplicates.py as passes of one
+command. The catalog is read once, each essay's markdown file is read at most once (only its
+first lines when no pass needs more), every pass runs over that one read, essays are
+processed in parallel, and all changes are written to the catalog in a single transaction.
+The sponsored pass only scans the posts the scraper didn't classify, streaming their files
+unless another pass reads them too, in which case the file is read whole once for both. The
+duplicates passes hash and shingle the bodies they need during that one read: the duplicates
+pass the posts that may end up sharing a title and date, the near-duplicates pass the posts
+missing from the signature cache. They then compare the remaining posts without opening any
+file again; near-duplicates are reported, or removed with --remove-near-duplicates. With
+--dry-run nothing is written, not even the signature cache. Prints how long each pass took.
+
+    python maintain_catalog.py                          # every pass, on data/blog.db
+    python maintain_catalog.py --remove-near-duplicates # remove near-duplicates instead of reporting them
+    python maintain_catalog.py --passes dates,tags      # only some passes, in the given order
+    python maintain_catalog.py --dry-run                # report what would change
+"""
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ad_detector import find_sponsored, sponsored_fields
+from catalog import Catalog
+from fix_dates import HEADER_LINES as DATE_LINES, file_date, find_date_in_lines
+from fix_jan_11_dates import find_bold_date_in_lines
+from fix_titles_and_ads import extract_title_from_filename, find_title_in_lines, is_course_ad
+from near_duplicates import Signature, SignatureCache, Stamp, file_stamp, minhash
+from remove_duplicates import (
+    duplicate_date, duplicate_title, find_duplicates, find_near_duplicates, group_duplicates, mark_duplicates,
+    print_duplicates, text_digest
+)
+from tagging import extract_tags
+from update_sponsored_flags import check_if_sponsored
+
+HEADER: str = "header"  # A pass needs the first HEADER_LINES lines of the markdown file
+FULL: str = "full"  # A pass needs the whole markdown file
+STREAM: str = "stream"  # A pass scans the whole file, streaming it itself unless another pass reads it
+HEADER_LINES: int = DATE_LINES  # Lines read from the top of a file when no pass needs all of it
+MAINTENANCE_WORKERS: int = 8  # Essays processed concurrently
+ANY: object = object()  # Stands for a title or date a pass may still change, when predicting duplicate groups
+
+
+class MarkdownFile:
+    """
+    An essay's markdown file, read once: only its first HEADER_LINES lines, or all of it.
+    """
+
+    def __init__(self, path: str, full: bool):
+        self.path: str = path
+        self.text: Optional[str] = None  # The whole file, if it was read in full
+        self.header: List[str] = []
+        self.error: Optional[str] = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if full:
+                    self.text = f.read()
+                else:
+                    self.header = list(islice(f, HEADER_LINES))
+        except Exception as e:
+            self.error = str(e)
+
+    @property
+    def lines(self) -> List[str]:
+        """
+        The lines read: all of them for a full read, the first HEADER_LINES otherwise.
+        """
+        if self.text is not None:
+            return self.text.split("\n")
+        return self.header
+
+
+class MaintenancePass:
+    """
+    One fix applied to the catalog. start is called once with every essay and every pass before
+    the runs. run is called for each essay the pass applies to, with the fields earlier passes
+    changed already set, and returns the fields to change. finish is called once with every
+    essay after all runs, and returns the essays to remove.
+    """
+    name: str = ""
+    fields: Tuple[str, ...] = ()  # Fields run may change
+
+    def __init__(self, writer: str = "blog"):
+        self.writer: str = writer
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "MaintenancePass":
+        """
+        Creates the pass from the command line arguments.
+        """
+        return cls(args.writer)
+
+    def start(self, essays: List[Dict], passes: List["MaintenancePass"]) -> None:
+        pass
+
+    def applies(self, essay: Dict) -> bool:
+        return False
+
+    def changes(self, essay: Dict) -> Set[str]:
+        """
+        The fields run may change for an essay.
+        """
+        return set(self.fields) if self.applies(essay) else set()
+
+    def reads(self, essay: Dict) -> Optional[str]:
+        """
+        How much of the essay's markdown file run needs: None, HEADER, FULL or STREAM.
+        """
+        return None
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        return {}
+
+    def finish(self, essays: List[Dict]) -> List[Dict]:
+        return []
+
+
+class DatesPass(MaintenancePass):
+    """
+    fix_dates.py and fix_jan_11_dates.py: finds the date in the file for essays without one,
+    or dated Jan 11, 2026 from file metadata.
+    """
+    name = "dates"
+    fields = ('date',)
+
+    def applies(self, essay: Dict) -> bool:
+        return essay.get('date') in ('Date not found', 'Jan 11, 2026')
+
+    def reads(self, essay: Dict) -> Optional[str]:
+        return HEADER
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        if document.error:
+            print(f"⚠️  Can't read {document.path}: {document.error}")
+            return {}
+        if essay['date'] == 'Date not found':
+            return {'date': find_date_in_lines(document.lines) or file_date(document.path)}
+        date = find_bold_date_in_lines(document.lines)
+        return {'date': date} if date and date != essay['date'] else {}
+
+
+class TitlesPass(MaintenancePass):
+    """
+    fix_titles_and_ads.py: titles untitled essays from their H1 (or file name), and flags course ads.
+    """
+    name = "titles"
+    fields = ('title', 'is_course_ad')
+
+    def applies(self, essay: Dict) -> bool:
+        return True
+
+    def changes(self, essay: Dict) -> Set[str]:
+        return set(self.fields) if essay.get('title') == 'Untitled' else {'is_course_ad'}
+
+    def reads(self, essay: Dict) -> Optional[str]:
+        return FULL if essay.get('title') == 'Untitled' else None
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        fields = {}
+        if essay['title'] == 'Untitled':
+            title = find_title_in_lines(document.lines) if document and not document.error else None
+            fields['title'] = title or extract_title_from_filename(essay['file_link'])
+        course_ad = is_course_ad({**essay, **fields})
+        if essay.get('is_course_ad') is not course_ad:
+            fields['is_course_ad'] = course_ad
+        return fields
+
+
+class SponsoredPass(MaintenancePass):
+    """
+    update_sponsored_flags.py: flags essays whose markdown has sponsored content. Essays the
+    scraper classified as it saved them are skipped, others are scanned once: the file read for
+    every pass when there is one, or else streamed.
+    """
+    name = "sponsored"
+    fields = ('is_sponsored', 'sponsored_line')
+
+    def applies(self, essay: Dict) -> bool:
+        return 'sponsored_line' not in essay
+
+    def reads(self, essay: Dict) -> Optional[str]:
+        return STREAM
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        if document is not None and document.text is not None:
+            return sponsored_fields(find_sponsored(document.text))
+        return sponsored_fields(check_if_sponsored(essay['file_link']))
+
+
+class TagsPass(MaintenancePass):
+    """
+    tag_remaining.py: tags untagged essays from their title and subtitle.
+    """
+    name = "tags"
+    fields = ('tags',)
+
+    def applies(self, essay: Dict) -> bool:
+        return not essay.get('tags')
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        return {'tags': extract_tags(essay['title'], essay.get('subtitle', ''))}
+
+
+class DuplicatesPass(MaintenancePass):
+    """
+    remove_duplicates.py: removes all but the best entry of essays with the same title, date and
+    body, recording each as a duplicate of the one kept. The bodies of the essays that may share a
+    title and date once every pass ran are hashed as their files are read for the runs.
+    """
+    name = "duplicates"
+
+    def __init__(self, writer: str = "blog"):
+        super().__init__(writer)
+        self.candidates: Set[str] = set()  # file_links of the essays whose body is hashed
+        self.digests: Dict[str, Optional[str]] = {}  # file_link -> body digest, None when unreadable
+
+    def start(self, essays: List[Dict], passes: List[MaintenancePass]) -> None:
+        # The (title, date) each essay ends up grouped by, with ANY for a field a pass may change
+        keys = {}
+        for essay in essays:
+            changing = set().union(*(maintenance_pass.changes(essay) for maintenance_pass in passes))
+            title = ANY if 'title' in changing else duplicate_title(essay)
+            date = ANY if 'date' in changing else duplicate_date(essay)
+            if title and date:
+                keys[essay.get('file_link', '')] = (title, date)
+
+        pairs = Counter(keys.values())
+        titles = Counter(title for title, _ in keys.values())
+        dates = Counter(date for _, date in keys.values())
+        for file_link, (title, date) in keys.items():
+            # Counts include the essay itself, so each check looks for another essay it may match
+            if title is ANY and date is ANY:
+                may_match = len(keys) > 1
+            elif title is ANY:
+                may_match = dates[date] + dates[ANY] > 1
+            elif date is ANY:
+                may_match = titles[title] + titles[ANY] > 1
+            else:
+                may_match = (pairs[(title, date)] + pairs[(title, ANY)] + pairs[(ANY, date)] + pairs[(ANY, ANY)]) > 1
+            if may_match:
+                self.candidates.add(file_link)
+
+    def applies(self, essay: Dict) -> bool:
+        return essay.get('file_link', '') in self.candidates
+
+    def reads(self, essay: Dict) -> Optional[str]:
+        return FULL
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        self.digests[essay.get('file_link', '')] = text_digest(document.text) if document.text is not None else None
+        return {}
+
+    def finish(self, essays: List[Dict]) -> List[Dict]:
+        return mark_duplicates(find_duplicates(group_duplicates(essays, self.digests)))
+
+
+class NearDuplicatesPass(MaintenancePass):
+    """
+    remove_duplicates.py: reports essays whose markdown is nearly the same, by MinHash signature
+    from the writer's signature cache. Essays missing from the cache are shingled as their files
+    are read for the runs. With remove, all but the best entry of each cluster are removed and
+    recorded as duplicates of it.
+    """
+    name = "near-duplicates"
+
+    def __init__(self, writer: str = "blog", remove: bool = False, dry_run: bool = False):
+        super().__init__(writer)
+        self.remove: bool = remove
+        self.dry_run: bool = dry_run  # Use the signature cache without writing it
+        self.cache: Optional[SignatureCache] = None
+        self.stamps: Dict[str, Stamp] = {}
+        self.stored: Dict[str, Optional[Signature]] = {}  # file_link -> signature from the cache
+        self.computed: Dict[str, Optional[Signature]] = {}  # file_link -> signature computed by run
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "NearDuplicatesPass":
+        return cls(args.writer, remove=args.remove_near_duplicates, dry_run=args.dry_run)
+
+    def start(self, essays: List[Dict], passes: List[MaintenancePass]) -> None:
+        self.cache = SignatureCache.for_writer(self.writer, read_only=self.dry_run)
+        for essay in essays:
+            stamp = file_stamp(essay.get('file_link', ''))
+            if stamp is not None:
+                self.stamps[essay['file_link']] = stamp
+        self.stored = self.cache.load(self.stamps)
+
+    def applies(self, essay: Dict) -> bool:
+        file_link = essay.get('file_link', '')
+        return file_link in self.stamps and file_link not in self.stored
+
+    def reads(self, essay: Dict) -> Optional[str]:
+        return FULL
+
+    def run(self, essay: Dict, document: Optional[MarkdownFile]) -> Dict[str, Any]:
+        self.computed[essay['file_link']] = minhash(document.text) if document.text is not None else None
+        return {}
+
+    def finish(self, essays: List[Dict]) -> List[Dict]:
+        with self.cache:
+            self.cache.store((path, self.stamps[path], signature) for path, signature in self.computed.items())
+            self.cache.hits += len(self.stored)
+            self.cache.misses += len(self.computed)
+            print(f"🔍 {self.cache.report()}\n")
+        signatures = {path: signature for path, signature in {**self.stored, **self.computed}.items()
+                      if signature is not None}
+        near_duplicates = find_near_duplicates(essays, signatures)
+        print_duplicates(near_duplicates, "Near-duplicate", "Removing" if self.remove else "Similar")
+        return mark_duplicates(near_duplicates) if self.remove else []
+
+
+# Every pass, in the order they run by default
+PASSES: Dict[str, type] = {
+    maintenance_pass.name: maintenance_pass
+    for maintenance_pass in (DatesPass, TitlesPass, SponsoredPass, TagsPass, DuplicatesPass, NearDuplicatesPass)
+}
+
+PassStats = Dict[str, List[float]]  # Pass name -> [essays run on, essays changed, seconds]
+
+
+def process_essay(essay: Dict, passes: List[MaintenancePass]) -> Tuple[Dict[str, Any], PassStats]:
+    """
+    Runs the passes over one essay, reading its markdown file once if any of them needs it.
+    A streaming pass gets the whole file when another pass reads it, so it isn't opened twice.
+    Returns the fields to change and the pass stats for this essay.
+    """
+    stats: PassStats = {}
+    active = [maintenance_pass for maintenance_pass in passes if maintenance_pass.applies(essay)]
+    if not active:
+        return {}, stats
+
+    reads = {maintenance_pass.reads(essay) for maintenance_pass in active}
+    document = None
+    if reads & {HEADER, FULL}:
+        start = perf_counter()
+        full = FULL in reads or STREAM in reads
+        document = MarkdownFile(essay.get('file_link', ''), full=full)
+        stats["read"] = [1, 0, perf_counter() - start]
+
+    current = dict(essay)
+    fields = {}
+    for maintenance_pass in active:
+        if not maintenance_pass.applies(current):
+            continue
+        start = perf_counter()
+        changes = maintenance_pass.run(current, document)
+        stats[maintenance_pass.name] = [1, int(bool(changes)), perf_counter() - start]
+        current.update(changes)
+        fields.update(changes)
+    return fields, stats
+
+
+def maintain(
+    catalog: Catalog, passes: List[MaintenancePass], workers: int = MAINTENANCE_WORKERS, dry_run: bool = False
+) -> Tuple[int, int, PassStats]:
+    """
+    Runs the passes over every essay of the catalog and writes all their changes at once.
+    Returns (essays updated, essays removed, stats per pass).
+    """
+    essays = catalog.essays()
+    totals: PassStats = {name: [0, 0, 0.0] for name in ["read"] + [p.name for p in passes]}
+
+    for maintenance_pass in passes:
+        start = perf_counter()
+        maintenance_pass.start(essays, passes)
+        totals[maintenance_pass.name][2] += perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(lambda essay: process_essay(essay, passes), essays))
+
+    updates = []
+    for essay, (fields, stats) in zip(essays, results):
+        for name, values in stats.items():
+            totals[name] = [total + value for total, value in zip(totals[name], values)]
+        if fields:
+            updates.append((essay, fields))
+            essay.update(fields)
+
+    removals = []
+    for maintenance_pass in passes:
+        if type(maintenance_pass).finish is MaintenancePass.finish:
+            continue
+        start = perf_counter()
+        totals[maintenance_pass.name][0] = max(totals[maintenance_pass.name][0], len(essays))
+        removed = maintenance_pass.finish(essays)
+        if removed:
+            removals.extend(removed)
+            totals[maintenance_pass.name][1] += len(removed)
+            removed_ids = {id(essay) for essay in removed}
+            essays = [essay for essay in essays if id(essay) not in removed_ids]
+        totals[maintenance_pass.name][2] += perf_counter() - start
+
+    if dry_run:
+        return len(updates), len(removals), totals
+    updated, removed = catalog.apply(updates, removals)
+    return updated, removed, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the catalog maintenance passes in one pass over the essays.")
+    parser.add_argument("--writer", type=str, default="blog", help="Writer whose catalog to maintain. Default: blog")
+    parser.add_argument("--passes", type=str, default=",".join(PASSES),
+                        help=f"Comma-separated passes to run, in order. Default: {','.join(PASSES)}")
+    parser.add_argument("-w", "--workers", type=int, default=MAINTENANCE_WORKERS,
+                        help=f"Essays processed concurrently. Default: {MAINTENANCE_WORKERS}")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them.")
+    parser.add_argument("--remove-near-duplicates", action="store_true",
+                        help="Remove near-duplicates instead of only reporting them.")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.passes.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PASSES]
+    if unknown:
+        parser.error(f"unknown passes: {', '.join(unknown)} (choose from {', '.join(PASSES)})")
+    passes = [PASSES[name].from_args(args) for name in names]
+
+    start = perf_counter()
+    with Catalog.for_writer(args.writer) as catalog:
+        print(f"🔧 Maintaining {len(catalog)} essays in {catalog.path}: {', '.join(names)}\n")
+        updated, removed, totals = maintain(catalog, passes, args.workers, args.dry_run)
+
+    print(f"{'pass':<16}{'essays':>8}{'changed':>9}{'seconds':>9}")
+    for name, (count, changed, seconds) in totals.items():
+        print(f"{name:<16}{count:>8.0f}{changed:>9.0f}{seconds:>9.3f}")
+    action = "Would update {} essays and remove {}" if args.dry_run else "Updated {} essays and removed {}"
+    print(f"\n✅ {action.format(updated, removed)} in {perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
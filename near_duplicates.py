@@ -0,0 +1,231 @@
+"""
+Near-duplicate detection of posts with MinHash signatures and locality-sensitive hashing.
+
+A post's markdown body is lowercased, split into words and shingled into overlapping runs of
+SHINGLE_WORDS words. Its signature is a one-permutation MinHash of those shingles: every
+shingle is hashed once (CRC-32), the hashes are spread over NUM_BINS bins, and each bin keeps
+its smallest hash (empty bins of short posts borrow the next bin's, rotated). Two signatures
+agree in about as many bins as the share of shingles the posts have in common (their Jaccard
+similarity). LSH splits each signature into BANDS bands, and only posts with an identical band
+are compared, so finding the similar pairs among n posts takes about n bucket lookups instead
+of n^2 comparisons. Posts whose signatures agree in at least the similarity threshold's share
+of bins with every other member of a cluster are grouped into it.
+
+Signatures are stored in a SQLite file per writer, keyed by markdown file and invalidated by
+its modification time and size, so each version of a post is shingled once. Missing
+signatures are computed in a pool of processes. A read-only cache uses the stored signatures
+but never creates or writes the file.
+"""
+import os
+import sqlite3
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+SHINGLE_WORDS: int = 5  # Words per shingle
+NUM_BINS: int = 128  # Signature length. Similarity estimates are within about 0.04 of the true one
+BANDS: int = 16  # LSH bands of NUM_BINS // BANDS bins: pairs from about 0.7 similar on become candidates
+SIMILARITY_THRESHOLD: float = 0.8  # Share of agreeing bins above which two posts are near-duplicates
+SIGNATURE_VERSION: int = 1  # Bump when shingling or hashing changes, so cached signatures are recomputed
+SIGNATURE_DIR: str = "data"
+SIGNATURE_PROCESSES: int = os.cpu_count() or 1  # Default pool size for missing signatures
+SIGNATURE_CHUNKSIZE: int = 32  # Files sent to a pool process at a time
+ROTATION: int = 0x9E3779B1  # Added per bin an empty bin's borrowed hash travelled
+
+Signature = array  # array('I') of NUM_BINS hashes
+Stamp = Tuple[int, int]  # (modification time in ns, size) of a markdown file
+
+
+def minhash(text: str) -> Optional[Signature]:
+    """
+    Computes the MinHash signature of a text, or None if it has no words.
+    """
+    words = text.lower().encode('utf-8').split()
+    if not words:
+        return None
+    shingles = zip(*(words[i:] for i in range(min(SHINGLE_WORDS, len(words)))))
+    signature: List[Optional[int]] = [None] * NUM_BINS
+    left = NUM_BINS
+    # In increasing order, the first hash of each bin is its smallest
+    for shingle_hash in sorted(map(zlib.crc32, map(b" ".join, shingles))):
+        bin_index = shingle_hash % NUM_BINS
+        if signature[bin_index] is None:
+            signature[bin_index] = shingle_hash
+            left -= 1
+            if not left:
+                break
+
+    if left:
+        # Densify: an empty bin takes the hash of the next filled bin, rotated by the distance
+        filled = list(signature)
+        for bin_index in range(NUM_BINS):
+            distance = 1
+            while signature[bin_index] is None:
+                borrowed = filled[(bin_index + distance) % NUM_BINS]
+                if borrowed is not None:
+                    signature[bin_index] = (borrowed + distance * ROTATION) & 0xFFFFFFFF
+                distance += 1
+    return array('I', signature)
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    """
+    Computes the MinHash signature of a markdown file, or None if it can't be read or is empty.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return minhash(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def file_stamp(path: str) -> Optional[Stamp]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """
+    Estimates the Jaccard similarity of two posts' shingles: the share of bins their signatures agree in.
+    """
+    return sum(x == y for x, y in zip(a, b)) / NUM_BINS
+
+
+def find_clusters(
+    signatures: Dict[Hashable, Signature], threshold: float = SIMILARITY_THRESHOLD, bands: int = BANDS
+) -> List[List[Hashable]]:
+    """
+    Groups keys whose signatures are at least threshold similar to each other, through LSH buckets.
+    A cluster starts from its first key and only takes in candidates at least threshold similar to
+    every member, so a run of gradually edited posts doesn't chain into one cluster.
+    Returns the clusters of more than one key, each in the order of signatures.
+    """
+    keys = list(signatures)
+    blobs = [signatures[key].tobytes() for key in keys]
+    band_bytes = NUM_BINS // bands * signatures[keys[0]].itemsize if keys else 0
+    neighbours: Dict[int, Set[int]] = {}  # Key index -> indexes of the candidates it is similar to
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        start = band * band_bytes
+        for index, blob in enumerate(blobs):
+            buckets.setdefault(blob[start:start + band_bytes], []).append(index)
+        for members in buckets.values():
+            for a, b in combinations(members, 2):
+                if b not in neighbours.get(a, ()) and similarity(signatures[keys[a]], signatures[keys[b]]) >= threshold:
+                    neighbours.setdefault(a, set()).add(b)
+                    neighbours.setdefault(b, set()).add(a)
+
+    clusters = []
+    clustered: Set[int] = set()
+    for index in sorted(neighbours):
+        if index in clustered:
+            continue
+        cluster = [index]
+        for candidate in sorted(neighbours[index] - clustered):
+            if all(similarity(signatures[keys[candidate]], signatures[keys[member]]) >= threshold
+                   for member in cluster[1:]):
+                cluster.append(candidate)
+        if len(cluster) > 1:
+            clustered.update(cluster)
+            clusters.append([keys[member] for member in cluster])
+    return clusters
+
+
+class SignatureCache:
+    """
+    Signatures of a writer's markdown files, stored in SQLite and kept while a file is unchanged.
+    A read_only cache reads an existing file and computes the rest without storing them.
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path: str = path
+        self.read_only: bool = read_only
+        self.connection: Optional[sqlite3.Connection] = None
+        if read_only:
+            if os.path.exists(path):
+                self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30.0)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(path, timeout=30.0)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, version INTEGER, signature BLOB)"
+            )
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @classmethod
+    def for_writer(cls, writer_name: str, directory: str = SIGNATURE_DIR, read_only: bool = False) -> "SignatureCache":
+        """
+        Opens the signature cache kept next to a writer's catalog.
+        """
+        return cls(os.path.join(directory, f"{writer_name}.signatures.db"), read_only)
+
+    def load(self, stamps: Dict[str, Stamp]) -> Dict[str, Optional[Signature]]:
+        """
+        Gets the stored signatures of the files whose stamp is unchanged.
+        """
+        signatures = {}
+        if self.connection is None:
+            return signatures
+        rows = self.connection.execute("SELECT path, mtime_ns, size, version, signature FROM signatures")
+        for path, mtime_ns, size, version, blob in rows:
+            if version == SIGNATURE_VERSION and stamps.get(path) == (mtime_ns, size):
+                signatures[path] = array('I', blob) if blob is not None else None
+        return signatures
+
+    def store(self, signatures: Iterable[Tuple[str, Stamp, Optional[Signature]]]) -> None:
+        """
+        Stores (path, stamp, signature) entries, in one transaction. A read-only cache stores nothing.
+        """
+        if self.read_only:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO signatures (path, mtime_ns, size, version, signature) VALUES (?, ?, ?, ?, ?)",
+                ((path, *stamp, SIGNATURE_VERSION, signature.tobytes() if signature is not None else None)
+                 for path, stamp, signature in signatures)
+            )
+
+    def signatures(self, paths: Iterable[str], processes: int = SIGNATURE_PROCESSES) -> Dict[str, Signature]:
+        """
+        Gets the signatures of markdown files: stored ones when the file is unchanged, the others
+        computed across a pool of processes and stored. Missing and empty files are left out.
+        """
+        stamps = {path: stamp for path, stamp in ((path, file_stamp(path)) for path in paths) if stamp is not None}
+        signatures = self.load(stamps)
+        missing = [path for path in stamps if path not in signatures]
+        self.hits += len(signatures)
+        self.misses += len(missing)
+
+        if processes <= 1 or len(missing) <= SIGNATURE_CHUNKSIZE:
+            computed = [file_signature(path) for path in missing]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                computed = list(executor.map(file_signature, missing, chunksize=SIGNATURE_CHUNKSIZE))
+        self.store((path, stamps[path], signature) for path, signature in zip(missing, computed))
+
+        signatures.update(zip(missing, computed))
+        return {path: signature for path, signature in signatures.items() if signature is not None}
+
+    def report(self) -> str:
+        stored = " (read-only)" if self.read_only else ""
+        return f"Signature cache {self.path}{stored}: {self.hits} reused, {self.misses} computed"
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+    def __enter__(self) -> "SignatureCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,97 @@
+"""
+Compressed, append-only archive of fetched pages.
+
+Every page the scraper fetches (the post's HTML, or its JSON API response) is appended to
+archive/<writer>.pages.gz as its own gzip member, and a line recording its URL, kind, fetch
+time, sitemap lastmod and byte range is appended to archive/<writer>.index.jsonl. Like a
+WARC file, the archive is only ever appended to, and any record can be read back on its own
+by seeking to its offset. `--from-archive` re-runs extraction and conversion from the latest
+record of every post without touching the network.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+ARCHIVE_DIR: str = "archive"
+COMPRESS_LEVEL: int = 6  # gzip level; pages are written once and read rarely
+
+ArchiveKey = Tuple[str, str]  # (post url, kind), kind being "page" or "api"
+
+
+class PageArchive:
+    def __init__(self, data_path: str, index_path: str):
+        self.data_path: str = data_path
+        self.index_path: str = index_path
+        self.lock: Lock = Lock()
+        self.latest: Dict[ArchiveKey, dict] = {}  # Newest index entry of every (url, kind)
+        self.load_index()
+
+    @classmethod
+    def for_writer(cls, writer_name: str, directory: str = ARCHIVE_DIR) -> "PageArchive":
+        """
+        Opens the archive of a writer's pages.
+        """
+        return cls(
+            os.path.join(directory, f"{writer_name}.pages.gz"),
+            os.path.join(directory, f"{writer_name}.index.jsonl")
+        )
+
+    def load_index(self) -> None:
+        """
+        Loads the index, skipping a torn last line and records past the end of the data file.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        with open(self.index_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry["offset"] + entry["length"] <= data_size:
+                    self.latest[(entry["url"], entry["kind"])] = entry
+
+    def append(self, url: str, content: bytes, kind: str = "page", lastmod: Optional[str] = None) -> None:
+        """
+        Compresses a fetched page into the archive and indexes it.
+        """
+        member = gzip.compress(content, compresslevel=COMPRESS_LEVEL)
+        entry = {
+            "url": url,
+            "kind": kind,
+            "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "lastmod": lastmod,
+            "length": len(member),
+        }
+        with self.lock:
+            directory = os.path.dirname(self.data_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.data_path, 'ab') as data:
+                entry["offset"] = data.tell()
+                data.write(member)
+            # The index line goes last, so a crash never indexes a partly written record
+            with open(self.index_path, 'a', encoding='utf-8') as index:
+                index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.latest[(url, kind)] = entry
+
+    def read(self, url: str, kind: str = "page") -> Optional[bytes]:
+        """
+        Reads the most recently archived record of a URL, or None if it was never archived.
+        """
+        entry = self.latest.get((url, kind))
+        if entry is None:
+            return None
+        with open(self.data_path, 'rb') as data:
+            data.seek(entry["offset"])
+            return gzip.decompress(data.read(entry["length"]))
+
+    def entries(self) -> List[dict]:
+        """
+        Gets the newest entry of every archived record, in the order the records were first archived.
+        """
+        return list(self.latest.values())
@@ -0,0 +1,223 @@
+"""
+Adaptive per-host rate limiting shared by all fetch paths.
+
+AdaptiveRateLimiter keeps a token bucket per host. Every healthy response nudges the host's
+rate up (additive increase) until max_rate; a 429 or 503 halves it (multiplicative decrease)
+and honours Retry-After by pausing the host. RateLimitedAdapter applies the limiter to a
+requests Session and retries throttled or failed requests with jittered exponential backoff;
+the premium browser and the asyncio engine call acquire() / acquire_async() directly.
+"""
+import asyncio
+import random
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from threading import Lock
+from time import monotonic, sleep
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+INITIAL_RATE: float = 4.0  # Requests per second per host to start with
+MIN_RATE: float = 0.2
+MAX_RATE: float = 20.0
+RATE_INCREASE: float = 0.1  # Added to a host's rate after every healthy response
+RATE_DECREASE: float = 0.5  # Multiplied into a host's rate after a throttled response
+DECREASE_COOLDOWN: float = 1.0  # Seconds; a burst of throttled responses only backs the rate off once
+MAX_RETRIES: int = 4
+BACKOFF_BASE: float = 1.0  # Seconds; doubled with every retry before jitter
+BACKOFF_CAP: float = 60.0
+THROTTLE_STATUSES = (429, 503)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class HostState:
+    rate: float
+    tokens: float = 1.0
+    updated: float = field(default_factory=monotonic)
+    paused_until: float = 0.0
+    decreased_at: float = 0.0
+    lock: Lock = field(default_factory=Lock)
+
+    requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    waited: float = 0.0
+    started: float = field(default_factory=monotonic)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header given either in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Full-jitter exponential backoff, never shorter than the server's Retry-After.
+    """
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        initial_rate: float = INITIAL_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        increase: float = RATE_INCREASE,
+        decrease: float = RATE_DECREASE
+    ):
+        self.initial_rate: float = min(initial_rate, max_rate)
+        self.min_rate: float = min_rate
+        self.max_rate: float = max_rate
+        self.increase: float = increase
+        self.decrease: float = decrease
+        self.hosts: Dict[str, HostState] = {}
+        self.lock: Lock = Lock()
+
+    def host_state(self, host: str) -> HostState:
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostState(rate=self.initial_rate)
+            return self.hosts[host]
+
+    def reserve(self, host: str) -> float:
+        """
+        Takes a token for host and returns how long the caller has to wait before using it.
+        Tokens may go negative, which queues later callers behind earlier ones.
+        """
+        state = self.host_state(host)
+        with state.lock:
+            now = monotonic()
+            state.tokens = min(1.0, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            state.tokens -= 1
+            wait = max(state.paused_until - now, -state.tokens / state.rate if state.tokens < 0 else 0.0)
+            state.requests += 1
+            state.waited += wait
+            return wait
+
+    def acquire(self, host: str) -> None:
+        """
+        Blocks until a request to host may be sent.
+        """
+        wait = self.reserve(host)
+        if wait > 0:
+            sleep(wait)
+
+    async def acquire_async(self, host: str) -> None:
+        """
+        Waits on the event loop until a request to host may be sent.
+        """
+        wait = self.reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self, host: str) -> None:
+        """
+        Ramps the host's rate up after a healthy response.
+        """
+        state = self.host_state(host)
+        with state.lock:
+            state.rate = min(self.max_rate, state.rate + self.increase)
+
+    def on_throttle(self, host: str, retry_after: Optional[float] = None) -> None:
+        """
+        Backs the host's rate off after a 429/503, pausing it for Retry-After seconds if given.
+        """
+        state = self.host_state(host)
+        with state.lock:
+            now = monotonic()
+            state.throttled += 1
+            # Requests already in flight when the first 429 arrived answer with 429s too; count them once
+            if now - state.decreased_at >= DECREASE_COOLDOWN:
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                state.decreased_at = now
+            if retry_after:
+                state.paused_until = max(state.paused_until, now + retry_after)
+
+    def on_retry(self, host: str) -> None:
+        state = self.host_state(host)
+        with state.lock:
+            state.retries += 1
+
+    def on_response(self, host: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        """
+        Feeds a response status back into the host's rate.
+        """
+        if status_code in THROTTLE_STATUSES or (retry_after and status_code >= 400):
+            self.on_throttle(host, retry_after)
+        elif status_code < 500:
+            self.on_success(host)
+
+    def report(self) -> str:
+        """
+        Summarises throughput and throttling per host.
+        """
+        lines = []
+        for host, state in sorted(self.hosts.items()):
+            elapsed = monotonic() - state.started
+            throughput = state.requests / elapsed if elapsed > 0 else 0.0
+            lines.append(
+                f"Rate limiter {host}: {state.requests} requests ({throughput:.2f}/sec), "
+                f"{state.throttled} throttled, {state.retries} retries, "
+                f"{state.waited:.1f}s waited, rate now {state.rate:.2f}/sec"
+            )
+        return "\n".join(lines) if lines else "Rate limiter: no requests"
+
+
+class RateLimitedAdapter(BaseAdapter):
+    """
+    Transport adapter that rate limits another adapter per host and retries throttled requests.
+    """
+
+    def __init__(self, limiter: AdaptiveRateLimiter, inner: BaseAdapter, max_retries: int = MAX_RETRIES):
+        super().__init__()
+        self.limiter: AdaptiveRateLimiter = limiter
+        self.inner: BaseAdapter = inner
+        self.max_retries: int = max_retries
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).netloc
+        attempt = 0
+        while True:
+            self.limiter.acquire(host)
+            try:
+                response = self.inner.send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                self.limiter.on_retry(host)
+                sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.limiter.on_response(host, response.status_code, retry_after)
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+
+            self.limiter.on_retry(host)
+            response.close()
+            sleep(backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def close(self):
+        self.inner.close()
@@ -82,7 +82,10 @@ def main():
     scraper.post_urls = urls
 
     # Download
-    scraper.scrape_posts(num_posts_to_scrape=0)
+    try:
+        scraper.scrape_posts(num_posts_to_scrape=0)
+    finally:
+        scraper.close()
 
     print(f"\n🎨 Regenerating HTML interface...\n")
     generate_html_file('blog')
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 """
-Regenerate blog.html from existing JSON data and updated template
+Regenerate blog.html from the essay catalog and updated template
 """
-import json
 import os
+from catalog import Catalog
 from config import AUTHOR_NAME as DISPLAY_AUTHOR_NAME, BLOG_TITLE
 
 BASE_HTML_DIR = "substack_html_pages"
@@ -19,13 +19,9 @@ def generate_html_file(author_name: str) -> None:
     if not os.path.exists(BASE_HTML_DIR):
         os.makedirs(BASE_HTML_DIR)
 
-    # Read JSON data
-    json_path = os.path.join(JSON_DATA_DIR, f'{author_name}.json')
-    with open(json_path, 'r', encoding='utf-8') as file:
-        essays_data = json.load(file)
-
-    # Convert JSON data to a JSON string for embedding
-    embedded_json_data = json.dumps(essays_data, ensure_ascii=False, indent=4)
+    # Read the catalog as a JSON string for embedding
+    with Catalog.for_writer(author_name, directory=JSON_DATA_DIR) as catalog:
+        embedded_json_data = catalog.to_json()
 
     with open(HTML_TEMPLATE, 'r', encoding='utf-8') as file:
         html_template = file.read()
@@ -1,10 +1,33 @@
 #!/usr/bin/env python3
 """
-Remove duplicate entries from blog.json, keeping the best version of each article
+Remove duplicate entries from the essay catalog, keeping the best version of each article.
+
+The catalog keys entries by slug, so a post saved twice under the same slug is merged as it is
+added. What's left are the same article saved under different slugs (a repost, or a slug Substack
+renamed): entries with the same title, date and markdown body (the likes in its header may
+differ). Entries that only share a title and date, like two "Weekly roundup" issues, are kept.
+Reposts under a new title and re-announced courses ("cohort 2", "cohort 3") have nearly the
+same body instead: their markdown files are compared by MinHash signature, bucketed with LSH
+(see near_duplicates.py), and clusters at least --threshold similar are reported, and removed
+with --remove-near-duplicates. Signatures are cached in data/blog.signatures.db, so only new or
+changed files are shingled again. Removed entries are recorded as duplicates of the one kept,
+so the sync scripts don't download and add them again.
+
+    python remove_duplicates.py                             # remove same title, date and body, report near-duplicates
+    python remove_duplicates.py --remove-near-duplicates    # remove near-duplicates too
+    python remove_duplicates.py --threshold 0.9             # only closer near-duplicates
+    python remove_duplicates.py --exact                     # only same title, date and body
 """
-import json
+import argparse
+import hashlib
 from collections import defaultdict
 
+from catalog import Catalog
+from catalog_merge import essay_key
+from near_duplicates import SIMILARITY_THRESHOLD, SignatureCache, find_clusters
+
+HEADER_CHARS = 2000  # Characters of a post searched for the likes line that ends its header
+
 def score_entry(entry):
     """Score an entry based on data completeness (higher is better)"""
     score = 0
@@ -40,52 +63,152 @@ def score_entry(entry):
 
     return score
 
-def remove_duplicates():
-    """Remove duplicate entries, keeping the best version"""
-
-    # Load JSON
-    with open('data/blog.json', 'r') as f:
-        essays = json.load(f)
-
-    print(f"Total entries before deduplication: {len(essays)}\n")
-
-    # Group by file_link
-    grouped = defaultdict(list)
+def text_digest(content):
+    """Hash a post's markdown body, after its title, date and likes header"""
+    likes = content.find('\n**Likes:**', 0, HEADER_CHARS)
+    if likes != -1:
+        body_start = content.find('\n', likes + 1)
+        content = content[body_start + 1:] if body_start != -1 else ''
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()
+
+def body_digest(md_filepath):
+    """Hash a markdown file's body, after its title, date and likes header. None if it can't be read"""
+    try:
+        with open(md_filepath, 'r', encoding='utf-8') as f:
+            return text_digest(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def duplicate_title(essay):
+    """The title entries are grouped by, or None for a missing or placeholder title"""
+    title = essay.get('title', '').strip().casefold()
+    return title if title and title != 'untitled' else None
+
+def duplicate_date(essay):
+    """The date entries are grouped by, or None for a missing or placeholder date"""
+    date = essay.get('date', '')
+    return date if date and date != 'Date not found' else None
+
+def group_duplicates(essays, digests=None):
+    """
+    Group entries by title, date and markdown body, leaving out entries with a placeholder title
+    or date and entries whose file can't be read. Only files sharing a title and date are read,
+    unless digests (file_link -> body digest, None when unreadable) already has them.
+    """
+    by_title = defaultdict(list)
     for essay in essays:
-        file_link = essay.get('file_link', '')
-        if file_link:
-            grouped[file_link].append(essay)
-
-    # Keep best version of each
-    deduplicated = []
-    duplicates_removed = 0
+        title, date = duplicate_title(essay), duplicate_date(essay)
+        if title and date:
+            by_title[(title, date)].append(essay)
+        else:
+            by_title[essay.get('file_link', '')].append(essay)
 
-    for file_link, entries in grouped.items():
+    grouped = defaultdict(list)
+    for key, entries in by_title.items():
+        if len(entries) == 1 or isinstance(key, str):
+            grouped[key].extend(entries)
+            continue
+        for essay in entries:
+            file_link = essay.get('file_link', '')
+            digest = digests[file_link] if digests is not None and file_link in digests else body_digest(file_link)
+            grouped[(*key, digest) if digest else file_link].append(essay)
+    return grouped
+
+def find_duplicates(grouped):
+    """Pick the best entry of each group. Returns (best entry, entries to remove) for groups with duplicates"""
+    duplicates = []
+    for entries in grouped.values():
         if len(entries) > 1:
-            # Multiple entries - keep the best one
             best_entry = max(entries, key=score_entry)
-            duplicates_removed += len(entries) - 1
-
-            print(f"Duplicate found: {file_link}")
-            print(f"  Keeping: {best_entry.get('title', 'Untitled')[:60]} | {best_entry.get('date', 'No date')}")
-            for entry in entries:
-                if entry != best_entry:
-                    print(f"  Removing: {entry.get('title', 'Untitled')[:60]} | {entry.get('date', 'No date')}")
-            print()
+            duplicates.append((best_entry, [entry for entry in entries if entry is not best_entry]))
+    return duplicates
+
+def find_near_duplicates(essays, signatures, threshold=SIMILARITY_THRESHOLD):
+    """
+    Pick the best entry of each cluster of essays whose markdown is at least threshold similar.
+    signatures maps file_link to MinHash signature; essays without one are left out.
+    Returns (best entry, entries to remove) for each cluster
+    """
+    keyed = {i: signatures[essay.get('file_link')] for i, essay in enumerate(essays)
+             if essay.get('file_link') in signatures}
+    duplicates = []
+    for cluster in find_clusters(keyed, threshold):
+        entries = [essays[i] for i in cluster]
+        best_entry = max(entries, key=score_entry)
+        duplicates.append((best_entry, [entry for entry in entries if entry is not best_entry]))
+    return duplicates
+
+def mark_duplicates(duplicates):
+    """
+    Sets duplicate_of on each removed entry to the slug of its best entry, so the catalog records it.
+    Returns the removed entries
+    """
+    removed_entries = []
+    for best_entry, removed in duplicates:
+        for entry in removed:
+            entry['duplicate_of'] = essay_key(best_entry)
+            removed_entries.append(entry)
+    return removed_entries
+
+def print_duplicates(duplicates, label, action="Removing"):
+    """Print each duplicate group. Returns the number of entries it would remove"""
+    duplicates_found = 0
+    for best_entry, removed in duplicates:
+        duplicates_found += len(removed)
+
+        print(f"{label} found: {best_entry.get('title', 'Untitled')[:60]}")
+        print(f"  Keeping: {best_entry.get('file_link', '')} | {best_entry.get('date', 'No date')}")
+        for entry in removed:
+            print(f"  {action}: {entry.get('file_link', '')} | {entry.get('title', 'Untitled')[:40]} | {entry.get('date', 'No date')}")
+        print()
+    return duplicates_found
+
+def remove_duplicates(threshold=SIMILARITY_THRESHOLD, exact_only=False, remove_near=False):
+    """Remove duplicate entries, keeping the best version, and report (or remove) near-duplicates"""
+
+    catalog = Catalog.for_writer('blog')
+    essays = catalog.essays()
 
-            deduplicated.append(best_entry)
-        else:
-            # Single entry - keep it
-            deduplicated.append(entries[0])
+    print(f"Total entries before deduplication: {len(essays)}\n")
 
-    # Write back
-    with open('data/blog.json', 'w') as f:
-        json.dump(deduplicated, f, ensure_ascii=False, indent=4)
+    # Keep best version of each
+    duplicates = find_duplicates(group_duplicates(essays))
+    duplicates_removed = print_duplicates(duplicates, "Duplicate")
+    removals = mark_duplicates(duplicates)
+
+    near_duplicates_found = 0
+    if not exact_only:
+        removed_ids = {id(entry) for entry in removals}
+        remaining = [essay for essay in essays if id(essay) not in removed_ids]
+        with SignatureCache.for_writer('blog') as cache:
+            signatures = cache.signatures(essay.get('file_link', '') for essay in remaining)
+            near_duplicates = find_near_duplicates(remaining, signatures, threshold)
+            print(f"🔍 {cache.report()}\n")
+        near_duplicates_found = print_duplicates(near_duplicates, "Near-duplicate",
+                                                 "Removing" if remove_near else "Similar")
+        if remove_near:
+            removals.extend(mark_duplicates(near_duplicates))
+
+    catalog.apply([], removals)
+    catalog.close()
 
     print(f"\n✅ Deduplication complete!")
     print(f"   - Removed: {duplicates_removed} duplicate entries")
-    print(f"   - Total entries after: {len(deduplicated)}")
-    print(f"   - Unique articles: {len(grouped)}")
+    if not exact_only:
+        action = "Removed" if remove_near else "Found"
+        print(f"   - {action}: {near_duplicates_found} near-duplicate entries (similarity >= {threshold})")
+        if near_duplicates_found and not remove_near:
+            print("     Run with --remove-near-duplicates to remove them")
+    print(f"   - Unique articles: {len(essays) - len(removals)}")
 
 if __name__ == "__main__":
-    remove_duplicates()
+    parser = argparse.ArgumentParser(description="Remove duplicate entries from the essay catalog.")
+    parser.add_argument("-t", "--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help=f"Similarity of markdown bodies from which posts are near-duplicates. Default: {SIMILARITY_THRESHOLD}")
+    parser.add_argument("--exact", action="store_true", help="Only remove entries with the same title, date and body.")
+    parser.add_argument("--remove-near-duplicates", action="store_true",
+                        help="Remove near-duplicates instead of only reporting them.")
+    args = parser.parse_args()
+    if args.exact and args.remove_near_duplicates:
+        parser.error("--remove-near-duplicates can't be combined with --exact")
+    remove_duplicates(args.threshold, args.exact, args.remove_near_duplicates)
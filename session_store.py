@@ -0,0 +1,83 @@
+"""
+Persistent store for the logged in Substack session cookies.
+
+The premium scraper saves the cookies it gets from login() here and reuses them on the
+next run after a cheap validity check, so runs that only fetch a few posts don't pay for
+a full browser login. The file holds live credentials, so it is created readable and
+writable by the owner only.
+"""
+import json
+import os
+import stat
+from time import time
+from typing import List, Optional
+
+import requests
+
+SESSION_CHECK_URL: str = "https://substack.com/api/v1/user/profile/self"  # Only answers 200 when logged in
+
+
+class SessionStore:
+    def __init__(self, path: str):
+        self.path: str = path
+
+    def load(self) -> Optional[List[dict]]:
+        """
+        Loads the saved cookies, dropping expired ones. Returns None if there is no usable session.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                cookies = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable session file {self.path}: {e}")
+            return None
+
+        now = time()
+        cookies = [cookie for cookie in cookies if cookie.get("expiry", now + 1) > now]
+        return cookies or None
+
+    def save(self, cookies: List[dict]) -> None:
+        """
+        Saves cookies to the session file with owner-only permissions.
+        """
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Create the file as 0600 up front so the cookies are never readable by other users
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, stat.S_IRUSR | stat.S_IWUSR)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(cookies, file)
+        os.chmod(self.path, stat.S_IRUSR | stat.S_IWUSR)
+
+    def clear(self) -> None:
+        """
+        Deletes the saved session, e.g. after it was rejected.
+        """
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def is_valid(cookies: List[dict], timeout: float = 10) -> bool:
+        """
+        Checks with one small API request whether the cookies still belong to a logged in session.
+        """
+        session = requests.Session()
+        for cookie in cookies:
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/")
+            )
+        try:
+            response = session.get(SESSION_CHECK_URL, timeout=timeout)
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
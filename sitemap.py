@@ -0,0 +1,161 @@
+"""
+Streaming sitemap reader.
+
+iter_sitemap yields (url, lastmod) pairs while the sitemap is still downloading, using an
+incremental XML parser and discarding each <url> element once it has been read, so memory
+stays flat no matter how many posts a publication has. Sitemap indexes are followed: their
+child sitemaps are fetched concurrently and their entries are yielded as they arrive.
+"""
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Full, Queue
+from threading import Event
+from typing import Iterable, Iterator, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+import requests
+
+SITEMAP_NS: str = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+CHUNK_SIZE: int = 64 * 1024
+SITEMAP_WORKERS: int = 4  # Child sitemaps of an index fetched at once
+QUEUE_SIZE: int = 16  # Batches buffered from child sitemaps before their fetchers wait for the consumer
+BATCH_SIZE: int = 500  # Entries handed from a child sitemap fetcher to the consumer at once
+
+SitemapEntry = Tuple[str, Optional[str]]  # (url, lastmod)
+# Errors of a failed download or a malformed (or badly gzipped) sitemap, for callers to catch
+SITEMAP_ERRORS = (requests.RequestException, ET.ParseError, zlib.error)
+
+
+def parse_sitemap_stream(chunks: Iterable[bytes]) -> Iterator[Tuple[str, Optional[str], bool]]:
+    """
+    Incrementally parses sitemap XML chunks, yielding (loc, lastmod, is_child_sitemap) for every
+    <url> of a urlset and every <sitemap> of a sitemap index.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+
+    def drain() -> Iterator[Tuple[str, Optional[str], bool]]:
+        nonlocal root
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag in (f"{SITEMAP_NS}url", f"{SITEMAP_NS}sitemap"):
+                loc = element.findtext(f"{SITEMAP_NS}loc")
+                if loc:
+                    lastmod = element.findtext(f"{SITEMAP_NS}lastmod")
+                    yield loc.strip(), lastmod.strip() if lastmod else None, element.tag == f"{SITEMAP_NS}sitemap"
+                # Drop the finished entry so the tree never grows
+                try:
+                    root.remove(element)
+                except ValueError:
+                    element.clear()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+def iter_response_chunks(response: requests.Response, url: str) -> Iterator[bytes]:
+    """
+    Yields the body of a streamed response, gunzipping .xml.gz sitemaps on the fly.
+    """
+    chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+    if not url.endswith(".gz"):
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield decompressor.decompress(chunk)
+    yield decompressor.flush()
+
+
+def iter_single_sitemap(session: requests.Session, url: str) -> Iterator[Tuple[str, Optional[str], bool]]:
+    """
+    Streams the entries of one sitemap document without following child sitemaps.
+    """
+    with session.get(url, stream=True) as response:
+        if not response.ok:
+            print(f'Error fetching sitemap at {url}: {response.status_code}')
+            return
+        yield from parse_sitemap_stream(iter_response_chunks(response, url))
+
+
+def iter_sitemap_serial(session: requests.Session, url: str) -> Iterator[SitemapEntry]:
+    """
+    Streams the (url, lastmod) entries of a sitemap, following nested indexes one at a time.
+    """
+    for loc, lastmod, is_child_sitemap in iter_single_sitemap(session, url):
+        if is_child_sitemap:
+            yield from iter_sitemap_serial(session, loc)
+        else:
+            yield loc, lastmod
+
+
+def iter_sitemap(session: requests.Session, url: str, workers: int = SITEMAP_WORKERS) -> Iterator[SitemapEntry]:
+    """
+    Streams the (url, lastmod) entries of a sitemap. When it is a sitemap index, its child
+    sitemaps are fetched concurrently and entries are yielded in the order they arrive.
+    """
+    children = []
+    for loc, lastmod, is_child_sitemap in iter_single_sitemap(session, url):
+        if is_child_sitemap:
+            children.append(loc)
+        else:
+            yield loc, lastmod
+
+    if not children:
+        return
+
+    entries: Queue = Queue(maxsize=QUEUE_SIZE)
+    stop = Event()
+    finished = object()
+
+    def put(item) -> None:
+        # Give up waiting for room once the consumer has stopped iterating
+        while not stop.is_set():
+            try:
+                entries.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def read_child(child_url: str) -> None:
+        batch = []
+        try:
+            for entry in iter_sitemap_serial(session, child_url):
+                batch.append(entry)
+                if len(batch) >= BATCH_SIZE:
+                    put(batch)
+                    batch = []
+                if stop.is_set():
+                    return
+            if batch:
+                put(batch)
+        except SITEMAP_ERRORS as e:
+            print(f'Error reading sitemap at {child_url}: {e}')
+        finally:
+            put(finished)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for child_url in children:
+            executor.submit(read_child, child_url)
+
+        remaining = len(children)
+        while remaining:
+            try:
+                item = entries.get(timeout=0.1)
+            except Empty:
+                continue
+            if item is finished:
+                remaining -= 1
+            else:
+                yield from item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,87 @@
+"""
+Parser backends for post pages.
+
+make_soup builds the BeautifulSoup tree of a post page with a choice of parser (the built-in
+html.parser, or lxml, which is several times faster) and, optionally, restricted parsing:
+only the subtrees extract_post_data reads are turned into Tags, and the page's scripts,
+navigation, comments and footer are skipped while parsing. Restricted parsing needs
+beautifulsoup4 4.13 or later. benchmark_parsers.py compares the options on saved pages.
+
+sanitize_content cleans a post's content element so it can be written to the .html output
+as it is, instead of going through markdown and back.
+"""
+from typing import Dict, Optional, Union
+
+from bs4 import BeautifulSoup, Tag
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:  # beautifulsoup4 before 4.13: everything but restricted parsing works
+    ElementFilter = None
+
+HTML_PARSER: str = "html.parser"
+PARSERS = ("html.parser", "lxml")
+RESTRICTED_PARSING: bool = ElementFilter is not None  # Whether the installed beautifulsoup4 supports it
+
+DATE_CLASSES = {"pencraft", "pc-reset", "color-pub-secondary-text-hGQ02T"}
+
+# Removed from post content with everything inside them: active content and Substack's widgets
+DROP_TAGS = ("script", "style", "noscript", "form", "button", "input", "source")
+# Responsive image sources are dropped so images load from src, like in the markdown
+DROP_ATTRIBUTES = ("srcset", "sizes")
+
+
+class PostContentFilter(ElementFilter or object):
+    """
+    Keeps the elements extract_post_data and is_paywalled look at, with everything inside them:
+    the title (h1.post-title, or any h2), h3.subtitle, the date div, the JSON-LD script, the
+    like button and div.available-content.
+    """
+
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict]) -> bool:
+        if name == "h2":
+            return True
+        if name not in ("h1", "h3", "div", "script", "a") or not attrs:
+            return False
+        classes = attrs.get("class") or ""
+        classes = set(classes.split() if isinstance(classes, str) else classes)
+        if name == "div":
+            return "available-content" in classes or DATE_CLASSES <= classes
+        if name == "script":
+            return attrs.get("type") == "application/ld+json"
+        return {"h1": "post-title", "h3": "subtitle", "a": "post-ufi-button"}[name] in classes
+
+    def allow_string_creation(self, string: str) -> bool:
+        # Only called for text outside every kept element
+        return False
+
+
+POST_CONTENT_FILTER = PostContentFilter()
+
+
+def make_soup(content: Union[str, bytes], parser: str = HTML_PARSER, restricted: bool = False) -> BeautifulSoup:
+    """
+    Parses a post page with the given parser, only keeping the post's subtrees when restricted is set.
+    """
+    if restricted and not RESTRICTED_PARSING:
+        raise RuntimeError("Restricted parsing needs beautifulsoup4 4.13 or later")
+    return BeautifulSoup(content, parser, parse_only=POST_CONTENT_FILTER if restricted else None)
+
+
+def sanitize_content(element: Optional[Tag]) -> str:
+    """
+    Strips scripts, widgets, event handlers and javascript: links from a post's content element,
+    in place, and returns its HTML.
+    """
+    if element is None:
+        return ""
+    for tag in element.find_all(DROP_TAGS):
+        tag.decompose()
+    for tag in [element, *element.find_all(True)]:
+        for attribute in list(tag.attrs):
+            if attribute.startswith("on") or attribute in DROP_ATTRIBUTES:
+                del tag[attribute]
+        for attribute in ("href", "src"):
+            if tag.get(attribute, "").strip().lower().startswith("javascript:"):
+                del tag[attribute]
+    return str(element)
@@ -1,14 +1,21 @@
 import argparse
+import asyncio
+import html
 import json
 import os
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
-from time import sleep
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from queue import Queue
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from time import perf_counter
 
 
 import html2text
 import markdown
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from datetime import datetime
 from tqdm import tqdm
@@ -22,10 +29,27 @@ from webdriver_manager.firefox import GeckoDriverManager
 from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.common.exceptions import SessionNotCreatedException
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.chrome.service import Service
 from urllib.parse import urlparse
-from config import EMAIL, PASSWORD, AUTHOR_NAME, BLOG_TITLE, BLOG_URL
+from ad_detector import classify_post
+from asset_mirror import ASSET_WORKERS, AssetMirror
+from convert_cache import MAX_CACHE_BYTES as MAX_CONVERT_CACHE_BYTES, ConvertCache
+from convert_pool import CONVERT_PROCESSES, CONVERT_WINDOW, convert_post, create_convert_pool
+from config import EMAIL, PASSWORD, AUTHOR_NAME, BLOG_TITLE, BLOG_URL, SESSION_FILE
+from catalog import Catalog
+from catalog_merge import MERGE_RULES, MergeRule
+from crawl_journal import CrawlJournal
+from fast_markdown import UnsupportedMarkup, html_to_md as fast_html_to_md
+from http_cache import MAX_CACHE_BYTES, CachingAdapter, HttpCache
+from page_archive import PageArchive
+from rate_limiter import MAX_RATE, AdaptiveRateLimiter, RateLimitedAdapter
+from session_store import SessionStore
+from sitemap import SITEMAP_ERRORS, SITEMAP_WORKERS, SitemapEntry, iter_sitemap
+from soup_parser import HTML_PARSER, PARSERS, RESTRICTED_PARSING, make_soup, sanitize_content
+from sync_manifest import SyncManifest
 
 USE_PREMIUM: bool = True  # Set to True if you want to login to Substack and convert paid for posts
 BASE_SUBSTACK_URL: str = BLOG_URL  # Substack you want to convert to markdown (from environment variable)
@@ -34,6 +58,17 @@ BASE_HTML_DIR: str = "substack_html_pages"  # Name of the directory we'll save t
 HTML_TEMPLATE: str = "author_template.html"  # HTML template to use for the author page
 JSON_DATA_DIR: str = "data"
 NUM_POSTS_TO_SCRAPE: int = 3  # Set to 0 if you want all posts
+NUM_WORKERS: int = 1  # Number of posts fetched concurrently (1 fetches posts one at a time)
+NUM_BROWSERS: int = 1  # Number of logged-in browsers the premium scraper spreads posts across
+LOGIN_TIMEOUT: int = 60  # Seconds to wait for each step of the Substack login
+SESSION_COOKIE: str = "substack.sid"  # Cookie Substack sets once the login succeeded
+HTML2TEXT_OPTIONS: Dict[str, object] = {"ignore_links": False, "body_width": 0}  # Options html_to_md sets
+MARKDOWN_EXTENSIONS: List[str] = ['extra']  # Extensions md_to_html renders with
+MD_CONVERTERS: Tuple[str, ...] = ("html2text", "fast")  # HTML to Markdown converters, see fast_markdown.py
+
+# (title, subtitle, like_count, date, md_content, content_html); content_html is None unless direct_html is set
+PostData = Tuple[str, str, str, str, str, Optional[str]]
+RawPost = Tuple[str, bytes]  # (kind, content): a fetched post page, or for kind "api" its JSON API response
 
 
 def extract_main_part(url: str) -> str:
@@ -42,6 +77,29 @@ def extract_main_part(url: str) -> str:
     # present
 
 
+def create_session(
+    pool_size: int = 10,
+    cache: Optional[HttpCache] = None,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None
+) -> requests.Session:
+    """
+    Creates a requests Session that keeps connections alive in a bounded pool.
+    Threads block waiting for a free connection instead of opening throwaway ones.
+    With a cache, GET requests are revalidated against it with conditional requests.
+    With a rate limiter, requests are paced per host and throttled ones are retried with backoff.
+    """
+    session = requests.Session()
+    if cache is not None:
+        adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    if rate_limiter is not None:
+        adapter = RateLimitedAdapter(rate_limiter, adapter)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def generate_html_file(author_name: str) -> None:
     """
     Generates a HTML file for the given author.
@@ -49,13 +107,9 @@ def generate_html_file(author_name: str) -> None:
     if not os.path.exists(BASE_HTML_DIR):
         os.makedirs(BASE_HTML_DIR)
 
-    # Read JSON data
-    json_path = os.path.join(JSON_DATA_DIR, f'{author_name}.json')
-    with open(json_path, 'r', encoding='utf-8') as file:
-        essays_data = json.load(file)
-
-    # Convert JSON data to a JSON string for embedding
-    embedded_json_data = json.dumps(essays_data, ensure_ascii=False, indent=4)
+    # Read the catalog as a JSON string for embedding
+    with Catalog.for_writer(author_name, directory=JSON_DATA_DIR) as catalog:
+        embedded_json_data = catalog.to_json()
 
     with open(HTML_TEMPLATE, 'r', encoding='utf-8') as file:
         html_template = file.read()
@@ -75,7 +129,29 @@ def generate_html_file(author_name: str) -> None:
 
 
 class BaseSubstackScraper(ABC):
-    def __init__(self, base_substack_url: str, md_save_dir: str, html_save_dir: str):
+    concurrent_fetch: bool = True  # Whether get_url_soup may be called from several threads at once
+    process_conversion: bool = True  # Whether posts can be fetched raw and converted in the process pool
+
+    def __init__(
+        self,
+        base_substack_url: str,
+        md_save_dir: str,
+        html_save_dir: str,
+        workers: int = NUM_WORKERS,
+        use_api: bool = False,
+        http_cache: Optional[HttpCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+        archive: bool = True,
+        assets: Optional[AssetMirror] = None,
+        parser: str = HTML_PARSER,
+        restrict_parsing: bool = False,
+        direct_html: bool = False,
+        md_converter: str = "html2text",
+        convert_processes: int = 0,
+        convert_cache: Optional[ConvertCache] = None,
+        sitemap_entries: Optional[List[SitemapEntry]] = None
+    ):
         if not base_substack_url.endswith("/"):
             base_substack_url += "/"
         self.base_substack_url: str = base_substack_url
@@ -93,9 +169,54 @@ class BaseSubstackScraper(ABC):
             os.makedirs(self.html_save_dir)
             print(f"Created html directory {self.html_save_dir}")
 
+        self.workers: int = max(1, workers)
+        self.use_api: bool = use_api
+        self.http_cache: Optional[HttpCache] = http_cache
+        self.rate_limiter: Optional[AdaptiveRateLimiter] = rate_limiter
+        self.session: requests.Session = session or create_session(
+            pool_size=max(self.workers, 10), cache=http_cache, rate_limiter=rate_limiter
+        )
+        self.convert_processes: int = max(0, convert_processes)
+        self.convert_cache: Optional[ConvertCache] = convert_cache
+        # Set by batch mode: fetch and conversion pools and a progress bar shared by all publications of the batch
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.convert_pool: Optional[ProcessPoolExecutor] = None
+        self.progress: Optional[tqdm] = None
+
         self.keywords: List[str] = ["about", "archive", "podcast"]
+        self.post_lastmod: Dict[str, str] = {}  # Post URL -> sitemap <lastmod>, for posts that have one
+        self.manifest: SyncManifest = SyncManifest.for_writer(self.writer_name, directory=JSON_DATA_DIR)
+        self.archive: Optional[PageArchive] = PageArchive.for_writer(self.writer_name) if archive else None
+        self.assets: Optional[AssetMirror] = assets
+        self.parser: str = parser
+        self.restrict_parsing: bool = restrict_parsing
+        self.direct_html: bool = direct_html
+        self.md_converter: str = md_converter
+        # Entries of a sitemap the caller already read, used instead of fetching it again
+        self.sitemap_entries: Optional[List[SitemapEntry]] = sitemap_entries
         self.post_urls: List[str] = self.get_all_post_urls()
 
+    @classmethod
+    def converter(
+        cls,
+        parser: str = HTML_PARSER,
+        restrict_parsing: bool = False,
+        direct_html: bool = False,
+        md_converter: str = "html2text",
+        convert_cache: Optional[ConvertCache] = None
+    ):
+        """
+        Creates a scraper that only extracts and converts posts, without a publication, session or
+        output directories, for the conversion processes and the benchmarks.
+        """
+        converter = cls.__new__(cls)
+        converter.parser = parser
+        converter.restrict_parsing = restrict_parsing
+        converter.direct_html = direct_html
+        converter.md_converter = md_converter
+        converter.convert_cache = convert_cache
+        return converter
+
     def get_all_post_urls(self) -> List[str]:
         """
         Attempts to fetch URLs from sitemap.xml, falling back to feed.xml if necessary.
@@ -107,17 +228,21 @@ class BaseSubstackScraper(ABC):
 
     def fetch_urls_from_sitemap(self) -> List[str]:
         """
-        Fetches URLs from sitemap.xml.
+        Fetches URLs from sitemap.xml, streaming it and following nested sitemap indexes, or
+        takes them from sitemap_entries when given. Each post's <lastmod> is kept in post_lastmod.
         """
         sitemap_url = f"{self.base_substack_url}sitemap.xml"
-        response = requests.get(sitemap_url)
-
-        if not response.ok:
-            print(f'Error fetching sitemap at {sitemap_url}: {response.status_code}')
-            return []
-
-        root = ET.fromstring(response.content)
-        urls = [element.text for element in root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+        entries = self.sitemap_entries
+        if entries is None:
+            entries = iter_sitemap(self.session, sitemap_url, workers=max(self.workers, SITEMAP_WORKERS))
+        urls = []
+        try:
+            for url, lastmod in entries:
+                urls.append(url)
+                if lastmod:
+                    self.post_lastmod[url] = lastmod
+        except SITEMAP_ERRORS as e:
+            print(f'Error reading sitemap at {sitemap_url}: {e}')
         return urls
 
     def fetch_urls_from_feed(self) -> List[str]:
@@ -126,13 +251,28 @@ class BaseSubstackScraper(ABC):
         """
         print('Falling back to feed.xml. This will only contain up to the 22 most recent posts.')
         feed_url = f"{self.base_substack_url}feed.xml"
-        response = requests.get(feed_url)
+        response = self.session.get(feed_url)
 
         if not response.ok:
             print(f'Error fetching feed at {feed_url}: {response.status_code}')
             return []
 
-        root = ET.fromstring(response.content)
+        return self.parse_feed(response.content)
+
+    @staticmethod
+    def parse_sitemap(content: bytes) -> List[str]:
+        """
+        Extracts the <loc> URLs from a sitemap.xml document.
+        """
+        root = ET.fromstring(content)
+        return [element.text for element in root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+
+    @staticmethod
+    def parse_feed(content: bytes) -> List[str]:
+        """
+        Extracts the item links from a feed.xml document.
+        """
+        root = ET.fromstring(content)
         urls = []
         for item in root.findall('.//item'):
             link = item.find('link')
@@ -141,6 +281,13 @@ class BaseSubstackScraper(ABC):
 
         return urls
 
+    @staticmethod
+    def is_paywalled(soup: BeautifulSoup) -> bool:
+        """
+        Checks whether a post page only shows the paywall instead of the full content.
+        """
+        return soup.find("h2", class_="paywall-title") is not None
+
     @staticmethod
     def filter_urls(urls: List[str], keywords: List[str]) -> List[str]:
         """
@@ -156,12 +303,12 @@ class BaseSubstackScraper(ABC):
         if not isinstance(html_content, str):
             raise ValueError("html_content must be a string")
         h = html2text.HTML2Text()
-        h.ignore_links = False
-        h.body_width = 0
+        for option, value in HTML2TEXT_OPTIONS.items():
+            setattr(h, option, value)
         return h.handle(html_content)
 
     @staticmethod
-    def save_to_file(filepath: str, content: str) -> None:
+    def save_to_file(filepath: str, content: str, overwrite: bool = False) -> None:
         """
         This method saves content to a file. Can be used to save HTML or Markdown
         """
@@ -171,7 +318,7 @@ class BaseSubstackScraper(ABC):
         if not isinstance(content, str):
             raise ValueError("content must be a string")
 
-        if os.path.exists(filepath):
+        if os.path.exists(filepath) and not overwrite:
             print(f"File already exists: {filepath}")
             return
 
@@ -183,9 +330,48 @@ class BaseSubstackScraper(ABC):
         """
         This method converts Markdown to HTML
         """
-        return markdown.markdown(md_content, extensions=['extra'])
+        return markdown.markdown(md_content, extensions=MARKDOWN_EXTENSIONS)
 
 
+    def run_md_converter(self, html_content: str) -> str:
+        """
+        Converts post content to Markdown with the configured converter. The fast converter
+        produces html2text's output, and hands content it doesn't support over to html2text.
+        """
+        if self.md_converter == "fast":
+            try:
+                return fast_html_to_md(html_content)
+            except UnsupportedMarkup:
+                pass
+        return self.html_to_md(html_content)
+
+    def convert_html_to_md(self, html_content: str) -> str:
+        """
+        Converts post content to Markdown, reusing the conversion cache's output for unchanged content
+        """
+        if self.convert_cache is None:
+            return self.run_md_converter(html_content)
+        # Both converters produce the same output, so their entries are shared
+        key = ConvertCache.make_key("md", html_content, tuple(HTML2TEXT_OPTIONS.items()))
+        md_content = self.convert_cache.get(key)
+        if md_content is None:
+            md_content = self.run_md_converter(html_content)
+            self.convert_cache.put(key, md_content)
+        return md_content
+
+    def convert_md_to_html(self, md_content: str) -> str:
+        """
+        Converts a post's Markdown to HTML, reusing the conversion cache's output for unchanged posts
+        """
+        if self.convert_cache is None:
+            return self.md_to_html(md_content)
+        key = ConvertCache.make_key("html", md_content, tuple(MARKDOWN_EXTENSIONS))
+        html_content = self.convert_cache.get(key)
+        if html_content is None:
+            html_content = self.md_to_html(md_content)
+            self.convert_cache.put(key, html_content)
+        return html_content
+
     def save_to_html_file(self, filepath: str, content: str) -> None:
         """
         This method saves HTML content to a file with a link to an external CSS file.
@@ -237,6 +423,14 @@ class BaseSubstackScraper(ABC):
 
         return url.split("/")[-1] + filetype
 
+    def get_output_filepaths(self, url: str) -> Tuple[str, str]:
+        """
+        Gets the markdown and html file paths a post is saved to
+        """
+        md_filepath = os.path.join(self.md_save_dir, self.get_filename_from_url(url, filetype=".md"))
+        html_filepath = os.path.join(self.html_save_dir, self.get_filename_from_url(url, filetype=".html"))
+        return md_filepath, html_filepath
+
     @staticmethod
     def combine_metadata_and_content(title: str, subtitle: str, date: str, like_count: str, content) -> str:
         """
@@ -256,10 +450,32 @@ class BaseSubstackScraper(ABC):
 
         return metadata + content
 
-    def extract_post_data(self, soup: BeautifulSoup) -> Tuple[str, str, str, str, str]:
+    @staticmethod
+    def build_post_html(title: str, subtitle: str, date: str, like_count: str, content_html: str) -> str:
+        """
+        Builds a post's html body straight from its content html, with the same header
+        md_to_html renders for combine_metadata_and_content
+        """
+        header = f"<h1>{html.escape(title, quote=False)}</h1>\n"
+        if subtitle:
+            header += f"<h2>{html.escape(subtitle, quote=False)}</h2>\n"
+        header += f"<p><strong>{html.escape(date, quote=False)}</strong></p>\n"
+        header += f"<p><strong>Likes:</strong> {html.escape(like_count, quote=False)}</p>\n"
+        return header + content_html
+
+    @staticmethod
+    def format_post_date(date_str: str) -> str:
+        """
+        Formats an ISO 8601 publication date the way Substack displays it, e.g. "Jan 05, 2024"
+        """
+        date_obj = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        return date_obj.strftime("%b %d, %Y")
+
+    def extract_post_data(self, soup: BeautifulSoup) -> PostData:
         """
         Converts a Substack post soup to markdown, returning metadata and content.
-        Returns (title, subtitle, like_count, date, md_content).
+        Returns (title, subtitle, like_count, date, md_content, content_html), content_html being the
+        sanitized content for the html output with direct_html, None otherwise.
         """
         # Title (sometimes h2 if video present)
         title_element = soup.select_one("h1.post-title, h2")
@@ -282,9 +498,7 @@ class BaseSubstackScraper(ABC):
                 try:
                     metadata = json.loads(script_tag.string)
                     if "datePublished" in metadata:
-                        date_str = metadata["datePublished"]
-                        date_obj = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                        date = date_obj.strftime("%b %d, %Y")
+                        date = self.format_post_date(metadata["datePublished"])
                 except (json.JSONDecodeError, ValueError, KeyError):
                     pass
 
@@ -302,103 +516,510 @@ class BaseSubstackScraper(ABC):
         # Post content
         content_element = soup.select_one("div.available-content")
         content_html = str(content_element) if content_element else ""
-        md = self.html_to_md(content_html)
+        md = self.convert_html_to_md(content_html)
 
         # Combine metadata + content
         md_content = self.combine_metadata_and_content(title, subtitle, date, like_count, md)
 
-        return title, subtitle, like_count, date, md_content
+        # The html output is written from the content itself rather than converted back from markdown
+        direct_html = sanitize_content(content_element) if self.direct_html else None
+
+        return title, subtitle, like_count, date, md_content, direct_html
 
 
     @abstractmethod
     def get_url_soup(self, url: str) -> str:
         raise NotImplementedError
 
-    def save_essays_data_to_json(self, essays_data: list) -> None:
+    def parse_page(self, content) -> BeautifulSoup:
         """
-        Saves essays data to a JSON file for a specific author.
+        Parses a post page with the configured parser, only keeping the post's subtrees with restrict_parsing
         """
-        data_dir = os.path.join(JSON_DATA_DIR)
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
+        return make_soup(content, self.parser, self.restrict_parsing)
 
-        json_path = os.path.join(data_dir, f'{self.writer_name}.json')
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as file:
-                existing_data = json.load(file)
-            essays_data = existing_data + [data for data in essays_data if data not in existing_data]
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(essays_data, f, ensure_ascii=False, indent=4)
+    def archive_page(self, url: str, content: bytes, kind: str = "page") -> None:
+        """
+        Keeps a fetched page (or, for kind "api", a post's JSON API response) in the page archive
+        """
+        if self.archive is not None:
+            self.archive.append(url, content, kind=kind, lastmod=self.post_lastmod.get(url))
 
-    def scrape_posts(self, num_posts_to_scrape: int = 0) -> None:
+    @staticmethod
+    def get_post_api_url(url: str) -> Optional[str]:
         """
-        Iterates over all posts and saves them as markdown and html files
+        Gets the publication's JSON API endpoint for a post URL, or None if the URL has no /p/<slug>
         """
-        essays_data = []
-        count = 0
-        total = num_posts_to_scrape if num_posts_to_scrape != 0 else len(self.post_urls)
-        for url in tqdm(self.post_urls, total=total):
+        parsed = urlparse(url)
+        if "/p/" not in parsed.path:
+            return None
+        slug = parsed.path.split("/p/")[-1].strip("/")
+        return f"{parsed.scheme}://{parsed.netloc}/api/v1/posts/{slug}"
+
+    @staticmethod
+    def api_post_has_body(post: dict) -> bool:
+        """
+        Checks whether a post from the JSON API has its full body, rather than none or the paywall.
+        """
+        content_html = post.get("body_html") or ""
+        return bool(content_html) and 'class="paywall' not in content_html
+
+    def extract_api_post_data(self, post: dict) -> Optional[PostData]:
+        """
+        Maps a post from the JSON API onto the same data extract_post_data returns.
+        Returns None if the body is missing or cut off by the paywall.
+        """
+        if not self.api_post_has_body(post):
+            return None
+        content_html = post["body_html"]
+
+        title = (post.get("title") or "").strip() or "Untitled"
+        subtitle = (post.get("subtitle") or "").strip()
+
+        date = "Date not found"
+        if post.get("post_date"):
             try:
-                md_filename = self.get_filename_from_url(url, filetype=".md")
-                html_filename = self.get_filename_from_url(url, filetype=".html")
-                md_filepath = os.path.join(self.md_save_dir, md_filename)
-                html_filepath = os.path.join(self.html_save_dir, html_filename)
-
-                if not os.path.exists(md_filepath):
-                    soup = self.get_url_soup(url)
-                    if soup is None:
-                        total += 1
-                        continue
-                    title, subtitle, like_count, date, md = self.extract_post_data(soup)
-                    self.save_to_file(md_filepath, md)
-
-                    # Convert markdown to HTML and save
-                    html_content = self.md_to_html(md)
-                    self.save_to_html_file(html_filepath, html_content)
-
-                    # Check if the content is sponsored
-                    is_sponsored = "sponsored)" in md.lower() or "(sponsored)" in md.lower()
-
-                    essays_data.append({
-                        "title": title,
-                        "subtitle": subtitle,
-                        "like_count": like_count,
-                        "date": date,
-                        "file_link": md_filepath,
-                        "html_link": html_filepath,
-                        "is_sponsored": is_sponsored
-                    })
-                else:
-                    print(f"File already exists: {md_filepath}")
-            except Exception as e:
-                print(f"Error scraping post: {e}")
-            count += 1
-            if num_posts_to_scrape != 0 and count == num_posts_to_scrape:
-                break
-        self.save_essays_data_to_json(essays_data=essays_data)
+                date = self.format_post_date(post["post_date"])
+            except ValueError:
+                pass
+
+        like_count = post.get("reaction_count")
+        if like_count is None:
+            like_count = sum((post.get("reactions") or {}).values())
+        like_count = str(like_count)
+
+        md = self.convert_html_to_md(content_html)
+        md_content = self.combine_metadata_and_content(title, subtitle, date, like_count, md)
+
+        direct_html = None
+        if self.direct_html:
+            direct_html = sanitize_content(make_soup(content_html, self.parser))
+
+        return title, subtitle, like_count, date, md_content, direct_html
+
+    def fetch_api_content(self, url: str) -> Optional[bytes]:
+        """
+        Fetches a post's JSON API response. Returns None if the HTML page should be used instead.
+        """
+        api_url = self.get_post_api_url(url)
+        if api_url is None:
+            return None
+        try:
+            response = self.session.get(api_url)
+            if not response.ok:
+                return None
+            self.archive_page(url, response.content, kind="api")
+            return response.content if self.api_post_has_body(response.json()) else None
+        except (requests.RequestException, ValueError):
+            return None
+
+    def fetch_api_post_data(self, url: str) -> Optional[PostData]:
+        """
+        Fetches a post from the publication's JSON API. Returns None if the HTML page should be used instead.
+        """
+        content = self.fetch_api_content(url)
+        return self.extract_api_post_data(json.loads(content)) if content is not None else None
+
+    def fetch_post_data(self, url: str) -> Optional[PostData]:
+        """
+        Fetches a post and extracts its data. Returns None if the post should be skipped.
+        With use_api, the JSON API is tried first and the HTML page is only fetched if it fails.
+        """
+        if self.use_api:
+            post_data = self.fetch_api_post_data(url)
+            if post_data is not None:
+                return post_data
+
+        soup = self.get_url_soup(url)
+        if soup is None:
+            return None
+        return self.extract_post_data(soup)
+
+    def get_url_content(self, url: str) -> Optional[bytes]:
+        """
+        Gets the raw page of a URL, for scrapers whose process_conversion is set
+        """
+        raise NotImplementedError
+
+    def fetch_post_content(self, url: str) -> Optional[RawPost]:
+        """
+        Fetches a post without parsing it, for conversion in the process pool. Returns None if it should be skipped.
+        With use_api, the JSON API is tried first and the HTML page is only fetched if it fails.
+        """
+        if self.use_api:
+            content = self.fetch_api_content(url)
+            if content is not None:
+                return "api", content
+
+        content = self.get_url_content(url)
+        return ("page", content) if content is not None else None
+
+    def convert_post(self, url: str, kind: str, content: bytes) -> Optional[Tuple[PostData, str]]:
+        """
+        Extracts a fetched post and renders its html output. Returns None if the post should be skipped.
+        """
+        if kind == "api":
+            post_data = self.extract_api_post_data(json.loads(content))
+        else:
+            soup = self.parse_page(content)
+            if self.is_paywalled(soup):
+                print(f"Skipping premium article: {url}")
+                return None
+            post_data = self.extract_post_data(soup)
+        if post_data is None:
+            return None
+        return post_data, self.render_post_html(post_data)
+
+    def iter_post_data(
+        self,
+        urls: List[str],
+        fetch: Optional[Callable[[str], Any]] = None
+    ) -> Iterator[Callable[[], Optional[PostData]]]:
+        """
+        Yields, in the order of urls, a callable returning each post's data (or raising its error),
+        or whatever fetch returns instead of fetch_post_data.
+        With more than one worker, posts are fetched concurrently a bounded window ahead of the consumer,
+        on the shared executor in batch mode.
+        """
+        fetch = fetch or self.fetch_post_data
+        workers = self.workers if self.concurrent_fetch else 1
+        if workers == 1:
+            for url in urls:
+                yield partial(fetch, url)
+            return
+
+        executor = self.executor or ThreadPoolExecutor(max_workers=workers)
+        window = deque()
+        try:
+            for url in urls:
+                window.append(executor.submit(fetch, url))
+                if len(window) >= workers * 2:
+                    yield window.popleft().result
+            while window:
+                yield window.popleft().result
+        finally:
+            if executor is self.executor:
+                for future in window:
+                    future.cancel()
+            else:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_converted_posts(self, urls: List[str]) -> Iterator[Callable[[], Optional[Tuple[PostData, str]]]]:
+        """
+        Yields, in the order of urls, a callable returning each post's data and html output (or raising its error).
+        Posts are fetched raw by iter_post_data and converted in the process pool (the shared one in batch mode),
+        at most CONVERT_WINDOW posts per process ahead of the consumer.
+        """
+        pool = self.convert_pool or create_convert_pool(self.convert_processes)
+        cache = self.convert_cache
+        cache_settings = (cache.directory, cache.max_bytes) if cache is not None else None
+        settings = (
+            type(self), self.parser, self.restrict_parsing, self.direct_html, self.md_converter, cache_settings
+        )
+        window_size = CONVERT_WINDOW * (self.convert_processes or CONVERT_PROCESSES)
+        fetches = self.iter_post_data(urls, fetch=self.fetch_post_content)
+        window = deque()
+        try:
+            for url, fetched in zip(urls, fetches):
+                try:
+                    raw_post = fetched()
+                    if raw_post is not None:
+                        future = pool.submit(convert_post, *settings, url, *raw_post)
+                    else:
+                        future = Future()
+                        future.set_result((None, None))
+                except Exception as e:
+                    future = Future()
+                    future.set_exception(e)
+                window.append(future)
+                if len(window) >= window_size:
+                    yield partial(self.converted_post, window.popleft())
+            while window:
+                yield partial(self.converted_post, window.popleft())
+        finally:
+            fetches.close()
+            if pool is self.convert_pool:
+                for future in window:
+                    future.cancel()
+            else:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def converted_post(self, future: Future) -> Optional[Tuple[PostData, str]]:
+        """
+        Gets the result of a conversion in the process pool, adding its conversion cache hits and misses to ours
+        """
+        result, cache_stats = future.result()
+        if cache_stats is not None and self.convert_cache is not None:
+            self.convert_cache.add_stats(cache_stats)
+        return result
+
+    def save_essays_data_to_json(
+        self, essays_data: Iterable[Dict], merge_rules: Dict[str, MergeRule] = MERGE_RULES
+    ) -> None:
+        """
+        Saves essays data to the author's catalog, and exports it to their JSON file.
+        Essays are upserted by slug: a post already in the catalog is updated in place with merge_rules,
+        and new posts are appended. essays_data is consumed once, so it can come straight from the crawl journal.
+        """
+        with Catalog.for_writer(self.writer_name, directory=JSON_DATA_DIR) as catalog:
+            added, updated = catalog.upsert(essays_data, merge_rules)
+            if added or updated:
+                print(f"Catalog {catalog.path}: {added} added, {updated} updated")
+            catalog.export_json()
+
+    def start_journal(self, resume: bool = False) -> CrawlJournal:
+        """
+        Opens the crawl journal for a run. Posts saved by an interrupted run are put back into the
+        sync manifest so they aren't fetched again. With resume, they stay in the journal and are
+        merged with this run's posts at the end; without, they are merged into the catalog first.
+        """
+        journal = CrawlJournal.for_writer(self.writer_name, directory=JSON_DATA_DIR)
+        if journal.exists():
+            count = journal.recover()
+            for entry in journal:
+                self.manifest.restore(entry["manifest"])
+            if resume:
+                print(f"Resuming: {count} posts already saved by the interrupted run")
+            else:
+                # Their files are on disk and won't be fetched again, so they must not be dropped with the journal
+                self.manifest.save()
+                self.save_essays_data_to_json(journal.iter_essays())
+                print(f"Merged {count} posts saved by an interrupted run from {journal.path} into the catalog")
+        journal.open(resume=resume)
+        return journal
+
+    def record_post(self, journal: CrawlJournal, url: str, essay: Dict, md_content: str) -> None:
+        """
+        Records a saved post in the sync manifest and appends it to the crawl journal.
+        """
+        self.manifest.record(url, self.post_lastmod.get(url), md_content)
+        journal.append(essay, self.manifest.get(url))
+
+    def finish_journal(self, journal: CrawlJournal) -> None:
+        """
+        Saves the sync manifest, merges the journal into the writer's catalog and deletes it.
+        """
+        journal.close()
+        self.manifest.save()
+        self.save_essays_data_to_json(journal.iter_essays())
+        journal.clear()
+
+    def select_posts_to_fetch(self, urls: List[str]) -> List[str]:
+        """
+        Picks the posts to fetch: new posts, and posts whose sitemap lastmod changed since they were fetched.
+        Posts downloaded before the sync manifest existed are adopted into it instead of being fetched again.
+        """
+        new, changed = [], []
+        for url in urls:
+            md_filepath = self.get_output_filepaths(url)[0]
+            lastmod = self.post_lastmod.get(url)
+            if not os.path.exists(md_filepath):
+                new.append(url)
+            elif self.manifest.is_new(url):
+                self.manifest.adopt(url, lastmod, md_filepath)
+            elif self.manifest.is_changed(url, lastmod):
+                changed.append(url)
+
+        if changed:
+            print(f"{len(new)} new and {len(changed)} edited posts to fetch")
+        selected = set(new + changed)
+        return [url for url in urls if url in selected]
+
+    def render_post_html(self, post_data: PostData) -> str:
+        """
+        Renders the html body of a post: straight from its content html with direct_html, otherwise from its markdown
+        """
+        title, subtitle, like_count, date, md, content_html = post_data
+        if content_html is not None:
+            return self.build_post_html(title, subtitle, date, like_count, content_html)
+        return self.convert_md_to_html(md)
+
+    def save_post(
+        self,
+        post_data: PostData,
+        md_filepath: str,
+        html_filepath: str,
+        html_content: Optional[str] = None
+    ) -> Dict:
+        """
+        Saves a post as markdown and html files and returns its essay entry.
+        The html body is rendered here unless it was already rendered in the conversion stage.
+        """
+        title, subtitle, like_count, date, md, _ = post_data
+        if html_content is None:
+            html_content = self.render_post_html(post_data)
+
+        # Mirror the post's images and link both files to the local copies
+        md_output = md
+        if self.assets is not None:
+            images = self.assets.mirror(self.assets.collect_image_urls(md))
+            md_output = self.assets.rewrite(md, images, md_filepath)
+            html_content = self.assets.rewrite(html_content, images, html_filepath, escaped=True)
+
+        # Posts are only fetched when new or edited, so an existing file is an outdated copy
+        self.save_to_file(md_filepath, md_output, overwrite=True)
+        self.save_to_html_file(html_filepath, html_content)
+
+        return {
+            "title": title,
+            "subtitle": subtitle,
+            "like_count": like_count,
+            "date": date,
+            "file_link": md_filepath,
+            "html_link": html_filepath,
+            # Sponsored section and course ad flags, computed once here
+            **classify_post(title, md_output)
+        }
+
+    def progress_bar(self, total: int) -> tqdm:
+        """
+        Gets the progress bar for a run: a new one, or in batch mode the shared one, grown by total.
+        """
+        if self.progress is None:
+            return tqdm(total=total)
+        with self.progress.get_lock():
+            self.progress.total += total
+        self.progress.refresh()
+        return self.progress
+
+    @staticmethod
+    def report_throughput(num_scraped: int, start_time: float) -> None:
+        """
+        Prints how many posts were scraped since start_time and the resulting posts/sec
+        """
+        elapsed = perf_counter() - start_time
+        rate = num_scraped / elapsed if elapsed > 0 else 0.0
+        print(f"Scraped {num_scraped} posts in {elapsed:.1f}s ({rate:.2f} posts/sec)")
+
+    def report_fetch_stats(self) -> None:
+        """
+        Prints the HTTP cache, rate limiter, asset mirror and conversion cache statistics of the run,
+        saving their indexes
+        """
+        if self.http_cache is not None:
+            self.http_cache.flush()
+            print(self.http_cache.report())
+        if self.rate_limiter is not None:
+            print(self.rate_limiter.report())
+        if self.assets is not None:
+            self.assets.flush()
+            print(self.assets.report())
+        if self.convert_cache is not None:
+            print(self.convert_cache.report())
+
+    def close(self) -> None:
+        """
+        Releases what the scraper keeps open between runs. Plain scrapers keep nothing.
+        """
+
+    def scrape_posts(self, num_posts_to_scrape: int = 0, resume: bool = False) -> int:
+        """
+        Iterates over all posts and saves them as markdown and html files.
+        With resume, picks up from the crawl journal of an interrupted run.
+        Returns the number of posts saved.
+        """
+        start_time = perf_counter()
+        journal = self.start_journal(resume)
+        saved = 0
+        count = 0
+        urls = list(dict.fromkeys(self.post_urls))
+        total = num_posts_to_scrape if num_posts_to_scrape != 0 else len(urls)
+
+        # Only new and edited posts are fetched (in order); the rest are already up to date on disk
+        pending = self.select_posts_to_fetch(urls)
+        pending_set = set(pending)
+        pooled = self.process_conversion and (self.convert_pool is not None or self.convert_processes > 0)
+        fetches = self.iter_converted_posts(pending) if pooled else self.iter_post_data(pending)
+        progress = self.progress_bar(min(total, len(urls)))
+        try:
+            for url in urls:
+                progress.update(1)
+                try:
+                    md_filepath, html_filepath = self.get_output_filepaths(url)
+
+                    if url in pending_set:
+                        post = next(fetches)()
+                        if post is None:
+                            continue
+                        post_data, html_content = post if pooled else (post, None)
+                        essay = self.save_post(post_data, md_filepath, html_filepath, html_content)
+                        self.record_post(journal, url, essay, post_data[4])
+                        saved += 1
+                    else:
+                        print(f"File already exists: {md_filepath}")
+                except Exception as e:
+                    print(f"Error scraping post: {e}")
+                count += 1
+                if num_posts_to_scrape != 0 and count == num_posts_to_scrape:
+                    break
+        finally:
+            fetches.close()
+            journal.close()
+            if progress is not self.progress:
+                progress.close()
+
+        # Batch mode reports once for all publications
+        if self.progress is None:
+            self.report_throughput(saved, start_time)
+            self.report_fetch_stats()
+        self.finish_journal(journal)
         generate_html_file(author_name=self.writer_name)
+        return saved
 
 
 class SubstackScraper(BaseSubstackScraper):
-    def __init__(self, base_substack_url: str, md_save_dir: str, html_save_dir: str):
-        super().__init__(base_substack_url, md_save_dir, html_save_dir)
+    def __init__(
+        self,
+        base_substack_url: str,
+        md_save_dir: str,
+        html_save_dir: str,
+        workers: int = NUM_WORKERS,
+        use_api: bool = False,
+        http_cache: Optional[HttpCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+        archive: bool = True,
+        assets: Optional[AssetMirror] = None,
+        parser: str = HTML_PARSER,
+        restrict_parsing: bool = False,
+        direct_html: bool = False,
+        md_converter: str = "html2text",
+        convert_processes: int = 0,
+        convert_cache: Optional[ConvertCache] = None,
+        sitemap_entries: Optional[List[SitemapEntry]] = None
+    ):
+        super().__init__(
+            base_substack_url, md_save_dir, html_save_dir, workers=workers, use_api=use_api, http_cache=http_cache,
+            rate_limiter=rate_limiter, session=session, archive=archive, assets=assets, parser=parser,
+            restrict_parsing=restrict_parsing, direct_html=direct_html, md_converter=md_converter,
+            convert_processes=convert_processes, convert_cache=convert_cache, sitemap_entries=sitemap_entries
+        )
 
     def get_url_soup(self, url: str) -> Optional[BeautifulSoup]:
         """
-        Gets soup from URL using requests
+        Gets soup from URL using the scraper's pooled requests session
+        """
+        soup = self.parse_page(self.get_url_content(url))
+        if self.is_paywalled(soup):
+            print(f"Skipping premium article: {url}")
+            return None
+        return soup
+
+    def get_url_content(self, url: str) -> bytes:
+        """
+        Gets the raw page of a URL using the scraper's pooled requests session
         """
         try:
-            page = requests.get(url, headers=None)
-            soup = BeautifulSoup(page.content, "html.parser")
-            if soup.find("h2", class_="paywall-title"):
-                print(f"Skipping premium article: {url}")
-                return None
-            return soup
+            page = self.session.get(url, headers=None)
         except Exception as e:
             raise ValueError(f"Error fetching page: {e}") from e
+        if page.ok:
+            self.archive_page(url, page.content)
+        return page.content
 
 
 class PremiumSubstackScraper(BaseSubstackScraper):
+    process_conversion = False  # Pages may come from a browser, which only gives their soup
+
     def __init__(
         self,
         base_substack_url: str,
@@ -408,12 +1029,99 @@ class PremiumSubstackScraper(BaseSubstackScraper):
         headless: bool = False,
         browser_path: str = '',
         driver_path: str = '',
-        user_agent: str = ''
+        user_agent: str = '',
+        workers: int = NUM_WORKERS,
+        browsers: int = NUM_BROWSERS,
+        http_fetch: bool = False,
+        session_file: str = SESSION_FILE,
+        use_api: bool = False,
+        http_cache: Optional[HttpCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+        login_from: Optional["PremiumSubstackScraper"] = None,
+        archive: bool = True,
+        assets: Optional[AssetMirror] = None,
+        parser: str = HTML_PARSER,
+        restrict_parsing: bool = False,
+        direct_html: bool = False,
+        md_converter: str = "html2text",
+        convert_processes: int = 0,
+        convert_cache: Optional[ConvertCache] = None,
+        sitemap_entries: Optional[List[SitemapEntry]] = None
     ) -> None:
-        super().__init__(base_substack_url, md_save_dir, html_save_dir)
+        super().__init__(
+            base_substack_url, md_save_dir, html_save_dir, workers=workers, use_api=use_api, http_cache=http_cache,
+            rate_limiter=rate_limiter, session=session, archive=archive, assets=assets, parser=parser,
+            restrict_parsing=restrict_parsing, direct_html=direct_html, md_converter=md_converter,
+            convert_processes=convert_processes, convert_cache=convert_cache, sitemap_entries=sitemap_entries
+        )
+
+        self.browser: str = browser.lower()
+        self.headless: bool = headless
+        self.browser_path: str = browser_path
+        self.driver_path: str = driver_path
+        self.user_agent: str = user_agent
+
+        # Only the scraper that started the browsers quits them, not the ones borrowing them with login_from
+        self.owns_drivers: bool = login_from is None
+        if login_from is None:
+            # The first driver logs in (or restores the saved session), the others reuse its session cookies
+            self.session_store: SessionStore = SessionStore(session_file)
+            self.drivers: List[webdriver.Remote] = []
+            try:
+                self.driver = self.create_driver()
+                self.drivers.append(self.driver)
+                self.cookies: List[dict] = self.restore_session()
+                for _ in range(browsers - 1):
+                    driver = self.create_driver()
+                    self.drivers.append(driver)
+                    self.import_cookies(driver, self.cookies)
+            except BaseException:
+                self.close()
+                raise
+
+            # Idle drivers are checked out by get_url_soup, so each browser loads one page at a time
+            self.idle_drivers: Queue = Queue()
+            for driver in self.drivers:
+                self.idle_drivers.put(driver)
+        else:
+            # Share the logged in browsers of another publication's scraper instead of logging in again
+            self.session_store = login_from.session_store
+            self.driver = login_from.driver
+            self.cookies = login_from.cookies
+            self.drivers = login_from.drivers
+            self.idle_drivers = login_from.idle_drivers
+
+        # With http_fetch, posts go through the requests session and browsers are only a fallback
+        self.http_fetch: bool = http_fetch
+        if http_fetch and (login_from is None or login_from.session is not self.session):
+            self.import_cookies_to_session(self.cookies)
+
+        self.concurrent_fetch = http_fetch or len(self.drivers) > 1
+        self.workers = max(self.workers, len(self.drivers)) if http_fetch else len(self.drivers)
+
+    def close(self) -> None:
+        """
+        Quits the browsers this scraper started. Scrapers sharing them through login_from leave them running.
+        """
+        if not self.owns_drivers:
+            return
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Error closing browser: {e}")
+        self.drivers = []
 
-        browser = browser.lower()
-        self.driver = None
+    def create_driver(self) -> webdriver.Remote:
+        """
+        Starts a new WebDriver for the configured browser
+        """
+        browser = self.browser
+        headless = self.headless
+        browser_path = self.browser_path
+        driver_path = self.driver_path
+        user_agent = self.user_agent
 
         # Set up browser options
         if browser == 'chrome':
@@ -429,15 +1137,15 @@ class PremiumSubstackScraper(BaseSubstackScraper):
 
             if driver_path and os.path.exists(driver_path):
                 service = Service(executable_path=driver_path)
-                self.driver = webdriver.Chrome(service=service, options=options)
+                return webdriver.Chrome(service=service, options=options)
             else:
                 try:
                     service = Service(ChromeDriverManager().install())
-                    self.driver = webdriver.Chrome(service=service, options=options)
+                    return webdriver.Chrome(service=service, options=options)
                 except Exception:
                     print("webdriver_manager could not download chromedriver. Falling back to Selenium Manager.")
                     try:
-                        self.driver = webdriver.Chrome(options=options)
+                        return webdriver.Chrome(options=options)
                     except SessionNotCreatedException as se:
                         raise RuntimeError(
                             "Selenium Manager fallback failed due to driver/browser mismatch.\n"
@@ -455,15 +1163,15 @@ class PremiumSubstackScraper(BaseSubstackScraper):
 
             if driver_path and os.path.exists(driver_path):
                 service = Service(executable_path=driver_path)
-                self.driver = webdriver.Firefox(service=service, options=options)
+                return webdriver.Firefox(service=service, options=options)
             else:
                 try:
                     service = Service(GeckoDriverManager().install())
-                    self.driver = webdriver.Firefox(service=service, options=options)
+                    return webdriver.Firefox(service=service, options=options)
                 except Exception:
                     print("webdriver_manager could not download geckodriver. Falling back to Selenium Manager.")
                     try:
-                        self.driver = webdriver.Firefox(options=options)
+                        return webdriver.Firefox(options=options)
                     except SessionNotCreatedException as se:
                         raise RuntimeError(
                             "Selenium Manager fallback failed due to driver/browser mismatch.\n"
@@ -483,15 +1191,15 @@ class PremiumSubstackScraper(BaseSubstackScraper):
 
             if driver_path and os.path.exists(driver_path):
                 service = Service(executable_path=driver_path)
-                self.driver = webdriver.Edge(service=service, options=options)
+                return webdriver.Edge(service=service, options=options)
             else:
                 try:
                     service = Service(EdgeChromiumDriverManager().install())
-                    self.driver = webdriver.Edge(service=service, options=options)
+                    return webdriver.Edge(service=service, options=options)
                 except Exception:
                     print("webdriver_manager could not download msedgedriver. Falling back to Selenium Manager.")
                     try:
-                        self.driver = webdriver.Edge(options=options)
+                        return webdriver.Edge(options=options)
                     except SessionNotCreatedException as se:
                         raise RuntimeError(
                             "Selenium Manager fallback failed due to driver/browser mismatch.\n"
@@ -499,23 +1207,39 @@ class PremiumSubstackScraper(BaseSubstackScraper):
                             "or (b) pass --driver-path to a manually downloaded driver that matches your browser version."
                         ) from se
 
+    def restore_session(self) -> List[dict]:
+        """
+        Reuses the saved session if it is still valid, otherwise logs in and saves the new session.
+        Returns the session cookies.
+        """
+        cookies = self.session_store.load()
+        if cookies and self.session_store.is_valid(cookies):
+            print("Reusing saved Substack session")
+            self.import_cookies(self.driver, cookies)
+            return cookies
+        if cookies:
+            print("Saved Substack session expired, logging in again")
+            self.session_store.clear()
+
         self.login()
+        cookies = self.export_cookies()
+        self.session_store.save(cookies)
+        return cookies
 
     def login(self) -> None:
         """
         This method logs into Substack using Selenium
         """
+        wait = WebDriverWait(self.driver, LOGIN_TIMEOUT)
         self.driver.get("https://substack.com/sign-in")
-        sleep(3)
 
-        signin_with_password = self.driver.find_element(
-            By.XPATH, "//a[@class='login-option substack-login__login-option']"
-        )
+        signin_with_password = wait.until(EC.element_to_be_clickable(
+            (By.XPATH, "//a[@class='login-option substack-login__login-option']")
+        ))
         signin_with_password.click()
-        sleep(3)
 
         # Email and password
-        email = self.driver.find_element(By.NAME, "email")
+        email = wait.until(EC.visibility_of_element_located((By.NAME, "email")))
         password = self.driver.find_element(By.NAME, "password")
         email.send_keys(EMAIL)
         password.send_keys(PASSWORD)
@@ -523,9 +1247,14 @@ class PremiumSubstackScraper(BaseSubstackScraper):
         # Find the submit button and click it.
         submit = self.driver.find_element(By.XPATH, "//*[@id=\"substack-login\"]/div[2]/div[2]/form/button")
         submit.click()
-        sleep(30)  # Wait for the page to load
 
-        if self.is_login_failed():
+        # Wait until the session cookie is set or the login form reports an error
+        try:
+            wait.until(lambda driver: driver.get_cookie(SESSION_COOKIE) is not None or self.is_login_failed())
+        except TimeoutException:
+            pass
+
+        if self.is_login_failed() or self.driver.get_cookie(SESSION_COOKIE) is None:
             raise Exception(
                 "Warning: Login unsuccessful. Please check your email and password, or your account status.\n"
                 "Use the non-premium scraper for the non-paid posts. \n"
@@ -539,15 +1268,172 @@ class PremiumSubstackScraper(BaseSubstackScraper):
         error_container = self.driver.find_elements(By.ID, 'error-container')
         return len(error_container) > 0 and error_container[0].is_displayed()
 
+    def export_cookies(self) -> List[dict]:
+        """
+        Collects the logged in session cookies for substack.com and the publication's own domain.
+        """
+        cookies = {}
+        for url in ("https://substack.com/", self.base_substack_url):
+            self.driver.get(url)
+            for cookie in self.driver.get_cookies():
+                cookies[(cookie.get("domain"), cookie["name"])] = cookie
+        return list(cookies.values())
+
+    @staticmethod
+    def import_cookies(driver: webdriver.Remote, cookies: List[dict]) -> None:
+        """
+        Adds session cookies to another driver so it is logged in without running login() again.
+        Selenium only accepts cookies for the page currently loaded, so each domain is visited first.
+        """
+        by_domain = {}
+        for cookie in cookies:
+            by_domain.setdefault(cookie.get("domain", "").lstrip("."), []).append(cookie)
+
+        for domain, domain_cookies in by_domain.items():
+            driver.get(f"https://{domain}/")
+            for cookie in domain_cookies:
+                cookie = {key: value for key, value in cookie.items() if key != "sameSite"}
+                if "expiry" in cookie:
+                    cookie["expiry"] = int(cookie["expiry"])
+                driver.add_cookie(cookie)
+
+    def import_cookies_to_session(self, cookies: List[dict]) -> None:
+        """
+        Copies the browser's session cookies and user agent into the requests session, so it is
+        served the same authenticated pages as the browser.
+        """
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/")
+            )
+        self.session.headers["User-Agent"] = self.driver.execute_script("return navigator.userAgent")
+
     def get_url_soup(self, url: str) -> BeautifulSoup:
         """
-        Gets soup from URL using logged in selenium driver
+        Gets soup from URL over HTTP with the session cookies when http_fetch is set, falling back to
+        a browser for pages that still show the paywall
+        """
+        if self.http_fetch:
+            try:
+                page = self.session.get(url)
+                soup = self.parse_page(page.content)
+                if page.ok and not self.is_paywalled(soup):
+                    self.archive_page(url, page.content)
+                    return soup
+            except requests.RequestException as e:
+                print(f"HTTP fetch failed for {url}, retrying in browser: {e}")
+        return self.get_browser_soup(url)
+
+    def get_browser_soup(self, url: str) -> BeautifulSoup:
+        """
+        Gets soup from URL using one of the idle logged in selenium drivers
         """
+        driver = self.idle_drivers.get()
         try:
-            self.driver.get(url)
-            return BeautifulSoup(self.driver.page_source, "html.parser")
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(urlparse(url).netloc)
+            driver.get(url)
+            page_source = driver.page_source
+            self.archive_page(url, page_source.encode("utf-8"))
+            return self.parse_page(page_source)
         except Exception as e:
             raise ValueError(f"Error fetching page: {e}") from e
+        finally:
+            self.idle_drivers.put(driver)
+
+
+class ArchiveSubstackScraper(BaseSubstackScraper):
+    """
+    Re-runs extraction and conversion on the pages kept in the page archive, without any network access.
+    Every archived post is converted again, overwriting its markdown and html files.
+    """
+
+    def __init__(
+        self,
+        base_substack_url: str,
+        md_save_dir: str,
+        html_save_dir: str,
+        workers: int = NUM_WORKERS,
+        assets: Optional[AssetMirror] = None,
+        parser: str = HTML_PARSER,
+        restrict_parsing: bool = False,
+        direct_html: bool = False,
+        md_converter: str = "html2text",
+        convert_processes: int = 0,
+        convert_cache: Optional[ConvertCache] = None
+    ):
+        super().__init__(
+            base_substack_url, md_save_dir, html_save_dir, workers=workers, assets=assets, parser=parser,
+            restrict_parsing=restrict_parsing, direct_html=direct_html, md_converter=md_converter,
+            convert_processes=convert_processes, convert_cache=convert_cache
+        )
+
+    def get_all_post_urls(self) -> List[str]:
+        """
+        Lists the archived posts, restoring the sitemap lastmod they were fetched at.
+        """
+        urls = []
+        for entry in self.archive.entries():
+            if entry["lastmod"]:
+                self.post_lastmod[entry["url"]] = entry["lastmod"]
+            urls.append(entry["url"])
+        urls = self.filter_urls(list(dict.fromkeys(urls)), self.keywords)
+        print(f"Found {len(urls)} posts in {self.archive.data_path}")
+        return urls
+
+    def select_posts_to_fetch(self, urls: List[str]) -> List[str]:
+        return urls
+
+    def fetch_post_data(self, url: str) -> Optional[PostData]:
+        """
+        Extracts a post from its archived JSON API response if there is one, otherwise from its archived page.
+        """
+        api_content = self.archive.read(url, kind="api")
+        if api_content is not None:
+            post_data = self.extract_api_post_data(json.loads(api_content))
+            if post_data is not None:
+                return post_data
+
+        soup = self.get_url_soup(url)
+        if soup is None:
+            return None
+        return self.extract_post_data(soup)
+
+    def fetch_post_content(self, url: str) -> Optional[RawPost]:
+        """
+        Reads a post's archived JSON API response if it has the full body, otherwise its archived page.
+        """
+        api_content = self.archive.read(url, kind="api")
+        if api_content is not None and self.api_post_has_body(json.loads(api_content)):
+            return "api", api_content
+
+        content = self.get_url_content(url)
+        return ("page", content) if content is not None else None
+
+    def get_url_content(self, url: str) -> Optional[bytes]:
+        """
+        Gets the archived page of a URL
+        """
+        content = self.archive.read(url)
+        if content is None:
+            print(f"Not in archive: {url}")
+        return content
+
+    def get_url_soup(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Gets soup from the archived page of a URL
+        """
+        content = self.get_url_content(url)
+        if content is None:
+            return None
+        soup = self.parse_page(content)
+        if self.is_paywalled(soup):
+            print(f"Skipping premium article: {url}")
+            return None
+        return soup
 
 
 def parse_args() -> argparse.Namespace:
@@ -603,13 +1489,164 @@ def parse_args() -> argparse.Namespace:
         help="Optional: Specify a custom user agent for selenium browser automation. Useful for "
         "passing captcha in headless mode",
     )
+    parser.add_argument(
+        "--browsers",
+        type=int,
+        default=NUM_BROWSERS,
+        help="Number of browsers the premium scraper fetches posts with. They share one login. Default: 1",
+    )
+    parser.add_argument(
+        "--http-fetch",
+        action="store_true",
+        help="Premium only: log in with Selenium once, then fetch posts over HTTP with the session cookies. "
+        "The browser is only used for posts that still show the paywall.",
+    )
+    parser.add_argument(
+        "--session-file",
+        type=str,
+        default=SESSION_FILE,
+        help="Premium only: file the logged in session cookies are saved to and reused from on the next run. "
+        "Pass an empty string to always log in.",
+    )
     parser.add_argument(
         "--html-directory",
         type=str,
         help="The directory to save scraped posts as HTML files.",
     )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="requests",
+        choices=["requests", "asyncio"],
+        help="Fetch engine for free posts: thread-based requests (default) or asyncio with aiohttp. The asyncio "
+        "engine doesn't support --api, --http-cache, --convert-processes, or --workers outside --batch.",
+    )
+    parser.add_argument(
+        "--api",
+        action="store_true",
+        help="Fetch posts from the publication's JSON API (/api/v1/posts/<slug>) instead of scraping the page, "
+        "falling back to the HTML page for posts the API can't serve.",
+    )
+    parser.add_argument(
+        "--http-cache",
+        action="store_true",
+        help="Keep fetched pages in an on-disk cache (.http_cache) and revalidate them with conditional "
+        "requests, so unchanged sitemaps and posts are not downloaded again.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=MAX_CACHE_BYTES // (1024 * 1024),
+        help="Maximum size of the HTTP cache in MB. Least recently used pages are evicted first. Default: 512",
+    )
+    parser.add_argument(
+        "--parser",
+        type=str,
+        default=HTML_PARSER,
+        choices=PARSERS,
+        help="HTML parser for post pages. lxml is faster but must be installed. Default: html.parser",
+    )
+    parser.add_argument(
+        "--restrict-parsing",
+        action="store_true",
+        help="Only parse the parts of a post page that are extracted (title, subtitle, date, metadata, likes and "
+        "content), skipping scripts, navigation and comments.",
+    )
+    parser.add_argument(
+        "--md-converter",
+        type=str,
+        default="html2text",
+        choices=MD_CONVERTERS,
+        help="HTML to Markdown converter. fast walks an lxml tree and produces html2text's output several times "
+        "faster, falling back to html2text for markup it doesn't support. Default: html2text",
+    )
+    parser.add_argument(
+        "--convert-processes",
+        type=int,
+        nargs="?",
+        const=CONVERT_PROCESSES,
+        default=0,
+        help="Parse and convert posts in a pool of this many processes (one per core if no number is given), "
+        "overlapping with fetching. Not used by the premium scraper or the asyncio engine. Default: 0 (off)",
+    )
+    parser.add_argument(
+        "--convert-cache",
+        action="store_true",
+        help="Keep converted markdown and html in an on-disk cache (.convert_cache), keyed by the content they "
+        "were converted from, so unchanged posts aren't converted again on re-syncs and --from-archive runs.",
+    )
+    parser.add_argument(
+        "--convert-cache-size",
+        type=int,
+        default=MAX_CONVERT_CACHE_BYTES // (1024 * 1024),
+        help="Maximum size of the conversion cache in MB. Least recently used entries are evicted first. "
+        "Default: 256",
+    )
+    parser.add_argument(
+        "--direct-html",
+        action="store_true",
+        help="Write the .html files straight from the post's (sanitized) content instead of converting the "
+        "markdown back to html.",
+    )
+    parser.add_argument(
+        "--mirror-assets",
+        action="store_true",
+        help="Download the images of every post into substack_assets/ (stored once per unique image) and link "
+        "the markdown and html files to the local copies.",
+    )
+    parser.add_argument(
+        "--no-archive",
+        action="store_true",
+        help="Don't keep fetched pages in the compressed page archive (archive/<writer>.pages.gz).",
+    )
+    parser.add_argument(
+        "--from-archive",
+        action="store_true",
+        help="Convert the posts kept in the page archive again, offline, instead of fetching them. "
+        "Existing markdown and html files are overwritten.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Pick up an interrupted run from its crawl journal (data/<writer>_journal.jsonl), merging the posts "
+        "it already saved with this run's at the end. Without it, they are merged into the catalog before the "
+        "run starts. Either way they aren't fetched again.",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=MAX_RATE,
+        help="Highest request rate per host (requests/sec) the adaptive rate limiter ramps up to. It backs off "
+        "on 429/503 responses and retries them with jittered backoff. 0 disables rate limiting. Default: 20",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of posts to fetch concurrently over a shared keep-alive session. With --batch, this is the "
+        "budget shared by all publications. Default: 1 (16 with --batch)",
+    )
+    parser.add_argument(
+        "--batch",
+        type=str,
+        help="Path to a file listing Substack URLs, one per line, to scrape concurrently instead of a single --url. "
+        "Each publication is saved to its own directories and JSON file.",
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.restrict_parsing and not RESTRICTED_PARSING:
+        parser.error("--restrict-parsing needs beautifulsoup4 4.13 or later (pip install -r requirements.txt)")
+    if args.engine == "asyncio" and not args.premium and not args.from_archive:
+        # The asyncio engine has its own connection limits and doesn't fetch through the API, cache or process pool
+        unsupported = [option for option, given in (
+            ("--api", args.api),
+            ("--http-cache", args.http_cache),
+            ("--workers", args.workers is not None and not args.batch),
+            ("--convert-processes", args.convert_processes),
+        ) if given]
+        if unsupported:
+            parser.error(f"--engine asyncio doesn't support {', '.join(unsupported)}")
+    return args
 
 
 def main():
@@ -621,7 +1658,82 @@ def main():
     if args.html_directory is None:
         args.html_directory = BASE_HTML_DIR
 
-    if args.url:
+    http_cache = HttpCache(max_bytes=args.cache_size * 1024 * 1024) if args.http_cache else None
+    rate_limiter = AdaptiveRateLimiter(max_rate=args.max_rate) if args.max_rate > 0 else None
+    convert_cache = ConvertCache(max_bytes=args.convert_cache_size * 1024 * 1024) if args.convert_cache else None
+    assets = AssetMirror(
+        create_session(pool_size=ASSET_WORKERS, cache=http_cache, rate_limiter=rate_limiter)
+    ) if args.mirror_assets else None
+
+    try:
+        run_scrapers(args, http_cache, rate_limiter, convert_cache, assets)
+    finally:
+        if assets is not None:
+            assets.close()
+
+
+def run_scrapers(
+    args: argparse.Namespace,
+    http_cache: Optional[HttpCache],
+    rate_limiter: Optional[AdaptiveRateLimiter],
+    convert_cache: Optional[ConvertCache],
+    assets: Optional[AssetMirror]
+) -> None:
+    """
+    Runs the scraper (or the batch) the command line asks for, with the caches and mirror main created.
+    """
+    if args.batch:
+        from batch_scraper import BATCH_WORKERS, ascrape_batch, read_publications, scrape_batch
+        urls = read_publications(args.batch)
+        workers = args.workers or BATCH_WORKERS
+        if args.engine == "asyncio" and not args.premium:
+            asyncio.run(ascrape_batch(
+                urls, args.directory, args.html_directory, workers=workers, num_posts_to_scrape=args.number,
+                resume=args.resume, rate_limiter=rate_limiter, archive=not args.no_archive, assets=assets,
+                parser=args.parser, restrict_parsing=args.restrict_parsing, direct_html=args.direct_html,
+                md_converter=args.md_converter, convert_cache=convert_cache
+            ))
+        else:
+            premium_options = dict(
+                browser=args.browser,
+                headless=args.headless,
+                browser_path=args.browser_path,
+                driver_path=args.driver_path,
+                user_agent=args.user_agent,
+                browsers=args.browsers,
+                http_fetch=args.http_fetch,
+                session_file=args.session_file
+            ) if args.premium else {}
+            scrape_batch(
+                urls, args.directory, args.html_directory, workers=workers, num_posts_to_scrape=args.number,
+                resume=args.resume, premium=args.premium, use_api=args.api, http_cache=http_cache,
+                rate_limiter=rate_limiter, archive=not args.no_archive, assets=assets, parser=args.parser,
+                restrict_parsing=args.restrict_parsing, direct_html=args.direct_html, md_converter=args.md_converter,
+                convert_processes=args.convert_processes, convert_cache=convert_cache, **premium_options
+            )
+        return
+
+    args.workers = args.workers or NUM_WORKERS
+
+    if args.from_archive:
+        scraper = ArchiveSubstackScraper(
+            args.url or BASE_SUBSTACK_URL,
+            md_save_dir=args.directory,
+            html_save_dir=args.html_directory,
+            workers=args.workers,
+            assets=assets,
+            parser=args.parser,
+            restrict_parsing=args.restrict_parsing,
+            direct_html=args.direct_html,
+            md_converter=args.md_converter,
+            convert_processes=args.convert_processes,
+            convert_cache=convert_cache
+        )
+        try:
+            scraper.scrape_posts(args.number, resume=args.resume)
+        finally:
+            scraper.close()
+    elif args.url:
         if args.premium:
             scraper = PremiumSubstackScraper(
                 args.url,
@@ -631,15 +1743,60 @@ def main():
                 driver_path=args.driver_path,
                 user_agent=args.user_agent,
                 md_save_dir=args.directory,
-                html_save_dir=args.html_directory
+                html_save_dir=args.html_directory,
+                workers=args.workers,
+                browsers=args.browsers,
+                http_fetch=args.http_fetch,
+                session_file=args.session_file,
+                use_api=args.api,
+                http_cache=http_cache,
+                rate_limiter=rate_limiter,
+                archive=not args.no_archive,
+                assets=assets,
+                parser=args.parser,
+                restrict_parsing=args.restrict_parsing,
+                direct_html=args.direct_html,
+                md_converter=args.md_converter,
+                convert_processes=args.convert_processes,
+                convert_cache=convert_cache
+            )
+        elif args.engine == "asyncio":
+            from async_scraper import AsyncSubstackScraper
+            scraper = AsyncSubstackScraper(
+                args.url,
+                md_save_dir=args.directory,
+                html_save_dir=args.html_directory,
+                rate_limiter=rate_limiter,
+                archive=not args.no_archive,
+                assets=assets,
+                parser=args.parser,
+                restrict_parsing=args.restrict_parsing,
+                direct_html=args.direct_html,
+                md_converter=args.md_converter,
+                convert_cache=convert_cache
             )
         else:
             scraper = SubstackScraper(
                 args.url,
                 md_save_dir=args.directory,
-                html_save_dir=args.html_directory
+                html_save_dir=args.html_directory,
+                workers=args.workers,
+                use_api=args.api,
+                http_cache=http_cache,
+                rate_limiter=rate_limiter,
+                archive=not args.no_archive,
+                assets=assets,
+                parser=args.parser,
+                restrict_parsing=args.restrict_parsing,
+                direct_html=args.direct_html,
+                md_converter=args.md_converter,
+                convert_processes=args.convert_processes,
+                convert_cache=convert_cache
             )
-        scraper.scrape_posts(args.number)
+        try:
+            scraper.scrape_posts(args.number, resume=args.resume)
+        finally:
+            scraper.close()
 
     else:  # Use the hardcoded values at the top of the file
         if USE_PREMIUM:
@@ -651,15 +1808,45 @@ def main():
                 driver_path=args.driver_path,
                 user_agent=args.user_agent,
                 md_save_dir=args.directory,
-                html_save_dir=args.html_directory
+                html_save_dir=args.html_directory,
+                workers=args.workers,
+                browsers=args.browsers,
+                http_fetch=args.http_fetch,
+                session_file=args.session_file,
+                use_api=args.api,
+                http_cache=http_cache,
+                rate_limiter=rate_limiter,
+                archive=not args.no_archive,
+                assets=assets,
+                parser=args.parser,
+                restrict_parsing=args.restrict_parsing,
+                direct_html=args.direct_html,
+                md_converter=args.md_converter,
+                convert_processes=args.convert_processes,
+                convert_cache=convert_cache
             )
         else:
             scraper = SubstackScraper(
                 base_substack_url=BASE_SUBSTACK_URL,
                 md_save_dir=args.directory,
-                html_save_dir=args.html_directory
+                html_save_dir=args.html_directory,
+                workers=args.workers,
+                use_api=args.api,
+                http_cache=http_cache,
+                rate_limiter=rate_limiter,
+                archive=not args.no_archive,
+                assets=assets,
+                parser=args.parser,
+                restrict_parsing=args.restrict_parsing,
+                direct_html=args.direct_html,
+                md_converter=args.md_converter,
+                convert_processes=args.convert_processes,
+                convert_cache=convert_cache
             )
-        scraper.scrape_posts(num_posts_to_scrape=NUM_POSTS_TO_SCRAPE)
+        try:
+            scraper.scrape_posts(num_posts_to_scrape=NUM_POSTS_TO_SCRAPE, resume=args.resume)
+        finally:
+            scraper.close()
 
 
 if __name__ == "__main__":
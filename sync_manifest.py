@@ -0,0 +1,107 @@
+"""
+Incremental sync manifest.
+
+Records, for every downloaded post, its slug, the sitemap <lastmod> it was fetched at, a hash
+of the saved markdown and when it was fetched. Comparing the sitemap against the manifest
+tells a sync exactly which posts are new and which were edited since the last run, without
+opening any of the files already on disk.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+MANIFEST_DIR: str = "data"
+
+
+class SyncManifest:
+    def __init__(self, path: str):
+        self.path: str = path
+        self.entries: Dict[str, dict] = {}  # slug -> {"url", "lastmod", "content_hash", "fetched_at"}
+        self.load()
+
+    @classmethod
+    def for_writer(cls, writer_name: str, directory: str = MANIFEST_DIR) -> "SyncManifest":
+        """
+        Opens the manifest kept next to a writer's JSON data.
+        """
+        return cls(os.path.join(directory, f"{writer_name}_manifest.json"))
+
+    @staticmethod
+    def slug_from_url(url: str) -> str:
+        """
+        Gets a post's slug, the last segment of its URL path.
+        """
+        return urlparse(url).path.rstrip("/").split("/")[-1]
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def save(self) -> None:
+        """
+        Writes the manifest atomically, so an interrupted save never leaves a truncated file.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url: str) -> Optional[dict]:
+        return self.entries.get(self.slug_from_url(url))
+
+    def is_new(self, url: str) -> bool:
+        return self.slug_from_url(url) not in self.entries
+
+    def is_changed(self, url: str, lastmod: Optional[str]) -> bool:
+        """
+        Checks whether a known post's sitemap lastmod moved on since it was fetched.
+        Posts without a lastmod on either side are treated as unchanged.
+        """
+        entry = self.get(url)
+        return entry is not None and bool(lastmod) and bool(entry.get("lastmod")) and entry["lastmod"] != lastmod
+
+    def record(self, url: str, lastmod: Optional[str], content: str, fetched_at: Optional[str] = None) -> bool:
+        """
+        Records a fetched post. Returns whether its content differs from the previously recorded version.
+        """
+        slug = self.slug_from_url(url)
+        content_hash = self.hash_content(content)
+        previous = self.entries.get(slug)
+        self.entries[slug] = {
+            "url": url,
+            "lastmod": lastmod,
+            "content_hash": content_hash,
+            "fetched_at": fetched_at or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        return previous is None or previous.get("content_hash") != content_hash
+
+    def restore(self, entry: dict) -> None:
+        """
+        Puts back an entry saved elsewhere, such as the crawl journal of an interrupted run.
+        """
+        self.entries[self.slug_from_url(entry["url"])] = entry
+
+    def adopt(self, url: str, lastmod: Optional[str], filepath: str) -> None:
+        """
+        Records a post that was downloaded before the manifest existed, from the file on disk,
+        so upgrading an existing library doesn't re-download it.
+        """
+        with open(filepath, 'r', encoding='utf-8') as file:
+            content = file.read()
+        fetched_at = datetime.fromtimestamp(os.path.getmtime(filepath), timezone.utc).isoformat(timespec="seconds")
+        self.record(url, lastmod, content, fetched_at=fetched_at)
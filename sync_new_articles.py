@@ -6,139 +6,87 @@ Complete workflow to sync new articles:
 3. Classify (tags, sponsored, course ads)
 4. Regenerate HTML interface
 """
-import requests
-from xml.etree import ElementTree as ET
-import json
 import os
 import sys
-from substack_scraper import PremiumSubstackScraper, generate_html_file
-import re
+from ad_detector import is_course_ad_title, sponsored_fields
+from catalog import Catalog
+from substack_scraper import PremiumSubstackScraper, create_session, extract_main_part, generate_html_file
+from http_cache import HttpCache
+from rate_limiter import AdaptiveRateLimiter
+from sitemap import SITEMAP_ERRORS, iter_sitemap
+from sync_manifest import SyncManifest
+from tagging import extract_tags
+from update_sponsored_flags import check_if_sponsored
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Import classification functions
-def is_sponsored_content(md_filepath):
-    """Check if markdown file contains sponsored content"""
-    try:
-        with open(md_filepath, 'r', encoding='utf-8') as f:
-            content = f.read().lower()
-            return "sponsored)" in content or "(sponsored)" in content
-    except:
-        return False
-
-def is_course_ad_title(title):
-    """Check if title indicates course advertisement"""
-    title_lower = title.lower()
-    patterns = [
-        'become an ai engineer',
-        'last chance to enroll',
-        'last call: enrollment',
-        'cohort-based course',
-    ]
-    has_promotion = any(p in title_lower for p in ['last chance', 'last call', 'new launch', '🚀'])
-    has_cohort = 'cohort' in title_lower or 'enroll' in title_lower
-    return (has_promotion and has_cohort) or any(p in title_lower for p in patterns)
-
-def extract_tags_from_title(title):
-    """Extract relevant tags from article title"""
-    TAG_PATTERNS = {
-        'system-design': ['system design', 'architecture', 'scalability', 'distributed', 'microservices', 'pattern'],
-        'databases': ['database', 'sql', 'nosql', 'mongodb', 'postgres', 'redis', 'cassandra', 'mysql', 'dynamo', 'sharding', 'transaction'],
-        'backend': ['backend', 'api', 'rest', 'graphql', 'server', 'endpoint'],
-        'cloud': ['aws', 'azure', 'gcp', 'cloud', 's3', 'lambda', 'kubernetes', 'docker', 'container', 'k8s'],
-        'ai-ml': ['ai', 'machine learning', 'ml', 'llm', 'gpt', 'neural', 'model', 'claude', 'openai', 'anthropic', 'gemini', 'agent', 'rag', 'clip', 'tensor'],
-        'devops': ['devops', 'ci/cd', 'deployment', 'jenkins', 'github actions', 'terraform', 'ansible'],
-        'networking': ['network', 'http', 'tcp', 'cdn', 'dns', 'load balancer', 'proxy', 'websocket', 'protocol'],
-        'security': ['security', 'authentication', 'oauth', 'jwt', 'encryption', 'ssl', 'tls', 'auth', 'sso'],
-        'performance': ['performance', 'optimization', 'caching', 'cache', 'scaling', 'latency', 'throughput', 'speed'],
-        'frontend': ['frontend', 'react', 'vue', 'angular', 'ui', 'ux', 'javascript', 'css', 'web'],
-        'data': ['data', 'analytics', 'etl', 'pipeline', 'kafka', 'spark', 'stream', 'processing', 'message broker', 'replication'],
-        'mobile': ['mobile', 'ios', 'android', 'app'],
-        'interview': ['interview', 'coding pattern', 'leetcode', 'algorithm', 'cheat sheet'],
-        'case-study': [],
-    }
-
-    text = title.lower()
-    tags = []
-
-    # Case study detection
-    case_study_patterns = [
-        r'\bhow\s+\w+\s+(built|scaled|handles|manages|migrated|uses|transformed|debugging)',
-        r'\b(netflix|uber|google|amazon|meta|facebook|twitter|airbnb|spotify|linkedin|dropbox|instagram|discord|reddit|slack|zoom|figma|stripe|shopify|tinder|openai|anthropic)\b'
-    ]
-    if any(re.search(pattern, text) for pattern in case_study_patterns):
-        tags.append('case-study')
-
-    # Check other tags
-    for tag, patterns in TAG_PATTERNS.items():
-        if tag == 'case-study':
-            continue
-        if any(pattern in text for pattern in patterns):
-            tags.append(tag)
-
-    return tags[:5] if tags else ['general']
-
-def get_new_articles():
-    """Find articles not in our library"""
+def get_new_articles(http_cache=None, rate_limiter=None):
+    """
+    Find articles not in our library, and articles edited since they were downloaded.
+    Returns (new urls, edited urls, library size, the sitemap's post entries)
+    """
     blog_url = os.getenv('SUBSTACK_BLOG_URL')
     if not blog_url:
         print("❌ Error: SUBSTACK_BLOG_URL not set in .env file")
         print("Please add SUBSTACK_BLOG_URL=https://your-blog.substack.com to your .env file")
         sys.exit(1)
 
-    # Fetch sitemap
+    # Stream the sitemap (following sitemap indexes)
     sitemap_url = f"{blog_url}/sitemap.xml"
-    response = requests.get(sitemap_url)
-    root = ET.fromstring(response.content)
-
-    urls = [element.text for element in root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
-    post_urls = [url for url in urls if '/p/' in url and not any(kw in url for kw in ['about', 'archive', 'podcast'])]
+    entries = []
+    try:
+        entries.extend(iter_sitemap(create_session(cache=http_cache, rate_limiter=rate_limiter), sitemap_url))
+    except SITEMAP_ERRORS as e:
+        print(f"❌ Error reading sitemap at {sitemap_url}: {e}")
+    post_entries = [(url, lastmod) for url, lastmod in entries
+                    if '/p/' in url and not any(kw in url for kw in ['about', 'archive', 'podcast'])]
 
     # Load existing articles
-    with open('data/blog.json', 'r') as f:
-        essays = json.load(f)
+    with Catalog.for_writer('blog') as catalog:
+        existing_slugs = catalog.slugs()
+        duplicate_slugs = catalog.duplicate_slugs()
 
-    existing_slugs = {essay['file_link'].split('/')[-1].replace('.md', '') for essay in essays}
-
-    # Find new URLs
+    # Find new URLs, and known URLs whose sitemap lastmod moved on since they were fetched.
+    # Posts removed as duplicates of another entry stay out.
+    manifest = SyncManifest.for_writer(extract_main_part(blog_url))
     new_urls = []
-    for url in post_urls:
+    changed_urls = []
+    for url, lastmod in post_entries:
         slug = url.split('/p/')[-1]
+        if slug in duplicate_slugs:
+            continue
         if slug not in existing_slugs:
             new_urls.append(url)
+        elif manifest.is_changed(url, lastmod):
+            changed_urls.append(url)
 
-    return new_urls, len(essays)
+    return new_urls, changed_urls, len(existing_slugs), post_entries
 
 def classify_new_articles():
     """Add classification to newly downloaded articles"""
-    with open('data/blog.json', 'r') as f:
-        essays = json.load(f)
+    catalog = Catalog.for_writer('blog')
 
-    classified_count = 0
-    for essay in essays:
-        # Skip already classified
-        if 'tags' in essay and essay['tags']:
-            continue
+    updates = []
+    # Already classified articles have tags
+    for essay in catalog.untagged():
+        fields = {}
 
         # Check sponsored
-        if 'is_sponsored' not in essay:
-            essay['is_sponsored'] = is_sponsored_content(essay['file_link'])
+        if 'sponsored_line' not in essay:
+            fields.update(sponsored_fields(check_if_sponsored(essay['file_link'])))
 
         # Check course ad
         if 'is_course_ad' not in essay:
-            essay['is_course_ad'] = is_course_ad_title(essay['title'])
+            fields['is_course_ad'] = is_course_ad_title(essay['title'])
 
         # Add tags
-        if 'tags' not in essay or not essay['tags']:
-            essay['tags'] = extract_tags_from_title(essay['title'])
-            classified_count += 1
-
-    # Write back
-    with open('data/blog.json', 'w') as f:
-        json.dump(essays, f, ensure_ascii=False, indent=4)
+        fields['tags'] = extract_tags(essay['title'])
+        updates.append((essay, fields))
 
+    classified_count = catalog.update_many(updates)
+    catalog.close()
     return classified_count
 
 def main():
@@ -148,33 +96,50 @@ def main():
         print("Please add SUBSTACK_BLOG_URL=https://your-blog.substack.com to your .env file")
         sys.exit(1)
 
+    # Unchanged sitemaps and pages are revalidated instead of downloaded again
+    http_cache = HttpCache()
+    # Sitemap and post requests share one per-host budget that backs off when Substack throttles
+    rate_limiter = AdaptiveRateLimiter()
+
     print("🔍 Checking for new articles...")
-    new_urls, current_count = get_new_articles()
+    new_urls, changed_urls, current_count, post_entries = get_new_articles(http_cache, rate_limiter)
 
-    if not new_urls:
+    if not new_urls and not changed_urls:
+        http_cache.flush()
+        print(http_cache.report())
         print("✓ No new articles found. Library is up to date!")
         return
 
     print(f"\n📥 Found {len(new_urls)} new articles:")
     for url in new_urls:
         print(f"   {url}")
+    if changed_urls:
+        print(f"\n✏️  Found {len(changed_urls)} edited articles:")
+        for url in changed_urls:
+            print(f"   {url}")
 
     print(f"\n⚙️  Downloading with premium scraper (Chrome)...")
 
-    # Create scraper
+    # Create scraper, reusing the sitemap read above (and its lastmods) instead of fetching it again
     scraper = PremiumSubstackScraper(
         f"{blog_url}/",
         md_save_dir="substack_md_files",
         html_save_dir="substack_html_pages",
         browser='chrome',
-        headless=False
+        headless=False,
+        http_cache=http_cache,
+        rate_limiter=rate_limiter,
+        sitemap_entries=post_entries
     )
 
-    # Override URLs to only download new ones
-    scraper.post_urls = new_urls
+    # Override URLs to only download new and edited ones
+    scraper.post_urls = new_urls + changed_urls
 
     # Download
-    scraper.scrape_posts(num_posts_to_scrape=0)
+    try:
+        scraper.scrape_posts(num_posts_to_scrape=0)
+    finally:
+        scraper.close()
 
     print(f"\n🏷️  Classifying new articles...")
     classified = classify_new_articles()
@@ -184,6 +149,7 @@ def main():
 
     print(f"\n✅ Sync complete!")
     print(f"   - Downloaded: {len(new_urls)} new articles")
+    print(f"   - Refreshed: {len(changed_urls)} edited articles")
     print(f"   - Classified: {classified} articles")
     print(f"   - Total library: {current_count + len(new_urls)} articles")
     print(f"\n💡 Open substack_html_pages/blog.html to view!")
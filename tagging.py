@@ -0,0 +1,152 @@
+"""
+Topic tagging of essays, shared by every script that tags.
+
+A text gets the tags of the terms it contains as whole words (optionally plural), so 'ai' no
+longer matches "maintain" and 'app' no longer matches "approach". The terms of every tag are
+compiled once into an index from each word (and its plurals) to its tags, and a whole document
+is tagged in one pass that splits it into its set of words, followed by set lookups, instead
+of one substring search per term. Multi-word terms and regexes are only matched, in place, in
+texts that have their leading words. tag_corpus tags many texts across a pool of processes.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+TAG_PATTERNS: Dict[str, List[str]] = {
+    'system-design': ['system design', 'architecture', 'architectural', 'scalability', 'distributed', 'microservices',
+                      'pattern'],
+    'databases': ['database', 'sql', 'nosql', 'mongodb', 'postgres', 'redis', 'cassandra', 'mysql', 'oracle', 'dynamo',
+                  'sharding', 'transaction'],
+    'backend': ['backend', 'api', 'rest', 'graphql', 'server', 'endpoint'],
+    'cloud': ['aws', 'azure', 'gcp', 'cloud', 's3', 'lambda', 'kubernetes', 'docker', 'container', 'k8s'],
+    'ai-ml': ['ai', 'machine learning', 'ml', 'llm', 'gpt', 'neural', 'model', 'claude', 'openai', 'anthropic', 'gemini',
+              'agent', 'rag', 'clip', 'tensor', 'tpu', 'evals'],
+    'devops': ['devops', 'ci/cd', 'deployment', 'jenkins', 'github actions', 'terraform', 'ansible'],
+    'networking': ['network', 'networking', 'http', 'tcp', 'cdn', 'dns', 'load balancer', 'proxy', 'websocket',
+                   'protocol'],
+    'security': ['security', 'authentication', 'oauth', 'jwt', 'encryption', 'ssl', 'tls', 'auth', 'sso'],
+    'performance': ['performance', 'optimization', 'caching', 'cache', 'scaling', 'latency', 'throughput', 'speed'],
+    'frontend': ['frontend', 'react', 'vue', 'angular', 'ui', 'ux', 'javascript', 'css', 'web'],
+    'data': ['data', 'analytics', 'etl', 'pipeline', 'kafka', 'spark', 'stream', 'processing', 'message broker',
+             'replication', 'storage'],
+    'mobile': ['mobile', 'ios', 'android', 'app'],
+    'interview': ['interview', 'coding pattern', 'leetcode', 'algorithm', 'cheat sheet'],
+    'case-study': ['netflix', 'uber', 'google', 'amazon', 'meta', 'facebook', 'twitter', 'airbnb', 'spotify', 'linkedin',
+                   'dropbox', 'instagram', 'discord', 'reddit', 'slack', 'zoom', 'figma', 'stripe', 'shopify', 'paypal',
+                   'tinder', 'doordash', 'lyft', 'pinterest', 'snap', 'tiktok', 'bytedance', 'grab', 'nubank', 'halo',
+                   'openai', 'anthropic'],
+}
+
+# Tags found by regexes rather than terms, as (the word the regex starts with, regex)
+REGEX_PATTERNS: Dict[str, List[Tuple[str, str]]] = {
+    'case-study': [('how', r'how\s+\w+\s+(?:built|scaled|handles|manages|migrated|uses|transformed|debugging)')],
+}
+
+MAX_TAGS: int = 5  # Tags kept per essay, in the order of TAG_PATTERNS
+DEFAULT_TAGS: List[str] = ['general']  # Tags of an essay no pattern matches
+PLURAL: str = r"(?:e?s)?"  # Suffix a term may have and still match
+TAG_PROCESSES: int = os.cpu_count() or 1  # Default pool size of tag_corpus: one process per core
+TAG_CHUNKSIZE: int = 64  # Texts sent to a tag_corpus process at a time
+
+WORD = re.compile(r"\w+")
+
+
+def text_words(text: str) -> Set[str]:
+    """
+    Gets the set of words (runs of \\w characters) of a text.
+    """
+    words = set()
+    for token in set(text.split()):
+        if token.isalnum():
+            words.add(token)
+        else:
+            words.update(WORD.findall(token))
+    return words
+
+
+def word_starts(text: str, word: str) -> Iterator[int]:
+    """
+    Yields the positions where word occurs in text at the start of a word.
+    """
+    start = text.find(word)
+    while start != -1:
+        if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == '_'):
+            yield start
+        start = text.find(word, start + 1)
+
+
+class Tagger:
+    """
+    Tags texts with every tag whose terms (or regexes) they contain.
+    """
+
+    def __init__(self, tag_patterns: Dict[str, List[str]] = TAG_PATTERNS,
+                 regex_patterns: Dict[str, List[Tuple[str, str]]] = REGEX_PATTERNS):
+        # Tag order: the case study regexes come first, as they always have
+        self.order: Dict[str, int] = {tag: i for i, tag in enumerate(dict.fromkeys([*regex_patterns, *tag_patterns]))}
+
+        # Single word terms, by word and plurals: found by set lookups
+        self.word_tags: Dict[str, Set[str]] = {}
+        # Multi-word terms and regexes, as (words the text must have, literal start, pattern, tag):
+        # matched at the word starts of their literal start, in texts that have their words
+        self.matchers: List[Tuple[List[str], str, re.Pattern, str]] = []
+        for tag, terms in tag_patterns.items():
+            for term in terms:
+                term = term.lower()
+                words = WORD.findall(term)
+                if words == [term]:
+                    for form in (term, f"{term}s", f"{term}es"):
+                        self.word_tags.setdefault(form, set()).add(tag)
+                else:
+                    self.add_matcher(words[:-1] or words, term, re.escape(term), tag)
+        for tag, patterns in regex_patterns.items():
+            for word, regex in patterns:
+                self.add_matcher([word], word, regex, tag)
+
+    def add_matcher(self, words: List[str], start: str, regex: str, tag: str) -> None:
+        self.matchers.append((words, start, re.compile(rf"(?<!\w)(?:{regex}){PLURAL}(?!\w)"), tag))
+
+    def tags(self, text: str) -> List[str]:
+        """
+        Gets the tags of a text, in tag order, at most MAX_TAGS of them (DEFAULT_TAGS if none).
+        """
+        text = text.lower()
+        words = text_words(text)
+        found = set()
+        for word in words & self.word_tags.keys():
+            found |= self.word_tags[word]
+        for matcher_words, start, pattern, tag in self.matchers:
+            if tag in found or not all(word in words for word in matcher_words):
+                continue
+            if any(pattern.match(text, position) for position in word_starts(text, start)):
+                found.add(tag)
+        return sorted(found, key=self.order.__getitem__)[:MAX_TAGS] or list(DEFAULT_TAGS)
+
+
+TAGGER = Tagger()
+
+
+def extract_tags(*texts: str) -> List[str]:
+    """
+    Gets the tags of an essay from its texts (title, subtitle, content...).
+    """
+    return TAGGER.tags(" ".join(texts))
+
+
+def tag_text(text: str) -> List[str]:
+    """
+    Gets the tags of a text with the default tagger. Runs in the tag_corpus pool processes.
+    """
+    return TAGGER.tags(text)
+
+
+def tag_corpus(texts: Sequence[str], processes: int = TAG_PROCESSES, chunksize: int = TAG_CHUNKSIZE) -> List[List[str]]:
+    """
+    Gets the tags of many texts, in chunks of chunksize spread over a pool of processes.
+    Small corpora, or processes <= 1, are tagged in this process.
+    """
+    if processes <= 1 or len(texts) <= chunksize:
+        return [tag_text(text) for text in texts]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(tag_text, texts, chunksize=chunksize))
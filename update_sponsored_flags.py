@@ -1,46 +1,49 @@
 #!/usr/bin/env python3
 """
-Script to update existing JSON data with is_sponsored flags by scanning markdown files.
+Script to update the essay catalog with is_sponsored flags by scanning markdown files.
+Posts the scraper already classified (they have a sponsored_line) are skipped, unless --all.
 """
-import json
-import os
+import sys
+
+from ad_detector import find_sponsored_in_file, sponsored_fields
+from catalog import Catalog
 
 def check_if_sponsored(md_filepath):
-    """Check if a markdown file contains sponsored content"""
+    """Find the sponsored section of a markdown file: its line number, or None"""
     try:
-        with open(md_filepath, 'r', encoding='utf-8') as f:
-            content = f.read().lower()
-            return "sponsored)" in content or "(sponsored)" in content
-    except:
-        return False
-
-def update_json_with_sponsored_flags(json_path):
-    """Update JSON file with is_sponsored flags"""
-    print(f"Reading {json_path}...")
+        return find_sponsored_in_file(md_filepath)
+    except OSError:
+        return None
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        essays = json.load(f)
+def update_catalog_with_sponsored_flags(writer_name, rescan=False):
+    """Update the essay catalog with is_sponsored flags"""
+    catalog = Catalog.for_writer(writer_name)
+    print(f"Reading {catalog.path}...")
 
+    essays = catalog.essays()
     print(f"Found {len(essays)} essays")
     sponsored_count = 0
+    updates = []
 
     for essay in essays:
-        md_file = essay['file_link']
-        is_sponsored = check_if_sponsored(md_file)
-        essay['is_sponsored'] = is_sponsored
-        if is_sponsored:
+        if not rescan and 'sponsored_line' in essay:
+            sponsored_count += bool(essay.get('is_sponsored'))
+            continue
+        fields = sponsored_fields(check_if_sponsored(essay['file_link']))
+        if any(field not in essay or essay[field] != value for field, value in fields.items()):
+            updates.append((essay, fields))
+        if fields['is_sponsored']:
             sponsored_count += 1
 
     print(f"Detected {sponsored_count} sponsored posts")
 
-    # Write back to JSON
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(essays, f, ensure_ascii=False, indent=4)
+    # Only the changed flags are written
+    updated = catalog.update_many(updates)
+    catalog.close()
 
-    print(f"✓ Updated {json_path}")
+    print(f"✓ Updated {updated} entries in {catalog.path}")
     return sponsored_count
 
 if __name__ == "__main__":
-    json_path = "data/blog.json"
-    sponsored_count = update_json_with_sponsored_flags(json_path)
+    sponsored_count = update_catalog_with_sponsored_flags("blog", rescan="--all" in sys.argv[1:])
     print(f"\nSummary: {sponsored_count} sponsored posts out of total")